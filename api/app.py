@@ -1,95 +1,689 @@
-from flask import Flask, request, jsonify
+import json
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
+import requests
+from flask import Flask, Response, g, request, jsonify, send_file, stream_with_context
 
-from social_extractors import extract_from_instagram, extract_from_twitter
-from personality_trait_analyzer import run_full_analysis
+
+from social_extractors import (
+    MAX_FETCH_DEADLINE, SCHEDULER, extract_from_instagram, extract_from_twitter, sanitize_handle
+)
+from personality_trait_analyzer import (
+    run_full_analysis, run_batch_analysis, analysis_cache_key, warm_up, DEFAULT_TOP_K, MAX_TOP_K
+)
+from image_cache import PRESETS, ThumbnailCache, allowed_image_url
+from job_store import JobStore
+from metrics import Registry
+from result_cache import ResultCache
+from scrape_scheduler import SharedScrapeScheduler
+from single_flight import SingleFlight
 
 app = Flask(__name__)
 # Swagger(app)
 
+# Defaults for /recommend_gifts/batch, can be overridden per request
+BATCH_SIZE = int(os.environ.get("GIFTIQ_BATCH_SIZE", 64))
+BATCH_N_PROCESS = int(os.environ.get("GIFTIQ_BATCH_N_PROCESS", 1))
+MAX_BATCH_ITEMS = int(os.environ.get("GIFTIQ_MAX_BATCH_ITEMS", 1000))
 
-@app.route("/recommend_gifts", methods=["POST"])
-def recommend():
-    
-    payload = request.get_json()
+# Analysis results for repeated bios, GIFTIQ_RESULT_CACHE_SIZE=0 disables it
+RESULT_CACHE = ResultCache(
+    max_size=int(os.environ.get("GIFTIQ_RESULT_CACHE_SIZE", 1024)),
+    ttl=float(os.environ.get("GIFTIQ_RESULT_CACHE_TTL", 3600))
+)
+
+# Concurrent /recommend_gifts requests for the same social handle share one lookup and analysis,
+# GIFTIQ_COALESCE=0 turns it off
+IN_FLIGHT = SingleFlight(enabled=os.environ.get("GIFTIQ_COALESCE", "1") == "1")
+
+# POST /jobs runs requests here instead of on the web worker. Each process takes at most
+# GIFTIQ_JOB_QUEUE jobs that have not finished yet, more are refused with 503
+JOB_WORKERS = int(os.environ.get("GIFTIQ_JOB_WORKERS", 8))
+JOB_EXECUTOR = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="job")
+MAX_PENDING_JOBS = int(os.environ.get("GIFTIQ_JOB_QUEUE", 256))
+JOBS_PENDING = 0
+JOBS_LOCK = threading.Lock()
+JOB_STORE = JobStore(
+    os.environ.get("GIFTIQ_JOB_STORE_PATH", Path(__file__).resolve().parent / ".cache" / "jobs.sqlite3"),
+    ttl=float(os.environ.get("GIFTIQ_JOB_TTL", 3600))
+)
+
+# Resized catalog/background images served by /images, GIFTIQ_IMAGE_CACHE_MB caps the directory
+THUMBNAILS = ThumbnailCache(
+    os.environ.get("GIFTIQ_IMAGE_CACHE_PATH", Path(__file__).resolve().parent / ".cache" / "thumbnails"),
+    max_bytes=int(float(os.environ.get("GIFTIQ_IMAGE_CACHE_MB", 64)) * 1024 * 1024)
+)
+# Thumbnails never change for a given URL, browsers may keep them for a year
+IMAGE_MAX_AGE = int(os.environ.get("GIFTIQ_IMAGE_MAX_AGE", 365 * 86400))
+
+# Served on /metrics in the Prometheus text format
+METRICS = Registry()
+REQUESTS = METRICS.counter("giftiq_requests_total", "HTTP requests by route and status", ["endpoint", "status"])
+REQUEST_SECONDS = METRICS.histogram("giftiq_request_duration_seconds", "HTTP request latency by route", ["endpoint"])
+STAGE_SECONDS = METRICS.histogram(
+    "giftiq_stage_duration_seconds",
+    "Time per pipeline stage (extraction, clean_text, spacy, keyword_merge, inference, gifts) by source",
+    ["stage", "source"]
+)
+ERRORS = METRICS.counter("giftiq_errors_total", "Failed items by source and error type", ["source", "error_type"])
+for stat, kind in [("hits", "counter"), ("misses", "counter"), ("evictions", "counter"),
+                   ("expirations", "counter"), ("size", "gauge")]:
+    METRICS.callback(
+        f"giftiq_result_cache_{stat}" + ("_total" if kind == "counter" else ""),
+        f"Result cache {stat}", kind,
+        lambda stat=stat: RESULT_CACHE.stats()[stat]
+    )
+
+# Workers share the thumbnail directory, so its size is the largest any of them has seen
+for stat, kind in [("hits", "counter"), ("misses", "counter"), ("evictions", "counter"),
+                   ("size_bytes", "gauge")]:
+    METRICS.callback(
+        f"giftiq_thumbnail_cache_{stat}" + ("_total" if kind == "counter" else ""),
+        f"Thumbnail cache {stat}", kind,
+        lambda stat=stat: THUMBNAILS.stats()[stat],
+        aggregate="max"
+    )
+
+METRICS.callback("giftiq_coalesced_requests_total", "Social requests answered by another request's lookup",
+                 "counter", lambda: IN_FLIGHT.stats()["coalesced"])
+METRICS.callback("giftiq_coalesce_leaders_total", "Social requests that ran their own lookup",
+                 "counter", lambda: IN_FLIGHT.stats()["leaders"])
+
+SCRAPE_WAIT_SECONDS = METRICS.histogram(
+    "giftiq_scrape_wait_seconds", "Time social lookups waited for a scheduler slot", ["source"]
+)
+SCHEDULER.on_wait = lambda source, seconds: SCRAPE_WAIT_SECONDS.labels(source).observe(seconds)
+# A shared scheduler's queue and backoff are the same in every worker, a local one's add up
+SCHEDULER_GAUGES = "max" if isinstance(SCHEDULER, SharedScrapeScheduler) else "sum"
+for stat, kind, doc in [
+    ("queue_depth", "gauge", "Social lookups waiting for a scheduler slot"),
+    ("backoff_seconds", "gauge", "Seconds left before a throttled source is called again"),
+    ("throttled", "counter", "Throttling answers (HTTP 429, block pages) from upstream"),
+    ("rejected_queue_full", "counter", "Social lookups turned away because the scheduler queue was full"),
+    ("rejected_deadline", "counter", "Social lookups turned away because no slot was free before their deadline"),
+]:
+    METRICS.callback(
+        f"giftiq_scrape_{stat}" + ("_total" if kind == "counter" else ""), doc, kind,
+        lambda stat=stat: {(source,): stats[stat] for source, stats in SCHEDULER.stats().items()},
+        ["source"], aggregate=SCHEDULER_GAUGES
+    )
+
+JOB_QUEUE_SECONDS = METRICS.histogram("giftiq_job_queue_seconds", "Time jobs waited for a job worker")
+METRICS.callback("giftiq_jobs", "Unexpired jobs by status, across all workers", "gauge",
+                 lambda: {(status,): count for status, count in JOB_STORE.counts().items()}, ["status"])
+METRICS.callback("giftiq_jobs_pending", "Jobs queued or running in this process", "gauge", lambda: JOBS_PENDING)
+
+KNOWN_SOURCES = {"instagram", "twitter", "manual"}
+
+
+def failure(error, error_type):
+    return {
+        "success": False,
+        "error": error,
+        "error_type": error_type,
+        "traits": [],
+        "interests": [],
+        "gifts": []
+    }
+
+
+def extraction_info(social):
+    """How the posts for a social lookup were fetched"""
+    return {
+        "posts_fetched": social.get("posts_fetched", len(social.get("posts", []))),
+        "fetch_seconds": social.get("fetch_seconds"),
+        "partial": social.get("partial", False)
+    }
 
-    source = payload.get("source")
-    value = payload.get("value")
 
+def resolve_bio_text(source, value, deadline=None, timings=None):
+    """
+    Turn a {source, value} pair into bio text
+    deadline: optional seconds budget for social lookups
+    timings: optional dict that receives the social lookup seconds as "extraction"
+    Returns (bio_text, extraction, None, None) on success or (None, None, failure_body, status_code)
+    extraction is None for manual bios
+    """
     if not source or not value:
-        return jsonify({"error": "source and value are required"}), 400
+        return None, None, {"error": "source and value are required"}, 400
 
+    extraction = None
     try:
         # Extract bio text based on source
         if source == "instagram":
-            social = extract_from_instagram(value)
-            
+            start = time.perf_counter()
+            social = extract_from_instagram(value, deadline=deadline)
+            record_extraction(source, time.perf_counter() - start, timings)
+
             # Check for extraction failure
             if not social.get("success", False):
-                return jsonify({
-                    "success": False,
-                    "error": social.get("error", "Failed to extract Instagram data"),
-                    "error_type": social.get("error_type", "unknown"),
-                    "traits": [],
-                    "interests": [],
-                    "gifts": []
-                }), 400
-            
+                return None, None, failure(
+                    social.get("error", "Failed to extract Instagram data"),
+                    social.get("error_type", "unknown")
+                ), 400
+
             bio_text = social["bio"] + " " + " ".join(social["posts"])
+            extraction = extraction_info(social)
+
 
-            
         elif source == "twitter":
-            social = extract_from_twitter(value)
-            
+            start = time.perf_counter()
+            social = extract_from_twitter(value, deadline=deadline)
+            record_extraction(source, time.perf_counter() - start, timings)
+
             # Check for extraction failure
             if not social.get("success", False):
-                return jsonify({
-                    "success": False,
-                    "error": social.get("error", "Failed to extract Twitter data"),
-                    "error_type": social.get("error_type", "twitter_error"),
-                    "traits": [],
-                    "interests": [],
-                    "gifts": []
-                }), 400
-            
+                return None, None, failure(
+                    social.get("error", "Failed to extract Twitter data"),
+                    social.get("error_type", "twitter_error")
+                ), 400
+
             bio_text = social.get("bio", "") + " " + " ".join(social.get("posts", ""))
-            
+            extraction = extraction_info(social)
+
         elif source == "manual":
             bio_text = value
 
         else:
-            return jsonify({"error": "Invalid source"}), 400
+            return None, None, {"error": "Invalid source"}, 400
 
         if not bio_text or not bio_text.strip():
-            return jsonify({
-                "success": False,
-                "error": "No bio text extracted from the provided source",
-                "error_type": "empty_bio",
-                "traits": [],
-                "interests": [],
-                "gifts": []
-            }), 400
+            return None, None, failure("No bio text extracted from the provided source", "empty_bio"), 400
 
     except Exception as e:
-        return jsonify({
-            "success": False,
-            "error": str(e),
-            "error_type": "server_error",
-            "traits": [],
-            "interests": [],
-            "gifts": []
-        }), 500
-
-    # Run full analysis pipeline on the bio text
-    analysis_result = run_full_analysis(bio_text)
+        return None, None, failure(str(e), "server_error"), 500
 
-    return jsonify({
+    return bio_text, extraction, None, None
+
+
+def parse_deadline(payload):
+    """Optional per-request "deadline" (seconds) for social lookups, None when absent"""
+    deadline = payload.get("deadline")
+    if deadline is None:
+        return None
+    deadline = float(deadline)
+    if not math.isfinite(deadline) or deadline <= 0:
+        raise ValueError("deadline must be a positive number")
+    # A client cannot hold a lookup worker longer than the server allows
+    return min(deadline, MAX_FETCH_DEADLINE)
+
+
+def parse_top_k(payload):
+    """Optional per-request "top_k" (number of ranked gifts), 1..MAX_TOP_K"""
+    top_k = int(payload.get("top_k", DEFAULT_TOP_K))
+    if not 1 <= top_k <= MAX_TOP_K:
+        raise ValueError(f"top_k must be between 1 and {MAX_TOP_K}")
+    return top_k
+
+
+def source_label(source):
+    """Metric label for a user-supplied source, kept to a fixed set"""
+    return source if source in KNOWN_SOURCES else "invalid"
+
+
+def count_error(source, error):
+    ERRORS.labels(source_label(source), error.get("error_type", "invalid_request")).inc()
+
+
+def record_extraction(source, seconds, timings=None):
+    STAGE_SECONDS.labels("extraction", source).observe(seconds)
+    if timings is not None:
+        timings["extraction"] = seconds
+
+
+def observe_stages(timings, source):
+    for stage, seconds in timings.items():
+        STAGE_SECONDS.labels(stage, source).observe(seconds)
+
+
+def analyze_bio(bio_text, top_k=DEFAULT_TOP_K, source="manual", timings=None):
+    """
+    run_full_analysis with the result cache in front of it
+    timings: optional dict that receives the stage seconds (none on a cache hit)
+    and "result_cache": "hit" or "miss"
+    """
+    key = analysis_cache_key(bio_text, top_k)
+    analysis_result = RESULT_CACHE.get(key)
+    hit = analysis_result is not None
+    if not hit:
+        stage_timings = {}
+        analysis_result = run_full_analysis(bio_text, top_k, stage_timings)
+        observe_stages(stage_timings, source_label(source))
+        RESULT_CACHE.set(key, analysis_result)
+        if timings is not None:
+            timings.update(stage_timings)
+    if timings is not None:
+        timings["result_cache"] = "hit" if hit else "miss"
+    return analysis_result
+
+
+def coalesce_key(source, value, top_k, deadline):
+    """
+    Single-flight key of a social request, None for requests that are not coalesced
+    The deadline is part of it: a follower waits as long as its leader's lookup may take
+    """
+    if source not in ("instagram", "twitter") or not isinstance(value, str):
+        return None
+    return source, sanitize_handle(value).lower(), top_k, deadline
+
+
+def resolve_and_analyze(source, value, deadline, top_k, timings):
+    """(analysis_result, extraction, failure_body, status_code), the work shared by coalesced requests"""
+    bio_text, extraction, error, status = resolve_bio_text(source, value, deadline, timings)
+    if error is not None:
+        return None, None, error, status
+    return analyze_bio(bio_text, top_k, source, timings), extraction, None, None
+
+
+def timings_requested():
+    """?timings=1 or an X-GiftIQ-Timings: 1 header asks for the per-stage breakdown"""
+    return timings_flag(request.args.get("timings") or request.headers.get("X-GiftIQ-Timings"))
+
+
+def timings_flag(flag):
+    return (flag or "").lower() in ("1", "true", "yes")
+
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def record_request(response):
+    # Route pattern rather than the raw path, so label values stay bounded
+    endpoint = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    REQUESTS.labels(endpoint, str(response.status_code)).inc()
+    REQUEST_SECONDS.labels(endpoint).observe(time.perf_counter() - g.request_start)
+    return response
+
+
+RECOMMEND_OPTIONS_ERROR = f"deadline must be a positive number of seconds, top_k an integer from 1 to {MAX_TOP_K}"
+
+
+def recommend_body(source, analysis_result, extraction, timings, request_start, coalesced=False):
+    """
+    /recommend_gifts response for an analyzed bio, shared with the async app (asgi.py)
+    timings: the stage timings when the caller asked for them, else None
+    coalesced: the result came from an identical request's run (no stages or result cache
+    lookup of its own, result_cache is None)
+    """
+    response = {
         "source": source,
         "traits": analysis_result["traits"],
         "interests": analysis_result["interests"],
         "gifts": analysis_result["gifts"]
+    }
+    if extraction is not None:
+        response["extraction"] = extraction
+    if timings is not None:
+        response["timings"] = {
+            "stages_ms": {
+                stage: round(seconds * 1000, 3) for stage, seconds in timings.items() if stage != "result_cache"
+            },
+            "total_ms": round((time.perf_counter() - request_start) * 1000, 3),
+            "result_cache": timings.get("result_cache"),
+            "keyword_count": analysis_result["keyword_count"],
+            "posts_fetched": extraction["posts_fetched"] if extraction is not None else 0,
+            "coalesced": coalesced
+        }
+    return response
+
+
+def recommend_options(payload):
+    """
+    ((source, value, deadline, top_k), None) for a valid /recommend_gifts body,
+    (None, (error_body, status_code)) otherwise
+    """
+    if not isinstance(payload, dict):
+        return None, ({"error": "Request body must be a JSON object"}, 400)
+    try:
+        deadline = parse_deadline(payload)
+        top_k = parse_top_k(payload)
+    except (TypeError, ValueError):
+        return None, ({"error": RECOMMEND_OPTIONS_ERROR}, 400)
+    return (payload.get("source"), payload.get("value"), deadline, top_k), None
+
+
+def recommend_response(source, outcome, coalesced, timings, request_start):
+    """(body, status_code) for the outcome of resolve_and_analyze"""
+    analysis_result, extraction, error, status = outcome
+    if error is not None:
+        count_error(source, error)
+        return error, status
+    return recommend_body(source, analysis_result, extraction, timings, request_start, coalesced), 200
+
+
+def recommend_outcome(payload, timings=None, request_start=None):
+    """
+    (body, status_code) of /recommend_gifts for a parsed request body (None when it was not JSON),
+    shared by the route and the job workers. asgi.py has the awaited twin of this function
+    """
+    options, invalid = recommend_options(payload)
+    if invalid is not None:
+        return invalid
+    source, value, deadline, top_k = options
+
+    try:
+        # Extract the bio and run the full analysis pipeline on it, sharing the run with any
+        # identical social request already in progress
+        key = coalesce_key(source, value, top_k, deadline)
+        if key is None:
+            outcome, coalesced = resolve_and_analyze(source, value, deadline, top_k, timings), False
+        else:
+            outcome, coalesced = IN_FLIGHT.do(key, resolve_and_analyze, source, value, deadline, top_k, timings)
+        return recommend_response(source, outcome, coalesced, timings, request_start)
+    except Exception as e:
+        return failure(str(e), "server_error"), 500
+
+
+@app.route("/recommend_gifts", methods=["POST"])
+def recommend():
+
+    # Any body that parses as JSON is read, whatever its Content-Type, the rest is rejected
+    # by recommend_outcome with the same JSON error as in the async app
+    payload = request.get_json(force=True, silent=True)
+
+    # Only filled (and returned) when the caller asks for it
+    timings = {} if timings_requested() else None
+
+    body, status = recommend_outcome(payload, timings, g.request_start)
+    return jsonify(body), status
+
+
+def run_job(job_id, payload):
+    """Runs a POST /jobs job on JOB_EXECUTOR and records its outcome"""
+    global JOBS_PENDING
+    try:
+        # A job that cannot even be marked running is recorded as failed, not left queued
+        try:
+            JOB_STORE.start(job_id)
+            JOB_QUEUE_SECONDS.observe(time.time() - payload["submitted_at"])
+            body, status = recommend_outcome(payload["request"])
+        except Exception as e:
+            body, status = failure(str(e), "server_error"), 500
+        JOB_STORE.finish(job_id, status, body)
+    finally:
+        with JOBS_LOCK:
+            JOBS_PENDING -= 1
+
+
+@app.route("/jobs", methods=["POST"])
+def submit_job():
+    """
+    Queue a /recommend_gifts request, answers 202 with the job id at once
+    Body: the /recommend_gifts body. Poll GET /jobs/<job_id> for the outcome
+    """
+    global JOBS_PENDING
+    # Same parsing and validation as /recommend_gifts, so a job fails at submission
+    # rather than later for anything that route would reject up front
+    payload = request.get_json(force=True, silent=True)
+    options, invalid = recommend_options(payload)
+    if invalid is not None:
+        body, status = invalid
+        return jsonify(body), status
+    source, value, _, _ = options
+    if not isinstance(source, str) or not isinstance(value, str) or not source or not value.strip():
+        return jsonify({"error": "source and value are required"}), 400
+    if source not in KNOWN_SOURCES:
+        return jsonify({"error": "Invalid source"}), 400
+
+    with JOBS_LOCK:
+        if JOBS_PENDING >= MAX_PENDING_JOBS:
+            response = jsonify({"error": "Too many jobs waiting, please try again shortly"})
+            response.headers["Retry-After"] = "5"
+            return response, 503
+        JOBS_PENDING += 1
+
+    job_id = None
+    try:
+        job_id = JOB_STORE.create(payload)
+        JOB_EXECUTOR.submit(run_job, job_id, {"request": payload, "submitted_at": time.time()})
+    except Exception as e:
+        # The job never reaches run_job, so its slot is given back here
+        with JOBS_LOCK:
+            JOBS_PENDING -= 1
+        body = failure(f"Could not queue the job: {e}", "server_error")
+        if job_id is not None:
+            try:
+                JOB_STORE.finish(job_id, 500, body)
+            except Exception:
+                pass
+        return jsonify(body), 500
+
+    response = jsonify({"job_id": job_id, "status": "queued", "status_url": f"/jobs/{job_id}"})
+    response.headers["Location"] = f"/jobs/{job_id}"
+    return response, 202
+
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    """
+    {job_id, status: queued|running|done|failed, timestamps}, plus "result" (the
+    /recommend_gifts body) once done or "error" and "status_code" once failed
+    """
+    job = JOB_STORE.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+    return jsonify(job)
+
+
+@app.route("/jobs", methods=["GET"])
+def job_backlog():
+    """Jobs per status across every worker, and this worker's share of the backlog"""
+    with JOBS_LOCK:
+        pending = JOBS_PENDING
+    return jsonify({
+        "jobs": JOB_STORE.counts(),
+        "worker": {"pending": pending, "max_pending": MAX_PENDING_JOBS, "threads": JOB_WORKERS}
     })
 
 
+def analyze_items(items, batch_size, n_process, deadline=None, top_k=DEFAULT_TOP_K, first_index=0):
+    """
+    Resolve and analyze a list of {source, value} items
+    Cached bios are answered from RESULT_CACHE, the rest go through spaCy together
+    Returns one response entry per item, in order, numbered from first_index
+    """
+    results = [None] * len(items)
+    extractions = [None] * len(items)
+    pending_indexes = []
+    pending_bios = []
+    pending_keys = []
+
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            results[index] = {"error": "source and value are required"}
+            count_error(None, results[index])
+            continue
+
+        bio_text, extractions[index], error, _ = resolve_bio_text(item.get("source"), item.get("value"), deadline)
+        if error is not None:
+            results[index] = error
+            count_error(item.get("source"), error)
+            continue
+
+        key = analysis_cache_key(bio_text, top_k)
+        cached = RESULT_CACHE.get(key)
+        if cached is not None:
+            results[index] = cached
+            continue
+
+        pending_indexes.append(index)
+        pending_bios.append(bio_text)
+        pending_keys.append(key)
+
+    # All uncached bios go through spaCy together
+    if pending_bios:
+        timings = {}
+        try:
+            analyses = run_batch_analysis(pending_bios, batch_size=batch_size, n_process=n_process, top_k=top_k,
+                                          timings=timings)
+            # Stage times cover the whole nlp.pipe batch, whatever the items' sources
+            observe_stages(timings, "batch")
+        except Exception as e:
+            analyses = [failure(str(e), "server_error")] * len(pending_bios)
+            pending_keys = [None] * len(pending_bios)
+            ERRORS.labels("batch", "server_error").inc(len(pending_bios))
+
+        for index, key, analysis_result in zip(pending_indexes, pending_keys, analyses):
+            results[index] = analysis_result
+            if key is not None:
+                RESULT_CACHE.set(key, analysis_result)
+
+    response = []
+    for index, (item, result, extraction) in enumerate(zip(items, results, extractions), first_index):
+        source = item.get("source") if isinstance(item, dict) else None
+        if "error" in result:
+            response.append({"index": index, "source": source, "success": False, **result})
+        else:
+            entry = {
+                "index": index,
+                "source": source,
+                "success": True,
+                "traits": result["traits"],
+                "interests": result["interests"],
+                "gifts": result["gifts"]
+            }
+            if extraction is not None:
+                entry["extraction"] = extraction
+            response.append(entry)
+
+    return response
+
+
+@app.route("/recommend_gifts/batch", methods=["POST"])
+def recommend_batch():
+    """
+    Analyze many {source, value} items in one request
+    Body: {"items": [{"source": ..., "value": ...}, ...], "batch_size": 64, "n_process": 1, "deadline": 8, "top_k": 5}
+    Every item gets its own result or error, in input order
+    """
+    payload = request.get_json(force=True, silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({"error": "Request body must be a JSON object"}), 400
+    items = payload.get("items")
+
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "items must be a non-empty list"}), 400
+    if len(items) > MAX_BATCH_ITEMS:
+        return jsonify({"error": f"At most {MAX_BATCH_ITEMS} items per batch"}), 400
+
+    try:
+        batch_size = max(1, int(payload.get("batch_size", BATCH_SIZE)))
+        n_process = max(1, min(int(payload.get("n_process", BATCH_N_PROCESS)), os.cpu_count() or 1))
+        deadline = parse_deadline(payload)
+        top_k = parse_top_k(payload)
+    except (TypeError, ValueError):
+        return jsonify({"error": f"batch_size and n_process must be integers, deadline a positive number, top_k from 1 to {MAX_TOP_K}"}), 400
+
+    return jsonify({"results": analyze_items(items, batch_size, n_process, deadline, top_k)})
+
+
+# Stands in for an NDJSON line that does not parse, a JSON null line is None
+INVALID_LINE = object()
+
+
+def read_ndjson_chunks(stream, chunk_size):
+    """
+    Yield lists of up to chunk_size parsed NDJSON lines, reading the stream lazily
+    Blank lines are skipped; a line that is not valid JSON becomes INVALID_LINE
+    so it still gets its own error entry in the output
+    """
+    chunk = []
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            chunk.append(json.loads(line))
+        except ValueError:
+            chunk.append(INVALID_LINE)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+@app.route("/recommend_gifts/stream", methods=["POST"])
+def recommend_stream():
+    """
+    Bulk analysis over NDJSON: one {"source": ..., "value": ...} object per request line,
+    one result object (same shape as a /recommend_gifts/batch entry) per response line
+    Options go in the query string: ?batch_size=64&n_process=1&deadline=8&top_k=5
+    Input is read and answered batch_size lines at a time, so memory does not grow
+    with the number of lines
+    """
+    try:
+        batch_size = max(1, int(request.args.get("batch_size", BATCH_SIZE)))
+        n_process = max(1, min(int(request.args.get("n_process", BATCH_N_PROCESS)), os.cpu_count() or 1))
+        deadline = parse_deadline(request.args)
+        top_k = parse_top_k(request.args)
+    except (TypeError, ValueError):
+        return jsonify({"error": f"batch_size and n_process must be integers, deadline a positive number, top_k from 1 to {MAX_TOP_K}"}), 400
+
+    stream = request.stream
+
+    def generate():
+        index = 0
+        for chunk in read_ndjson_chunks(stream, batch_size):
+            for entry in analyze_items(chunk, batch_size, n_process, deadline, top_k, first_index=index):
+                if chunk[entry["index"] - index] is INVALID_LINE:
+                    entry["error"] = "Line is not valid JSON"
+                # Same provider and compact separators as jsonify, so an entry has the bytes it
+                # has in /recommend_gifts/batch, and stays on one line even in debug mode
+                yield app.json.dumps(entry, separators=(",", ":")) + "\n"
+            index += len(chunk)
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+@app.route("/images/<preset>", methods=["GET"])
+def image(preset):
+    """
+    Resized copy of a remote image, /images/thumb?url=<image url>
+    Fetched and resized on first use, then served from the on-disk cache
+    """
+    url = request.args.get("url", "")
+    if preset not in PRESETS:
+        return jsonify({"error": f"preset must be one of {', '.join(PRESETS)}"}), 404
+    if not allowed_image_url(url):
+        return jsonify({"error": "url must be an http(s) image on an allowed host"}), 400
+
+    try:
+        path = THUMBNAILS.path_for(url, PRESETS[preset])
+    except (requests.RequestException, OSError, ValueError) as e:
+        # OSError covers Pillow's UnidentifiedImageError, ValueError oversized images and
+        # redirects off the allowed hosts
+        return jsonify({"error": f"Image unavailable: {type(e).__name__}"}), 502
+
+    # The file name is a digest of (url, size), a stable ETag across workers and restarts
+    response = send_file(path, mimetype="image/jpeg", max_age=IMAGE_MAX_AGE, conditional=True, etag=path.stem)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+@app.route("/cache/stats", methods=["GET"])
+def cache_stats():
+    return jsonify(RESULT_CACHE.stats())
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    return Response(METRICS.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 if __name__ == "__main__":
-    app.run(debug=True)
\ No newline at end of file
+    # The reloader runs this file twice, only the serving child (WERKZEUG_RUN_MAIN) loads the model.
+    # It loads in the background so the socket opens right away, a request arriving before it
+    # is done waits for it. GIFTIQ_WARM_UP=0 leaves the load to the first request
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true" and os.environ.get("GIFTIQ_WARM_UP", "1") == "1":
+        threading.Thread(target=warm_up, daemon=True).start()
+    app.run(debug=True, port=int(os.environ.get("GIFTIQ_PORT", 5000)))
@@ -0,0 +1,166 @@
+"""
+Async serving mode for I/O-bound traffic (python run.py --async, or python asgi.py)
+
+Instagram/Twitter lookups spend seconds waiting on the network. Under the WSGI app each one
+holds a worker thread, so a few slow profiles leave manual bios queueing. Here the event
+loop only awaits: lookups run on an I/O executor sized for hundreds of them, spaCy runs on
+its own small executor, and manual bios go straight to spaCy without waiting on either.
+instaloader and snscrape are blocking libraries, which is why lookups are awaited on
+threads rather than written as coroutines.
+
+POST /recommend_gifts answers exactly like app.py, error paths included: both validate
+and answer through the same app.py helpers. Every other route is the Flask app, served
+through a2wsgi's WSGI adapter on its own pool of IO_WORKERS threads.
+
+  GIFTIQ_ASYNC_IO_WORKERS   concurrent social lookups (default 256)
+  GIFTIQ_ASYNC_CPU_WORKERS  concurrent analyses (default 2, spaCy holds the GIL for most of a parse)
+"""
+
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from a2wsgi import WSGIMiddleware
+
+IO_WORKERS = int(os.environ.get("GIFTIQ_ASYNC_IO_WORKERS", 256))
+# The extractors' own thread pool and client pool would otherwise cap lookups far below
+# IO_WORKERS. Set before social_extractors reads them on import
+os.environ.setdefault("GIFTIQ_FETCH_WORKERS", str(IO_WORKERS))
+os.environ.setdefault("GIFTIQ_INSTALOADER_POOL_SIZE", str(IO_WORKERS))
+
+from app import (  # noqa: E402
+    IN_FLIGHT, REQUESTS, REQUEST_SECONDS, analyze_bio, app as flask_app, coalesce_key, failure,
+    recommend_options, recommend_response, resolve_bio_text, timings_flag, warm_up
+)
+
+IO_EXECUTOR = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="asgi-io")
+CPU_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("GIFTIQ_ASYNC_CPU_WORKERS", 2)),
+    thread_name_prefix="asgi-cpu"
+)
+FLASK_APP = WSGIMiddleware(flask_app, workers=IO_WORKERS)
+
+
+async def read_body(receive):
+    body = bytearray()
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body", False):
+            return bytes(body)
+
+
+async def send_json(send, status, body):
+    # Built by the same JSON provider call as jsonify, so both modes send identical bytes
+    with flask_app.app_context():
+        data = flask_app.json.response(body).get_data()
+    await send({"type": "http.response.start", "status": status, "headers": [
+        (b"content-type", b"application/json"), (b"content-length", str(len(data)).encode("latin-1"))
+    ]})
+    await send({"type": "http.response.body", "body": data})
+
+
+def header(scope, name):
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def query_param(scope, name):
+    for pair in scope.get("query_string", b"").decode("latin-1").split("&"):
+        key, _, value = pair.partition("=")
+        if key == name:
+            return value
+    return None
+
+
+async def recommend_outcome(payload, timings, request_start):
+    """(body, status) of /recommend_gifts, app.recommend_outcome with the waits awaited"""
+    options, invalid = recommend_options(payload)
+    if invalid is not None:
+        return invalid
+    source, value, deadline, top_k = options
+
+    try:
+        key = coalesce_key(source, value, top_k, deadline)
+        if key is None:
+            outcome, coalesced = await resolve_and_analyze(source, value, deadline, top_k, timings), False
+        else:
+            outcome, coalesced = await IN_FLIGHT.do_async(
+                key, resolve_and_analyze, source, value, deadline, top_k, timings
+            )
+        return recommend_response(source, outcome, coalesced, timings, request_start)
+    except Exception as e:
+        return failure(str(e), "server_error"), 500
+
+
+async def resolve_and_analyze(source, value, deadline, top_k, timings):
+    """app.resolve_and_analyze with the lookup and the analysis awaited on their executors"""
+    loop = asyncio.get_running_loop()
+    if source == "manual":
+        # Nothing to wait for, no point in a thread hop
+        resolved = resolve_bio_text(source, value, deadline, timings)
+    else:
+        resolved = await loop.run_in_executor(IO_EXECUTOR, resolve_bio_text, source, value, deadline, timings)
+    bio_text, extraction, error, status = resolved
+    if error is not None:
+        return None, None, error, status
+
+    analysis_result = await loop.run_in_executor(CPU_EXECUTOR, analyze_bio, bio_text, top_k, source, timings)
+    return analysis_result, extraction, None, None
+
+
+async def recommend(scope, receive, send):
+    request_start = time.perf_counter()
+    try:
+        payload = json.loads(await read_body(receive))
+    except ValueError:
+        # Rejected by recommend_options, like app.recommend does with a body that is not JSON
+        payload = None
+
+    flag = query_param(scope, "timings") or header(scope, b"x-giftiq-timings")
+    timings = {} if timings_flag(flag) else None
+    body, status = await recommend_outcome(payload, timings, request_start)
+
+    await send_json(send, status, body)
+    REQUESTS.labels("/recommend_gifts", str(status)).inc()
+    REQUEST_SECONDS.labels("/recommend_gifts").observe(time.perf_counter() - request_start)
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            # Load spaCy before accepting requests, GIFTIQ_WARM_UP=0 leaves it to the first request
+            if os.environ.get("GIFTIQ_WARM_UP", "1") == "1":
+                await asyncio.get_running_loop().run_in_executor(CPU_EXECUTOR, warm_up)
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            IO_EXECUTOR.shutdown(wait=False, cancel_futures=True)
+            CPU_EXECUTOR.shutdown(wait=False, cancel_futures=True)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await lifespan(receive, send)
+    if scope["type"] != "http":
+        return
+
+    if scope["path"] == "/recommend_gifts" and scope["method"] == "POST":
+        return await recommend(scope, receive, send)
+
+    await FLASK_APP(scope, receive, send)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(
+        app, host=os.environ.get("GIFTIQ_HOST", "127.0.0.1"), port=int(os.environ.get("GIFTIQ_PORT", 5000)),
+        access_log=False, backlog=2048
+    )
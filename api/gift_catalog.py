@@ -0,0 +1,93 @@
+import json
+import re
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+
+DEFAULT_CATALOG_PATH = Path(__file__).resolve().parent / "data" / "gifts.json"
+
+
+class GiftCatalog:
+    """
+    Gift list plus the indexes built once at load time:
+    category -> gifts, tag -> gifts, tag word -> gifts,
+    and gifts sorted by price (overall and per category)
+    Every lookup costs time proportional to what it returns, not to the catalog size
+    Gifts within a category/tag keep their catalog order
+    """
+
+    def __init__(self, gifts):
+        self.gifts = list(gifts)
+        self.by_category = {}
+        self.by_tag = {}
+        self.by_tag_word = {}
+        # Per-gift data keyed by id(gift): catalog position (stable tie-breaker
+        # when ranking) and tag words (scoring)
+        self.position = {}
+        self.tag_words = {}
+
+        for i, gift in enumerate(self.gifts):
+            self.position[id(gift)] = i
+            self.tag_words[id(gift)] = tag_words(gift)
+
+            self.by_category.setdefault(gift.get("category"), []).append(gift)
+            for tag in gift.get("tags", []):
+                self.by_tag.setdefault(tag.lower(), []).append(gift)
+            for word in self.tag_words[id(gift)]:
+                self.by_tag_word.setdefault(word, []).append(gift)
+
+        self._by_price = self._price_index(self.gifts)
+        self._by_category_price = {
+            category: self._price_index(gifts) for category, gifts in self.by_category.items()
+        }
+
+    @staticmethod
+    def _price_index(gifts):
+        ordered = sorted(gifts, key=lambda gift: gift.get("price", 0))
+        return [gift.get("price", 0) for gift in ordered], ordered
+
+    def __len__(self):
+        return len(self.gifts)
+
+    def in_category(self, category):
+        return self.by_category.get(category, [])
+
+    def with_tag(self, tag):
+        return self.by_tag.get(tag.lower(), [])
+
+    def with_tag_word(self, word):
+        """Gifts having a tag that contains word ("home workout" for "workout")"""
+        return self.by_tag_word.get(word.lower(), [])
+
+    def in_price_range(self, min_price=None, max_price=None, category=None):
+        """Gifts with min_price <= price <= max_price, cheapest first, optionally within one category"""
+        if category is None:
+            prices, ordered = self._by_price
+        else:
+            prices, ordered = self._by_category_price.get(category, ([], []))
+
+        lo = 0 if min_price is None else bisect_left(prices, min_price)
+        hi = len(prices) if max_price is None else bisect_right(prices, max_price)
+        return ordered[lo:hi]
+
+    def categories(self):
+        return list(self.by_category)
+
+
+def tag_words(gift):
+    """Distinct lowercased words of a gift's tags ("sd+card" -> sd, card)"""
+    words = set()
+    for tag in gift.get("tags", []):
+        words.update(re.split(r"[\s+\-]+", tag.lower()))
+    words.discard("")
+    return frozenset(words)
+
+
+def load_catalog(path=DEFAULT_CATALOG_PATH):
+    """Read a JSON array of gifts and index it"""
+    with open(path, encoding="utf-8") as f:
+        gifts = json.load(f)
+
+    if not isinstance(gifts, list):
+        raise ValueError(f"Gift catalog {path} must be a JSON array of gifts")
+
+    return GiftCatalog(gifts)
@@ -0,0 +1,43 @@
+import heapq
+
+# How much a keyword hit is worth on a gift's category vs. on one of its tags
+CATEGORY_WEIGHT = 1.0
+TAG_WEIGHT = 2.0
+
+
+def score_gift(gift, words, keyword_counts, category_strength):
+    """
+    words: the gift's tag words (GiftCatalog.tag_words)
+    keyword_counts: {keyword: occurrences}, a tag word scores its keyword's count
+    category_strength: {category: weight} from SignalMatcher.match_counts
+    """
+    score = CATEGORY_WEIGHT * category_strength.get(gift.get("category"), 0)
+    for word in words:
+        score += TAG_WEIGHT * keyword_counts.get(word, 0)
+    return score
+
+
+def rank_gifts(catalog, keyword_counts, category_strength, k: int = 5):
+    """
+    Top-k gifts by score, picked with a bounded heap (O(n log k) over the candidates)
+    Candidates are the gifts of every matched category plus every gift with a matching tag word
+    Ties go to the gift that comes first in the catalog, so the ranking is deterministic
+    """
+    if k <= 0:
+        return []
+
+    candidates = {}
+    for category in category_strength:
+        for gift in catalog.in_category(category):
+            candidates[id(gift)] = gift
+    for keyword in keyword_counts:
+        for gift in catalog.with_tag_word(keyword):
+            candidates[id(gift)] = gift
+
+    scored = (
+        (score_gift(gift, catalog.tag_words[key], keyword_counts, category_strength), -catalog.position[key], gift)
+        for key, gift in candidates.items()
+    )
+    top = heapq.nlargest(k, scored, key=lambda entry: (entry[0], entry[1]))
+
+    return [gift for score, _, gift in top if score > 0]
@@ -0,0 +1,80 @@
+"""
+Gunicorn settings for the production API (python run.py --production)
+
+The app is imported once in the master (preload_app) and the spaCy model is
+warmed up there, so the model, the signal matchers and the gift catalog are
+loaded before the workers are forked and shared copy-on-write instead of
+loaded once per worker.
+
+Graceful restarts:
+  kill -HUP <master pid>   replace every worker after it finishes its requests
+  kill -TERM <master pid>  stop accepting, finish in-flight requests, then exit
+Code changes need a fresh master (TERM + start, or USR2 for a zero-downtime upgrade)
+because HUP forks the new workers from the already loaded app.
+
+Metrics: every worker adds its numbers to GIFTIQ_METRICS_PATH (metrics.SharedMetrics),
+so one scrape of /metrics, whichever worker answers it, covers the whole server and the
+counters stay monotonic across worker restarts. They start from zero with the master.
+"""
+
+import gc
+import os
+from pathlib import Path
+
+bind = os.environ.get("GIFTIQ_BIND", "127.0.0.1:5000")
+
+# spaCy parsing is CPU bound, so one process per core by default. Threads cover the
+# time requests spend waiting on Instagram/Twitter lookups. The scrape rate limits hold for
+# all workers together, their buckets are shared through SQLite (see social_extractors.py)
+workers = int(os.environ.get("GIFTIQ_WORKERS", os.cpu_count() or 1))
+threads = int(os.environ.get("GIFTIQ_THREADS", 4))
+worker_class = "gthread" if threads > 1 else "sync"
+
+preload_app = True
+
+# Long batch/stream requests are legitimate, a stuck worker is still replaced
+timeout = int(os.environ.get("GIFTIQ_WORKER_TIMEOUT", 120))
+graceful_timeout = int(os.environ.get("GIFTIQ_GRACEFUL_TIMEOUT", 30))
+keepalive = 5
+
+# Recycle workers after this many requests (0 = never), jittered so they do not restart together
+max_requests = int(os.environ.get("GIFTIQ_MAX_REQUESTS", 0))
+max_requests_jitter = max_requests // 10
+
+accesslog = os.environ.get("GIFTIQ_ACCESS_LOG") or None
+
+METRICS_PATH = os.environ.get("GIFTIQ_METRICS_PATH", Path(__file__).resolve().parent / ".cache" / "metrics.sqlite3")
+# Seconds a worker's latest counts can take to show up in another worker's /metrics
+METRICS_FLUSH_INTERVAL = float(os.environ.get("GIFTIQ_METRICS_FLUSH_INTERVAL", 1.0))
+
+
+def on_starting(server):
+    from metrics import SharedMetrics
+
+    SharedMetrics(METRICS_PATH).clear()
+
+
+def when_ready(server):
+    # Runs in the master after the preload and before any worker is forked.
+    # The app loads spaCy lazily, so it is loaded here explicitly to be shared by every worker
+    from personality_trait_analyzer import warm_up
+
+    warm_up()
+    # Moving the loaded objects out of the collector's generations stops gc passes
+    # in the workers from writing to (and so un-sharing) the model's memory pages
+    gc.freeze()
+    server.log.info("GiftIQ app preloaded, forking %s worker(s) x %s thread(s)", workers, threads)
+
+
+def post_fork(server, worker):
+    from app import METRICS
+    from metrics import SharedMetrics
+
+    METRICS.share(SharedMetrics(METRICS_PATH), interval=METRICS_FLUSH_INTERVAL)
+
+
+def worker_exit(server, worker):
+    # What a recycled worker counted since its last flush would otherwise be lost
+    from app import METRICS
+
+    METRICS.flush()
@@ -0,0 +1,221 @@
+import hashlib
+import io
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+
+import requests
+
+# Pillow is imported where thumbnails are made, only the image route needs it
+from session_pool import ResourcePool
+
+# Bounding boxes the proxy resizes to, anything else would let clients fill the cache with sizes
+PRESETS = {
+    "thumb": (400, 400),
+    "background": (1600, 1600),
+}
+
+# Larger downloads are refused instead of decoded
+MAX_SOURCE_BYTES = int(os.environ.get("GIFTIQ_IMAGE_MAX_SOURCE_BYTES", 15 * 1024 * 1024))
+MAX_REDIRECTS = 3
+
+# Only images from these hosts are proxied (catalog images, the UI background, placeholders)
+ALLOWED_HOSTS = {
+    host.strip().lower()
+    for host in os.environ.get(
+        "GIFTIQ_IMAGE_HOSTS", "m.media-amazon.com,images.unsplash.com,via.placeholder.com"
+    ).split(",")
+    if host.strip()
+}
+
+# Local stand-in (see standin_backend.py) serving /images/<host>/<path> instead of the real hosts
+STANDIN_URL = os.environ.get("GIFTIQ_IMAGE_STANDIN_URL", "").rstrip("/")
+
+IMAGE_POOL = ResourcePool(
+    requests.Session,
+    max_size=int(os.environ.get("GIFTIQ_IMAGE_POOL_SIZE", 4)),
+    close=lambda session: session.close(),
+    discard_on=(requests.exceptions.ConnectionError,)
+)
+
+
+def allowed_image_url(url: str) -> bool:
+    parts = urlsplit(url)
+    return parts.scheme in ("http", "https") and (parts.hostname or "").lower() in ALLOWED_HOSTS
+
+
+def fetch_image(url: str) -> bytes:
+    """
+    Download url (through the stand-in when set), at most MAX_SOURCE_BYTES
+    Redirects are followed by hand, each hop must pass allowed_image_url too
+    """
+    with IMAGE_POOL.borrow() as session:
+        for _ in range(MAX_REDIRECTS + 1):
+            fetch_url = url
+            if STANDIN_URL:
+                parts = urlsplit(url)
+                fetch_url = f"{STANDIN_URL}/images/{parts.hostname}{parts.path}"
+
+            with session.get(fetch_url, timeout=(3.05, 15), stream=True, allow_redirects=False) as response:
+                if response.is_redirect:
+                    url = urljoin(url, response.headers["Location"])
+                    if not allowed_image_url(url):
+                        raise ValueError("Image redirected to a host that is not allowed")
+                    continue
+
+                response.raise_for_status()
+                data = bytearray()
+                for chunk in response.iter_content(64 * 1024):
+                    data += chunk
+                    if len(data) > MAX_SOURCE_BYTES:
+                        raise ValueError(f"Image larger than {MAX_SOURCE_BYTES} bytes")
+                return bytes(data)
+
+    raise ValueError(f"Image redirected more than {MAX_REDIRECTS} times")
+
+
+def make_thumbnail(data: bytes, size) -> bytes:
+    """
+    JPEG of the image scaled down to fit in size, never scaled up
+    Raises ValueError for images over Pillow's pixel limit (decompression bombs)
+    """
+    from PIL import Image, ImageOps
+
+    try:
+        opened = Image.open(io.BytesIO(data))
+    except Image.DecompressionBombError as e:
+        raise ValueError(str(e)) from e
+
+    with opened as image:
+        # JPEGs can be decoded straight at a fraction of their size, much cheaper than a full decode
+        image.draft("RGB", size)
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail(size, Image.Resampling.LANCZOS)
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+
+        out = io.BytesIO()
+        image.save(out, "JPEG", quality=82, optimize=True, progressive=True)
+    return out.getvalue()
+
+
+class ThumbnailCache:
+    """
+    On-disk LRU cache of resized remote images keyed by (url, size)
+    Each image is downloaded and resized once, concurrent requests for it wait for that one
+    download. Least recently served files are deleted once the directory holds more than
+    max_bytes. Recency survives restarts through the file access times (mtimes are left
+    alone, they back the Last-Modified header).
+    Workers sharing the directory keep their own index: a file another worker made is
+    picked up from disk, one another worker evicted is fetched again.
+    """
+
+    def __init__(self, directory, max_bytes: int = 64 * 1024 * 1024, fetch=fetch_image):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.fetch = fetch
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._fetching = {}  # file name -> lock held while it is being made
+        self._entries = OrderedDict()  # file name -> size in bytes, least recently used first
+        self.total_bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        files = sorted(self.directory.glob("*.jpg"), key=lambda path: path.stat().st_atime)
+        for path in files:
+            self._entries[path.name] = path.stat().st_size
+            self.total_bytes += self._entries[path.name]
+        with self._lock:
+            self._evict()
+
+    @staticmethod
+    def file_name(url: str, size) -> str:
+        return hashlib.sha256(f"{size[0]}x{size[1]} {url}".encode("utf-8")).hexdigest()[:32] + ".jpg"
+
+    def path_for(self, url: str, size) -> Path:
+        """Path of the cached thumbnail, made now on a miss"""
+        name = self.file_name(url, size)
+        path = self.directory / name
+
+        if self._touch(name, path):
+            return path
+
+        with self._lock:
+            making = self._fetching.setdefault(name, threading.Lock())
+        with making:
+            # Another thread may have made it while this one waited
+            if self._touch(name, path, count=False):
+                return path
+            try:
+                data = make_thumbnail(self.fetch(url), size)
+                tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+                tmp.write_bytes(data)
+                os.replace(tmp, path)
+            finally:
+                with self._lock:
+                    self._fetching.pop(name, None)
+
+        with self._lock:
+            self.total_bytes += len(data) - self._entries.pop(name, 0)
+            self._entries[name] = len(data)
+            self._evict(keep=name)
+        return path
+
+    def _touch(self, name, path, count=True):
+        """Mark name as just used, False when it is not on disk"""
+        with self._lock:
+            try:
+                stat = path.stat()
+                os.utime(path, ns=(time.time_ns(), stat.st_mtime_ns))
+            except FileNotFoundError:
+                # Never made, or removed behind our back (another worker's eviction, a cleanup)
+                if name in self._entries:
+                    self.total_bytes -= self._entries.pop(name)
+                if count:
+                    self.misses += 1
+                return False
+
+            if name in self._entries:
+                self._entries.move_to_end(name)
+            else:
+                # Made by another worker sharing the directory
+                self._entries[name] = stat.st_size
+                self.total_bytes += stat.st_size
+                self._evict(keep=name)
+            if count:
+                self.hits += 1
+            return True
+
+    def _evict(self, keep=None):
+        # Called with self._lock held
+        while self.total_bytes > self.max_bytes and self._entries:
+            name, size = next(iter(self._entries.items()))
+            if name == keep:
+                break
+            del self._entries[name]
+            self.total_bytes -= size
+            self.evictions += 1
+            try:
+                (self.directory / name).unlink()
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "files": len(self._entries),
+                "size_bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,95 @@
+import json
+import time
+import uuid
+
+from sqlite_util import ThreadConnection
+
+STATUSES = ("queued", "running", "done", "failed")
+
+
+class JobStore:
+    """
+    Persistent SQLite record of analysis jobs (POST /jobs, GET /jobs/<id>)
+    A job is queued, running, then done (result body) or failed (error body and HTTP status).
+    Every gunicorn worker shares the file, so any worker can answer for a job another one runs.
+    Jobs are forgotten `ttl` seconds after submission, including ones whose worker died
+    """
+
+    def __init__(self, path, ttl: float = 3600, clock=time.time):
+        self.path = str(path)
+        self.ttl = ttl
+        self._clock = clock
+        self._connection = ThreadConnection(self.path)
+
+        with self._connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    request TEXT NOT NULL,
+                    status_code INTEGER,
+                    body TEXT,
+                    submitted_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_expires_at ON jobs (expires_at)")
+
+    def create(self, request: dict) -> str:
+        """Record a queued job for request ({source, value, ...}), returns its id"""
+        job_id = uuid.uuid4().hex
+        now = self._clock()
+        with self._connection() as conn:
+            conn.execute("DELETE FROM jobs WHERE expires_at <= ?", (now,))
+            conn.execute(
+                "INSERT INTO jobs (id, status, request, submitted_at, expires_at) VALUES (?, 'queued', ?, ?, ?)",
+                (job_id, json.dumps(request), now, now + self.ttl)
+            )
+        return job_id
+
+    def start(self, job_id: str):
+        with self._connection() as conn:
+            conn.execute("UPDATE jobs SET status = 'running', started_at = ? WHERE id = ?", (self._clock(), job_id))
+
+    def finish(self, job_id: str, status_code: int, body: dict):
+        """done for a 200 body, failed for anything else"""
+        status = "done" if status_code == 200 else "failed"
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, status_code = ?, body = ?, finished_at = ? WHERE id = ?",
+                (status, status_code, json.dumps(body), self._clock(), job_id)
+            )
+
+    def get(self, job_id: str):
+        """The job as a dict, or None when unknown or expired"""
+        row = self._connection().execute(
+            "SELECT status, status_code, body, submitted_at, started_at, finished_at, expires_at "
+            "FROM jobs WHERE id = ?",
+            (job_id,)
+        ).fetchone()
+        if row is None or row[6] <= self._clock():
+            return None
+
+        status, status_code, body, submitted_at, started_at, finished_at, _ = row
+        job = {
+            "job_id": job_id,
+            "status": status,
+            "submitted_at": submitted_at,
+            "started_at": started_at,
+            "finished_at": finished_at,
+        }
+        if status == "done":
+            job["result"] = json.loads(body)
+        elif status == "failed":
+            job["status_code"] = status_code
+            job["error"] = json.loads(body)
+        return job
+
+    def counts(self):
+        """{status: number of unexpired jobs}, for every status"""
+        rows = self._connection().execute(
+            "SELECT status, COUNT(*) FROM jobs WHERE expires_at > ? GROUP BY status", (self._clock(),)
+        ).fetchall()
+        return {status: 0 for status in STATUSES} | dict(rows)
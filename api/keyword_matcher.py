@@ -0,0 +1,191 @@
+from collections import deque
+
+
+class SignalMatcher:
+    """
+    Aho-Corasick automaton compiled from one or more signal maps
+    ({label: [signal, ...]}, e.g. TRAIT_MAP and INTEREST_CATEGORY_MAP)
+
+    A label is hit when any of its signals occurs as a substring of any
+    keyword, which is the same rule as the old nested any() checks.
+    All maps are matched together in a single pass over the keywords.
+    """
+
+    def __init__(self, *signal_maps):
+        self.signal_maps = signal_maps
+
+        # Every (map, label) pair gets a flat id so outputs can be plain ints
+        self.labels = []
+        for map_idx, signal_map in enumerate(signal_maps):
+            for label in signal_map:
+                self.labels.append((map_idx, label))
+
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [set()]
+
+        label_id = 0
+        for signal_map in signal_maps:
+            for signals in signal_map.values():
+                for word in signals:
+                    self._add(word.lower(), label_id)
+                label_id += 1
+
+        self._build_fail_links()
+
+    def _add(self, word, label_id):
+        state = 0
+        for ch in word:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(set())
+                self._goto[state][ch] = nxt
+            state = nxt
+        self._out[state].add(label_id)
+
+    def _build_fail_links(self):
+        queue = deque(self._goto[0].values())
+
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(ch, 0)
+                self._out[nxt] |= self._out[self._fail[nxt]]
+
+        # Resolve fail links ahead of time so scanning is one dict lookup per char.
+        # Walking breadth-first means a fail target (always shallower) is already
+        # resolved before it gets merged into a deeper state.
+        for state in self._bfs_order()[1:]:
+            fallback = self._fail[state]
+            self._goto[state] = {**self._goto[fallback], **self._goto[state]}
+
+        # Freeze outputs, empty states become None so the scan loop can skip them
+        self._out = [frozenset(out) if out else None for out in self._out]
+
+    def _bfs_order(self):
+        order = [0]
+        for state in order:
+            order.extend(self._goto[state].values())
+        return order
+
+    def match_ids(self, keywords):
+        """Return the set of label ids hit by any of the keywords"""
+        goto = self._goto
+        out = self._out
+        total = len(self.labels)
+        hits = set()
+
+        for keyword in set(keywords):
+            state = 0
+            for ch in keyword.lower():
+                state = goto[state].get(ch, 0)
+                if out[state] is not None:
+                    hits |= out[state]
+
+            # Nothing left to find
+            if len(hits) == total:
+                break
+
+        return hits
+
+    def match_counts(self, keyword_counts):
+        """
+        Weighted variant of match: keyword_counts maps keyword -> occurrences
+        Returns one {label: weight} dict per map, where weight is the total count of the
+        keywords that hit the label. Only hit labels are present, in map declaration order
+        """
+        goto = self._goto
+        out = self._out
+        weights = {}
+
+        for keyword, count in keyword_counts.items():
+            state = 0
+            keyword_hits = set()
+            for ch in keyword.lower():
+                state = goto[state].get(ch, 0)
+                if out[state] is not None:
+                    keyword_hits |= out[state]
+
+            # A keyword counts once per label even if several signals match inside it
+            for label_id in keyword_hits:
+                weights[label_id] = weights.get(label_id, 0) + count
+
+        results = [{} for _ in self.signal_maps]
+        for label_id, (map_idx, label) in enumerate(self.labels):
+            if label_id in weights:
+                results[map_idx][label] = weights[label_id]
+
+        return results
+
+    def match(self, keywords):
+        """
+        Match keywords against every compiled map at once
+        Returns one list of hit labels per map, in map declaration order
+        """
+        hits = self.match_ids(keywords)
+        results = [[] for _ in self.signal_maps]
+
+        for label_id, (map_idx, label) in enumerate(self.labels):
+            if label_id in hits:
+                results[map_idx].append(label)
+
+        return results
+
+
+class PhraseCounter:
+    """
+    Counts literal phrases in a text, like re.findall(phrase, text) would: occurrences
+    of the same phrase never overlap, but different phrases may ("adventure travel"
+    also counts "adventure" and "travel")
+
+    Short lists are counted with str.count per phrase, which runs in C and beats a
+    Python-level scan. From scan_threshold phrases on, every phrase is found in one
+    Aho-Corasick scan, so the cost follows the text length and not the list length.
+    """
+
+    def __init__(self, phrases, scan_threshold: int = 128):
+        self.phrases = list(dict.fromkeys(phrase.lower() for phrase in phrases if phrase))
+        self.use_scan = len(self.phrases) >= scan_threshold
+        # One label per phrase, so a label's signal length is its phrase length
+        self.matcher = SignalMatcher({phrase: [phrase] for phrase in self.phrases})
+        self.lengths = [len(phrase) for phrase in self.phrases]
+
+    def count(self, text: str):
+        """Return {phrase: occurrences} for the phrases found in text (already lowercased)"""
+        if not self.use_scan:
+            counts = {}
+            for phrase in self.phrases:
+                occurrences = text.count(phrase)
+                if occurrences:
+                    counts[phrase] = occurrences
+            return counts
+        return self.scan(text)
+
+    def scan(self, text: str):
+        """count() through the automaton, whatever the list size"""
+        goto = self.matcher._goto
+        out = self.matcher._out
+        lengths = self.lengths
+        next_start = {}  # phrase id -> first index a new occurrence may start at
+        counts = {}
+
+        state = 0
+        for end, ch in enumerate(text, 1):
+            state = goto[state].get(ch, 0)
+            if out[state] is None:
+                continue
+            for phrase_id in out[state]:
+                start = end - lengths[phrase_id]
+                if start >= next_start.get(phrase_id, 0):
+                    next_start[phrase_id] = end
+                    counts[phrase_id] = counts.get(phrase_id, 0) + 1
+
+        return {self.phrases[phrase_id]: counts[phrase_id] for phrase_id in sorted(counts)}
@@ -0,0 +1,338 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from bisect import bisect_left
+
+from sqlite_util import ThreadConnection
+
+# Upper bounds (seconds) from sub-millisecond text cleaning to multi-second social lookups
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Order of a histogram's series within one set of label values
+_SUFFIX_ORDER = {"": 0, "_bucket": 1, "_sum": 2, "_count": 3}
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    """Shared label handling: one child per distinct tuple of label values"""
+
+    kind = ""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children = {}
+
+    def labels(self, *values):
+        """Child for these label values (created on first use), same idea as prometheus_client"""
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def samples(self):
+        """(suffix, label values, le, value) per series, le is None outside histogram buckets"""
+        with self._lock:
+            children = sorted(self._children.items())
+        return [sample for values, child in children for sample in self._child_samples(values, child)]
+
+
+class _CounterChild:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    """Monotonic count, by convention named ..._total"""
+
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        """Shortcut for metrics without labels"""
+        self.labels().inc(amount)
+
+    def _child_samples(self, values, child):
+        return [("", values, None, child.value)]
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # per bucket, last one is +Inf
+        self.sum = 0.0
+
+    def observe(self, value):
+        # Non-cumulative counts here, rendering adds them up, so an observation is one bisect
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        """Shortcut for metrics without labels"""
+        self.labels().observe(value)
+
+    def _child_samples(self, values, child):
+        with child._lock:
+            counts = list(child.counts)
+            total = child.sum
+
+        samples = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            samples.append(("_bucket", values, float(bound), cumulative))
+        samples.append(("_sum", values, None, total))
+        samples.append(("_count", values, None, cumulative))
+        return samples
+
+
+class Registry:
+    """
+    Metrics rendered together in the Prometheus text format (version 0.0.4)
+    Values read from elsewhere at scrape time (e.g. ResultCache.stats) are added as callbacks
+    Every process keeps its own registry. Under gunicorn each worker shares it (see share()),
+    so whichever worker answers /metrics reports the totals of all of them
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._callbacks = []
+        self._shared = None
+
+    def counter(self, name, documentation, labelnames=()):
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def callback(self, name, documentation, kind, read, labelnames=(), aggregate="sum"):
+        """
+        kind: "gauge" or "counter" (name it ..._total); read() returns the current value,
+        or {(label values): value} when labelnames are given
+        aggregate: how a shared gauge combines the workers' values, "sum" when each worker
+        has its own (an in-memory cache size), "max" when they all read the same thing
+        """
+        self._callbacks.append((name, documentation, kind, read, tuple(labelnames), aggregate))
+
+    def families(self):
+        """(name, documentation, kind, labelnames, aggregate, samples) of every metric, this process's values"""
+        for metric in self._metrics:
+            yield metric.name, metric.documentation, metric.kind, metric.labelnames, "sum", metric.samples()
+        for name, documentation, kind, read, labelnames, aggregate in self._callbacks:
+            values = read() if labelnames else {(): read()}
+            samples = [("", tuple(labels), None, value) for labels, value in sorted(values.items())]
+            yield name, documentation, kind, labelnames, aggregate, samples
+
+    def share(self, store, interval: float = 1.0):
+        """
+        Add this process's numbers to store (a SharedMetrics) every `interval` seconds and
+        render the store's totals from now on. Call it in each worker after the fork
+        """
+        store.attach(self, interval)
+        self._shared = store
+
+    def flush(self):
+        """Push the latest numbers to the shared store now, e.g. from a worker that is exiting"""
+        if self._shared is not None:
+            self._shared.flush()
+
+    def render(self):
+        families = self._shared.totals() if self._shared is not None else self.families()
+        lines = []
+        for name, documentation, kind, labelnames, _, samples in families:
+            lines.extend([f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"])
+            for suffix, values, le, value in samples:
+                extra = [("le", _format_value(le))] if le is not None else []
+                lines.append(f"{name}{suffix}{_format_labels(labelnames, values, extra)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class SharedMetrics:
+    """
+    Totals of the registries of several processes (gunicorn workers), kept in SQLite
+
+    Each process adds what its counters and histograms gained since its previous flush,
+    so the totals only ever grow: they keep what recycled or crashed workers counted up
+    to their last flush, and every worker's /metrics shows the same numbers, at most one
+    flush interval behind. Gauges are stored per process and combined with their
+    aggregate; a process that stopped flushing `stale_after` seconds ago no longer counts.
+    """
+
+    def __init__(self, path, stale_after: float = 30.0, clock=time.time):
+        self.path = str(path)
+        self.stale_after = stale_after
+        self._clock = clock
+        # Autocommit, each flush is one explicit BEGIN IMMEDIATE transaction
+        self._connection = ThreadConnection(self.path, isolation_level=None)
+        self._lock = threading.Lock()
+        self._registry = None
+        self._process = None
+        self._flushed = {}
+        self._written = set()
+
+        conn = self._connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS metric_totals (
+                family TEXT NOT NULL,
+                suffix TEXT NOT NULL,
+                label_values TEXT NOT NULL,
+                le REAL NOT NULL,
+                value REAL NOT NULL,
+                PRIMARY KEY (family, suffix, label_values, le)
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS metric_gauges (
+                process TEXT NOT NULL,
+                family TEXT NOT NULL,
+                label_values TEXT NOT NULL,
+                value REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (process, family, label_values)
+            )
+        """)
+
+    def clear(self):
+        """Start every total from zero, for a server starting up (not for a worker)"""
+        conn = self._connection()
+        conn.execute("DELETE FROM metric_totals")
+        conn.execute("DELETE FROM metric_gauges")
+
+    def attach(self, registry, interval: float):
+        # Whatever the registry already holds came from the process it was forked from
+        # (the gunicorn master), only what this process adds from here on is counted
+        self._registry = registry
+        self._process = uuid.uuid4().hex
+        self._flushed = self._counted()[0]
+        threading.Thread(target=self._flush_every, args=(interval,), name="metrics-flush", daemon=True).start()
+
+    def _flush_every(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.flush()
+            except sqlite3.Error:
+                # The store stayed locked, what was not added this time is added next time
+                pass
+
+    def _counted(self):
+        """({(family, suffix, label values, le): value} of counters and histograms, [gauge rows])"""
+        counted, gauges = {}, []
+        for name, _, kind, _, _, samples in self._registry.families():
+            for suffix, values, le, value in samples:
+                if kind == "gauge":
+                    gauges.append((name, json.dumps(values), value))
+                else:
+                    counted[(name, suffix, json.dumps(values), 0.0 if le is None else le)] = value
+        return counted, gauges
+
+    def flush(self):
+        """Add what this process counted since its previous flush and replace its gauges"""
+        with self._lock:
+            now = self._clock()
+            counted, gauges = self._counted()
+            increases = []
+            for key, value in counted.items():
+                increase = value - self._flushed.get(key, 0)
+                if increase < 0:
+                    # A callback's source was reset, everything it reports now is new
+                    increase = value
+                # Every series gets a row once, so histograms keep their empty buckets
+                if increase or key not in self._written:
+                    increases.append(key + (increase,))
+
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "INSERT INTO metric_totals (family, suffix, label_values, le, value) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (family, suffix, label_values, le) DO UPDATE SET value = value + excluded.value",
+                    increases
+                )
+                conn.execute("DELETE FROM metric_gauges WHERE process = ? OR updated_at < ?",
+                             (self._process, now - self.stale_after))
+                conn.executemany(
+                    "INSERT INTO metric_gauges (process, family, label_values, value, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    [(self._process, name, label_values, value, now) for name, label_values, value in gauges]
+                )
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            self._flushed = counted
+            self._written.update(counted)
+
+    def totals(self):
+        """Registry.families() with the values of every process sharing the store"""
+        self.flush()
+        conn = self._connection()
+        counted = {}
+        for family, suffix, label_values, le, value in conn.execute(
+                "SELECT family, suffix, label_values, le, value FROM metric_totals"):
+            counted.setdefault(family, []).append(
+                (suffix, tuple(json.loads(label_values)), le if suffix == "_bucket" else None, value)
+            )
+        gauges = {}
+        for family, label_values, total, highest in conn.execute(
+                "SELECT family, label_values, SUM(value), MAX(value) FROM metric_gauges "
+                "WHERE updated_at >= ? GROUP BY family, label_values", (self._clock() - self.stale_after,)):
+            gauges.setdefault(family, []).append((tuple(json.loads(label_values)), total, highest))
+
+        families = []
+        for name, documentation, kind, labelnames, aggregate, _ in self._registry.families():
+            if kind == "gauge":
+                samples = [("", values, None, highest if aggregate == "max" else total)
+                           for values, total, highest in gauges.get(name, [])]
+            else:
+                samples = counted.get(name, [])
+            samples.sort(key=lambda sample: (sample[1], _SUFFIX_ORDER[sample[0]], sample[2] or 0.0))
+            families.append((name, documentation, kind, labelnames, aggregate, samples))
+        return families
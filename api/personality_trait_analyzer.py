@@ -1,43 +1,162 @@
+import hashlib
+import json
+import os
 import re
+import threading
+import time
+from collections import Counter
+from pathlib import Path
 
-import spacy
+from gift_catalog import DEFAULT_CATALOG_PATH, load_catalog
+from gift_ranker import rank_gifts
+from keyword_matcher import PhraseCounter, SignalMatcher
+from signal_matrix import SignalMatrix
 
 
+# Precompiled once instead of re-parsed by re.sub on every call
+URL_RE = re.compile(r"http\S+")
+# Mentions and hashtags together: removing one can never expose the other
+# ("#@bob" leaves "#" followed by a non-word character)
+SOCIAL_TAG_RE = re.compile(r"[@#]\w+")
+# Runs of anything but letters, whitespace, apostrophes and hyphens. The text is
+# already lowercased, so a-z covers what [a-zA-Z] used to
+SYMBOLS_RE = re.compile(r"[^a-z\s'-]+")
+
 
 def clean_text(text: str) -> str:
     text = text.lower()
-    text = re.sub(r"http\S+", "", text)        # remove URLs
-    text = re.sub(r"@\w+", "", text)           # remove mentions
-    text = re.sub(r"#\w+", "", text)           # remove hashtags
+    text = URL_RE.sub("", text)                # remove URLs
+    if "@" in text or "#" in text:
+        text = SOCIAL_TAG_RE.sub("", text)     # remove mentions & hashtags
     # Keep apostrophes and hyphens for contractions and hyphenated words
-    text = re.sub(r"[^a-zA-Z\s\-']", "", text)    # remove emojis & symbols but keep apostrophes and hyphens
-    text = re.sub(r"\s+", " ", text).strip()
-    return text
+    text = SYMBOLS_RE.sub("", text)            # remove emojis & symbols but keep apostrophes and hyphens
+    return " ".join(text.split())              # collapse whitespace and strip
+
+
+SPACY_MODEL = "en_core_web_sm"
+
+# Components each profile keeps, None keeps the whole model.
+# extract_keywords only reads pos_ (tagger + attribute_ruler), lemma_ (lemmatizer)
+# and is_stop (lexical), so the parser and NER are pure overhead.
+PIPELINE_PROFILES = {
+    "full": None,
+    "minimal": ["tok2vec", "tagger", "attribute_ruler", "lemmatizer"],
+}
+
+PIPELINE_PROFILE = os.environ.get("GIFTIQ_SPACY_PROFILE", "minimal")
+
+PROFILES_FILE = Path(__file__).resolve().parent.parent / "profiles.txt"
+
+
+def load_pipeline(profile: str = "full"):
+    """Load the spaCy model with only the components the profile needs"""
+    # Imported here: spaCy alone takes most of a second to import
+    import spacy
+
+    if profile not in PIPELINE_PROFILES:
+        raise ValueError(f"Unknown spaCy pipeline profile '{profile}', expected one of {list(PIPELINE_PROFILES)}")
+
+    keep = PIPELINE_PROFILES[profile]
+    if keep is None:
+        return spacy.load(SPACY_MODEL)
+
+    # Excluded components are never loaded, so they cost neither time nor memory
+    meta = spacy.util.load_meta(spacy.util.get_package_path(SPACY_MODEL) / "meta.json")
+    exclude = [name for name in meta["components"] if name not in keep]
+    return spacy.load(SPACY_MODEL, exclude=exclude)
+
+
+def load_sample_bios():
+    """Numbered sample bios from the 'bios' section of profiles.txt"""
+    bios = []
+    in_bios = False
+    for line in PROFILES_FILE.read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if line == "bios":
+            in_bios = True
+        elif in_bios and re.match(r"\d+\.\s", line):
+            bios.append(line.split(".", 1)[1].strip())
+    return bios
+
+
+def verify_pipeline(trimmed_nlp, texts=None):
+    """
+    Check that a trimmed pipeline gives the same pos_/lemma_/is_stop as the full model
+    Raises RuntimeError on the first mismatch
+    """
+    full_nlp = load_pipeline("full")
+    texts = texts if texts is not None else [clean_text(bio) for bio in load_sample_bios()]
 
+    for text in texts:
+        expected = [(t.text, t.pos_, t.lemma_, t.is_stop) for t in full_nlp(text)]
+        actual = [(t.text, t.pos_, t.lemma_, t.is_stop) for t in trimmed_nlp(text)]
+        if expected != actual:
+            raise RuntimeError(
+                f"spaCy profile '{PIPELINE_PROFILE}' differs from the full pipeline on: {text!r}"
+            )
+
+
+_nlp = None
+_nlp_lock = threading.Lock()
+
+
+def get_nlp():
+    """The spaCy pipeline, loaded on first use (or ahead of time by warm_up)"""
+    global _nlp
+    if _nlp is None:
+        with _nlp_lock:
+            if _nlp is None:
+                nlp = load_pipeline(PIPELINE_PROFILE)
+                # Opt-in because it loads the full model once more
+                if os.environ.get("GIFTIQ_VERIFY_PIPELINE") == "1" and PIPELINE_PROFILE != "full":
+                    verify_pipeline(nlp)
+                _nlp = nlp
+    return _nlp
+
+
+def warm_up():
+    """Load the model and run it once, so the first request does not pay for either"""
+    get_nlp()("warm up")
+
+DEFAULT_PHRASES_PATH = Path(__file__).resolve().parent / "data" / "phrases.json"
+
+
+def load_phrases(path=DEFAULT_PHRASES_PATH):
+    """Read the JSON array of phrases counted as extra keywords ("indie movie" -> indie_movie)"""
+    with open(path, encoding="utf-8") as f:
+        phrases = json.load(f)
+
+    if not isinstance(phrases, list) or not all(isinstance(phrase, str) for phrase in phrases):
+        raise ValueError(f"Phrase list {path} must be a JSON array of strings")
+
+    return phrases
+
+
+PHRASE_COUNTER = PhraseCounter(load_phrases(os.environ.get("GIFTIQ_PHRASES_PATH", DEFAULT_PHRASES_PATH)))
 
-nlp = spacy.load("en_core_web_sm")
 
 def extract_keywords(text: str):
-    doc = nlp(text)
-    keywords = set()
+    return keywords_from_doc(get_nlp()(text), text)
+
+
+def keywords_from_doc(doc, text: str):
+    return list(keyword_counts_from_doc(doc, text))
+
+
+def keyword_counts_from_doc(doc, text: str):
+    """Like keywords_from_doc but keeps how often each keyword occurs"""
+    keywords = Counter()
 
     for token in doc:
         # Include NOUN, PROPN, ADJ (adjectives) and VERB (verbs for better trait detection)
         if token.pos_ in ["NOUN", "PROPN", "ADJ", "VERB"] and not token.is_stop and len(token.text) > 2:
-            keywords.add(token.lemma_)
+            keywords[token.lemma_] += 1
     
-    # Also add some multi-word patterns that might be important
-    text_lower = text.lower()
-    multi_word_patterns = [
-        r"indie movie", r"sustainable fashion", r"tech company", r"adventure travel",
-        r"adventure", r"hiking", r"photography", r"fashion", r"travel", r"tech",
-        r"practical gift", r"minimalist", r"promoted", r"birthday", r"friend"
-    ]
-    for pattern in multi_word_patterns:
-        if re.search(pattern, text_lower):
-            keywords.add(pattern.replace(" ", "_"))
+    # Also add some multi-word patterns that might be important, all found in one scan
+    for phrase, occurrences in PHRASE_COUNTER.count(text.lower()).items():
+        keywords[phrase.replace(" ", "_")] += occurrences
 
-    return list(keywords)
+    return keywords
 TRAIT_MAP = {
     "creative": ["design", "art", "writing", "photography", "music", "dance", "paint", "creative", "designer"],
     "analytical": ["ai", "data", "engineering", "research", "science", "math", "technical", "programmer"],
@@ -56,17 +175,9 @@ TRAIT_MAP = {
 }
 
 def infer_personality_traits(keywords):
-    traits = set()
-    
-    # Normalize keywords for matching (lowercase)
-    keywords_lower = [k.lower() for k in keywords]
-
-    for trait, signals in TRAIT_MAP.items():
-        # Check for direct matches and partial matches
-        if any(word.lower() in keywords_lower or any(word.lower() in k for k in keywords_lower) for word in signals):
-            traits.add(trait)
-
-    return list(traits)
+    # A trait is hit when any of its signals is a substring of any keyword
+    traits, _ = SIGNAL_MATCHER.match(keywords)
+    return traits
 
 INTEREST_CATEGORY_MAP = {
     "travel": ["travel", "trip", "wander", "vacation", "beach", "mountain", "explore", "adventure", "adventure_travel", "wanderlust", "journey"],
@@ -86,705 +197,145 @@ INTEREST_CATEGORY_MAP = {
     "wellness": ["meditation", "mindfulness", "wellness", "self care", "relax", "relaxation", "mindful"]
 }
 
+# Both maps compiled once into a single automaton, see keyword_matcher.py
+SIGNAL_MATCHER = SignalMatcher(TRAIT_MAP, INTEREST_CATEGORY_MAP)
+
+# Matrix form of the same maps for scoring many bios at once, see signal_matrix.py
+SIGNAL_MATRIX = SignalMatrix(TRAIT_MAP, INTEREST_CATEGORY_MAP)
+
 def classify_interests(keywords):
-    categories = set()
-    
-    # Normalize keywords for matching (lowercase)
-    keywords_lower = [k.lower() for k in keywords]
-
-    for category, signals in INTEREST_CATEGORY_MAP.items():
-        # Check for direct matches and partial matches
-        if any(word.lower() in keywords_lower or any(word.lower() in k for k in keywords_lower) for word in signals):
-            categories.add(category)
-
-    return list(categories)
-
-GIFT_MAP = [
-    # tech
-    {
-        "title": "Smart Desk Organizer",
-        "category": "tech",
-        "price": 2499,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71zF5xgkfKL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=smart+desk+organizer",
-        "tags": ["desk", "office", "gadgets"]
-    },
-    {
-        "title": "Wireless Charging Pad",
-        "category": "tech",
-        "price": 1999,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71XgGR-CWQL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=wireless+charging+pad",
-        "tags": ["mobile", "wireless", "accessories"]
-    },
-    {
-        "title": "Ergonomic Laptop Stand",
-        "category": "tech",
-        "price": 1499,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71Ci6FY7T4L._SX679_.jpg",
-        "link": "https://amazon.in/s?k=ergonomic+laptop+stand",
-        "tags": ["work from home", "posture", "office"]
-    },
-    {
-        "title": "Wireless Gaming Mouse",
-        "category": "tech",
-        "price": 1999,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/61y1zTEhS0L._SX679_.jpg",
-        "link": "https://amazon.in/s?k=wireless+gaming+mouse",
-        "tags": ["gaming", "pc", "accessories"]
-    },
-
-    # Productivity
-    {
-        "title": "Minimalist Planner",
-        "category": "productivity",
-        "price": 999,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71i7TyPkI2L._SX679_.jpg",
-        "link": "https://amazon.in/s?k=minimalist+planner+notebook",
-        "tags": ["planning", "goals", "daily routine"]
-    },
-    {
-        "title": "Focus Timer Cube",
-        "category": "productivity",
-        "price": 1299,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/61Eu7iVlPHL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=pomodoro+timer+cube",
-        "tags": ["pomodoro", "deep work", "time management"]
-    },
-    {
-        "title": "Noise Blocking Earplugs",
-        "category": "productivity",
-        "price": 799,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71VLHR-UXBL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=noise+blocking+earplugs",
-        "tags": ["focus", "study", "sleep"]
-    },
-
-    # Travel
-    {
-        "title": "Travel Organizer Kit",
-        "category": "travel",
-        "price": 1499,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71uN0f5bBDL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=travel+organizer+kit",
-        "tags": ["bags", "packing", "accessories"]
-    },
-    {
-        "title": "Scratch World Map",
-        "category": "travel",
-        "price": 2199,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71DwKpT8EQL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=scratch+world+map",
-        "tags": ["travel memories", "wall decor"]
-    },
-    {
-        "title": "Compact Travel Backpack",
-        "category": "travel",
-        "price": 2499,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71pL1a3CnGL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=compact+travel+backpack",
-        "tags": ["backpack", "weekend trips", "carry-on"]
-    },
-    {
-        "title": "Portable Neck Pillow",
-        "category": "travel",
-        "price": 899,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/61R2SfqKcgL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=portable+neck+pillow",
-        "tags": ["comfort", "flights", "long journeys"]
-    },
-    {
-        "title": "Compact Camera Drone",
-        "category": "travel",
-        "price": 4999,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71eTjP0ZVPL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=compact+camera+drone",
-        "tags": ["drone", "camera", "travel", "photography"]
-    },
-    {
-        "title": "Travel Camera Phone Lens",
-        "category": "travel",
-        "price": 1999,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71qK5N9RWZL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=phone+camera+lens+travel",
-        "tags": ["lens", "phone", "camera", "portable"]
-    },
-    {
-        "title": "Waterproof Action Camera",
-        "category": "travel",
-        "price": 8999,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71WIpPQkq4L._SX679_.jpg",
-        "link": "https://amazon.in/s?k=waterproof+action+camera",
-        "tags": ["camera", "waterproof", "action", "adventure"]
-    },
-    {
-        "title": "Camera Cleaning Kit Travel",
-        "category": "travel",
-        "price": 599,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71vCjJ3O9IL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=camera+cleaning+kit",
-        "tags": ["cleaning", "camera", "maintenance"]
-    },
-    {
-        "title": "Portable Camera Stabilizer",
-        "category": "travel",
-        "price": 2999,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71cXhQXXZIL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=portable+camera+stabilizer+gimbal",
-        "tags": ["stabilizer", "gimbal", "video", "travel"]
-    },
-
-    # Fitness
-    {
-        "title": "Resistance Band Set",
-        "category": "fitness",
-        "price": 899,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/81A-sL8tSFL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=resistance+band+set",
-        "tags": ["home workout", "exercise"]
-    },
-    {
-        "title": "Smart Water Bottle",
-        "category": "fitness",
-        "price": 1799,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71a5T8D2UrL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=smart+water+bottle",
-        "tags": ["hydration", "health", "smart"]
-    },
-    {
-        "title": "Yoga Mat Pro",
-        "category": "fitness",
-        "price": 1299,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71z9iYZNMfL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=yoga+mat+pro",
-        "tags": ["yoga", "meditation", "stretching"]
-    },
-
-    # Lifestyle / Food
-    {
-        "title": "Premium Coffee Sampler",
-        "category": "food",
-        "price": 999,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71VGcAo1CaL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=premium+coffee+sampler",
-        "tags": ["coffee", "gourmet", "beverages"]
-    },
-    {
-        "title": "Aromatherapy Candle Set",
-        "category": "wellness",
-        "price": 1199,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71LqfDCKd7L._SX679_.jpg",
-        "link": "https://amazon.in/s?k=aromatherapy+candle+set",
-        "tags": ["relaxation", "home decor"]
-    },
-
-    # Books
-    {
-        "title": "Bestselling Fiction Bundle",
-        "category": "books",
-        "price": 1499,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71aY08t8RwL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=bestselling+fiction+books",
-        "tags": ["books", "fiction", "reading"]
-    },
-    {
-        "title": "Personalized Book Holder",
-        "category": "books",
-        "price": 899,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71SBXd7FyxL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=book+holder+stand",
-        "tags": ["books", "organizer", "library"]
-    },
-    {
-        "title": "Premium Reading Light",
-        "category": "books",
-        "price": 1299,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71TLvqQZkHL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=reading+light+led",
-        "tags": ["reading", "led", "desk lamp"]
-    },
-    {
-        "title": "Literary Tote Bag",
-        "category": "books",
-        "price": 599,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71P8K6pT5kL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=book+tote+bag",
-        "tags": ["books", "tote", "bag"]
-    },
-
-    # Music
-    {
-        "title": "Wireless Bluetooth Speaker",
-        "category": "music",
-        "price": 2499,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/61c-l9dVaIL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=wireless+bluetooth+speaker",
-        "tags": ["music", "speaker", "audio"]
-    },
-    {
-        "title": "Professional Studio Headphones",
-        "category": "music",
-        "price": 4999,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71dEGGHCmrL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=professional+studio+headphones",
-        "tags": ["headphones", "audio", "music"]
-    },
-    {
-        "title": "Acoustic Guitar Accessory Kit",
-        "category": "music",
-        "price": 1599,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71E14FHcRzL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=guitar+accessory+kit",
-        "tags": ["guitar", "instrument", "music"]
-    },
-    {
-        "title": "Vinyl Record Holder Stand",
-        "category": "music",
-        "price": 1799,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71qnUHW7GaL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=vinyl+record+holder",
-        "tags": ["vinyl", "music", "decor"]
-    },
-
-    # Dance
-    {
-        "title": "Professional Dance Mat",
-        "category": "dance",
-        "price": 2999,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/81Lg+gYGw0L._SX679_.jpg",
-        "link": "https://amazon.in/s?k=dance+mat+practice",
-        "tags": ["dance", "practice", "floor"]
-    },
-    {
-        "title": "Dance Practice Mirror",
-        "category": "dance",
-        "price": 3499,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71HqJoU-BcL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=dance+mirror+studio",
-        "tags": ["dance", "mirror", "studio"]
-    },
-    {
-        "title": "LED Dance Shoes",
-        "category": "dance",
-        "price": 1999,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71+g-+MpH9L._SX679_.jpg",
-        "link": "https://amazon.in/s?k=led+shoes+light+up",
-        "tags": ["shoes", "dance", "light up"]
-    },
-    {
-        "title": "Portable Dance Pole",
-        "category": "dance",
-        "price": 2499,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71B1GS1H5lL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=dance+pole+portable",
-        "tags": ["dance", "pole", "practice"]
-    },
-
-    # Food & Cooking
-    {
-        "title": "Gourmet Spice Collection",
-        "category": "food",
-        "price": 1599,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71b3TKfJDcL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=gourmet+spice+collection",
-        "tags": ["spices", "cooking", "gourmet"]
-    },
-    {
-        "title": "Professional Chef Knife Set",
-        "category": "food",
-        "price": 3499,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71X7J3c+QXL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=professional+chef+knife+set",
-        "tags": ["kitchen", "chef", "knives"]
-    },
-    {
-        "title": "Cast Iron Skillet",
-        "category": "food",
-        "price": 1999,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71SEOlZHOxL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=cast+iron+skillet",
-        "tags": ["cooking", "kitchen", "cookware"]
-    },
-    {
-        "title": "Digital Kitchen Scale",
-        "category": "food",
-        "price": 899,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71b-ybT8L5L._SX679_.jpg",
-        "link": "https://amazon.in/s?k=digital+kitchen+scale",
-        "tags": ["kitchen", "cooking", "baking"]
-    },
-    {
-        "title": "Artisan Chocolate Box",
-        "category": "food",
-        "price": 1199,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71jBP8RcJxL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=artisan+chocolate+gift+box",
-        "tags": ["chocolate", "gourmet", "gift"]
-    },
-
-    # Fashion
-    {
-        "title": "Designer Sunglasses",
-        "category": "fashion",
-        "price": 2999,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71n3SPnxBIL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=designer+sunglasses",
-        "tags": ["fashion", "sunglasses", "accessory"]
-    },
-    {
-        "title": "Premium Leather Wallet",
-        "category": "fashion",
-        "price": 1899,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71h5PzAmYqL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=leather+wallet+premium",
-        "tags": ["leather", "wallet", "accessory"]
-    },
-    {
-        "title": "Luxury Silk Scarf",
-        "category": "fashion",
-        "price": 1599,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71p+c9KNDSL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=silk+scarf+luxury",
-        "tags": ["silk", "scarf", "fashion"]
-    },
-    {
-        "title": "Fashion Watch",
-        "category": "fashion",
-        "price": 3999,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71eKrNBKbHL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=fashion+watch",
-        "tags": ["watch", "fashion", "accessory"]
-    },
-    {
-        "title": "Wool Beanie Collection",
-        "category": "fashion",
-        "price": 799,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71uY9qFbvKL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=wool+beanie",
-        "tags": ["beanie", "winter", "fashion"]
-    },
-
-    # Art
-    {
-        "title": "Professional Sketch Set",
-        "category": "art",
-        "price": 1499,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71OASC3e9dL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=professional+sketch+set",
-        "tags": ["art", "sketching", "drawing"]
-    },
-    {
-        "title": "Oil Painting Starter Kit",
-        "category": "art",
-        "price": 2499,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71gUr9PyKKL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=oil+painting+starter+kit",
-        "tags": ["painting", "art", "creative"]
-    },
-    {
-        "title": "Digital Art Tablet",
-        "category": "art",
-        "price": 4999,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71b-rJD2PmL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=digital+art+tablet",
-        "tags": ["digital", "tablet", "art"]
-    },
-    {
-        "title": "Artist Canvas Bundle",
-        "category": "art",
-        "price": 1299,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71dW7d8BPJL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=canvas+painting+set",
-        "tags": ["canvas", "painting", "art"]
-    },
-
-    # Nature
-    {
-        "title": "Indoor Plant Collection",
-        "category": "nature",
-        "price": 1799,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71nLMQTVWEL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=indoor+plants+collection",
-        "tags": ["plants", "indoor", "decor"]
-    },
-    {
-        "title": "Garden Tool Set",
-        "category": "nature",
-        "price": 1399,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71FhPAW3VPL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=garden+tool+set",
-        "tags": ["gardening", "tools", "outdoor"]
-    },
-    {
-        "title": "Binoculars for Birdwatching",
-        "category": "nature",
-        "price": 2999,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71wR-t3jkAL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=binoculars+birdwatching",
-        "tags": ["nature", "birdwatching", "outdoor"]
-    },
-    {
-        "title": "Eco-Friendly Bamboo Set",
-        "category": "nature",
-        "price": 999,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71KsYhHvbgL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=eco+friendly+bamboo+set",
-        "tags": ["eco", "sustainable", "nature"]
-    },
-    {
-        "title": "Wildlife Camera Trap 4K",
-        "category": "nature",
-        "price": 3999,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71JGQMlDYaL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=wildlife+camera+trap+4k",
-        "tags": ["camera", "wildlife", "nature", "photography"]
-    },
-    {
-        "title": "Telephoto Camera Lens",
-        "category": "nature",
-        "price": 5499,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71B5dKnYfEL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=telephoto+camera+lens",
-        "tags": ["lens", "wildlife", "photography", "nature"]
-    },
-
-    # Photography
-    {
-        "title": "DSLR Camera Backpack",
-        "category": "photography",
-        "price": 2499,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71YEqt3WRVL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=camera+backpack+dslr",
-        "tags": ["camera", "photography", "bag"]
-    },
-    {
-        "title": "Professional Tripod Stand",
-        "category": "photography",
-        "price": 1999,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71eEKaYP5kL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=professional+tripod",
-        "tags": ["tripod", "photography", "camera"]
-    },
-    {
-        "title": "Ring Light Studio",
-        "category": "photography",
-        "price": 2499,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71l3EXyUL-L._SX679_.jpg",
-        "link": "https://amazon.in/s?k=ring+light+studio",
-        "tags": ["lighting", "photography", "studio"]
-    },
-    {
-        "title": "Camera Lens Filter Kit",
-        "category": "photography",
-        "price": 1499,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71qlW8+gajL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=lens+filter+kit",
-        "tags": ["filters", "lens", "photography"]
-    },
-    {
-        "title": "DSLR Camera 24MP",
-        "category": "photography",
-        "price": 25999,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71Hl2hWC-NL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=dslr+camera+24mp",
-        "tags": ["camera", "dslr", "photography", "professional"]
-    },
-    {
-        "title": "Mirrorless Camera 4K",
-        "category": "photography",
-        "price": 59999,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71iKVnLkHqL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=mirrorless+camera+4k",
-        "tags": ["camera", "mirrorless", "4k", "video"]
-    },
-    {
-        "title": "Camera Memory Card 128GB",
-        "category": "photography",
-        "price": 1299,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71LY-+7EQAL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=camera+memory+card+128gb",
-        "tags": ["memory", "storage", "sd+card"]
-    },
-    {
-        "title": "Professional Camera Bag",
-        "category": "photography",
-        "price": 3499,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71X5Y9P9LHL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=professional+camera+bag",
-        "tags": ["bag", "camera", "storage"]
-    },
-
-    # Movies & Entertainment
-    {
-        "title": "Premium Streaming Device",
-        "category": "movies",
-        "price": 3499,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71jy8vUNMEL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=streaming+device",
-        "tags": ["streaming", "movies", "entertainment"]
-    },
-    {
-        "title": "Movie Poster Collection Set",
-        "category": "movies",
-        "price": 899,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71f1LoMm5+L._SX679_.jpg",
-        "link": "https://amazon.in/s?k=movie+posters+collection",
-        "tags": ["movies", "poster", "decor"]
-    },
-    {
-        "title": "Home Theater Sound Bar",
-        "category": "movies",
-        "price": 4999,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71HU4ZPCDZL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=soundbar+home+theater",
-        "tags": ["soundbar", "theater", "audio"]
-    },
-    {
-        "title": "Cinema Snack Popcorn Kit",
-        "category": "movies",
-        "price": 799,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71gVLqCvbKL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=popcorn+maker+kit",
-        "tags": ["popcorn", "snacks", "movies"]
-    },
-
-    # Wellness
-    {
-        "title": "Meditation Cushion",
-        "category": "wellness",
-        "price": 1299,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71D5dYJWYZL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=meditation+cushion+zafu",
-        "tags": ["meditation", "wellness", "comfort"]
-    },
-    {
-        "title": "Essential Oil Diffuser",
-        "category": "wellness",
-        "price": 1599,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71RNqFqk2ZL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=essential+oil+diffuser",
-        "tags": ["wellness", "aromatic", "relax"]
-    },
-    {
-        "title": "Weighted Blanket",
-        "category": "wellness",
-        "price": 3499,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71a1hLJaFbL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=weighted+blanket",
-        "tags": ["sleep", "wellness", "comfort"]
-    },
-    {
-        "title": "Jade Roller & Gua Sha Set",
-        "category": "wellness",
-        "price": 999,
-        "currency": "INR",
-        "image": "https://m.media-amazon.com/images/I/71-C1nWYxTL._SX679_.jpg",
-        "link": "https://amazon.in/s?k=jade+roller+gua+sha",
-        "tags": ["skincare", "wellness", "beauty"]
-    }
-]
-
-
-def recommend_gifts(categories):
-    recommendations = []
-
-    for category in categories:
-        matching_gifts = [gift for gift in GIFT_MAP if gift.get("category") == category]
-        recommendations.extend(matching_gifts)
-
-    return recommendations[:5]
-def run_full_analysis(raw_bio: str):
+    # Same substring rule as infer_personality_traits
+    _, categories = SIGNAL_MATCHER.match(keywords)
+    return categories
+
+# Catalog lives in data/gifts.json (or GIFTIQ_CATALOG_PATH) and is indexed once at startup
+CATALOG = load_catalog(os.environ.get("GIFTIQ_CATALOG_PATH", DEFAULT_CATALOG_PATH))
+GIFT_MAP = CATALOG.gifts
+
+# Number of ranked gifts returned when the caller does not ask for a specific k
+DEFAULT_TOP_K = 5
+MAX_TOP_K = 50
+
+
+def run_full_analysis(raw_bio: str, top_k: int = DEFAULT_TOP_K, timings=None):
+    """
+    timings: optional dict that receives the seconds spent per stage
+    (clean_text, spacy, keyword_merge, inference, gifts)
+    """
+    start = time.perf_counter()
     clean = clean_text(raw_bio)
-    keywords = extract_keywords(clean)
-    
+    cleaned_at = time.perf_counter()
+    keyword_counts = keyword_counts_from_doc(get_nlp()(clean), clean)
+    parsed_at = time.perf_counter()
+
+    if timings is not None:
+        timings["clean_text"] = cleaned_at - start
+        timings["spacy"] = parsed_at - cleaned_at
+    return analyze_keywords(raw_bio, keyword_counts, top_k, timings)
+
+
+def run_batch_analysis(raw_bios, batch_size: int = 64, n_process: int = 1, top_k: int = DEFAULT_TOP_K,
+                       timings=None):
+    """
+    Same as run_full_analysis for many bios at once
+    spaCy work is streamed through nlp.pipe so it can batch and use several processes
+    Results come back in the same order as raw_bios
+    timings: optional dict that receives the seconds spent per stage for the whole batch
+    """
+    start = time.perf_counter()
+    cleaned = [clean_text(raw_bio) for raw_bio in raw_bios]
+    cleaned_at = time.perf_counter()
+    docs = get_nlp().pipe(cleaned, batch_size=batch_size, n_process=n_process)
+    keyword_counts = [keyword_counts_from_doc(doc, clean) for clean, doc in zip(cleaned, docs)]
+    parsed_at = time.perf_counter()
+
+    all_keywords = [merge_keywords(raw_bio, counts) for raw_bio, counts in zip(raw_bios, keyword_counts)]
+    merged_at = time.perf_counter()
+
+    # Traits and interests for the whole batch come from one matrix product
+    scores = SIGNAL_MATRIX.score_batch(all_keywords)
+    strengths = [SIGNAL_MATRIX.strengths(bio_scores) for bio_scores in scores]
+    inferred_at = time.perf_counter()
+
+    results = [
+        build_result(keywords, trait_strength, interest_strength, top_k)
+        for keywords, (trait_strength, interest_strength) in zip(all_keywords, strengths)
+    ]
+
+    if timings is not None:
+        timings["clean_text"] = cleaned_at - start
+        timings["spacy"] = parsed_at - cleaned_at
+        timings["keyword_merge"] = merged_at - parsed_at
+        timings["inference"] = inferred_at - merged_at
+        timings["gifts"] = time.perf_counter() - inferred_at
+    return results
+
+
+def raw_keyword_counts(raw_bio: str):
     # Add raw text matching as fallback to catch more keywords
-    raw_text_lower = raw_bio.lower()
-    additional_keywords = set()
+    additional_keywords = Counter()
     
     # Extract additional single-word keywords from raw text
     for word in raw_bio.lower().split():
         # Clean the word
         cleaned_word = re.sub(r"[^a-zA-Z\-']", "", word)
         if len(cleaned_word) > 2 and cleaned_word not in ['the', 'and', 'for', 'with', 'that', 'this', 'from']:
-            additional_keywords.add(cleaned_word)
-    
-    # Combine keywords
-    all_keywords = list(set(keywords) | additional_keywords)
-    
-    traits = infer_personality_traits(all_keywords)
-    interests = classify_interests(all_keywords)
-    gifts = recommend_gifts(interests)
+            additional_keywords[cleaned_word] += 1
+
+    return additional_keywords
+
+
+def analysis_cache_key(raw_bio: str, top_k: int = DEFAULT_TOP_K) -> str:
+    """
+    Hash of everything run_full_analysis reads from the bio
+    clean_text drops hashtags and mentions that the raw-text fallback still
+    sees ("#travel"), so those words (and their counts) are part of the key too
+    """
+    raw_counts = " ".join(f"{word}:{count}" for word, count in sorted(raw_keyword_counts(raw_bio).items()))
+    normalized = f"{top_k}\0{clean_text(raw_bio)}\0{raw_counts}"
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def analyze_keywords(raw_bio: str, keyword_counts, top_k: int = DEFAULT_TOP_K, timings=None):
+    """
+    Traits, interests and top_k ranked gifts from the spaCy keyword counts of a bio
+    keyword_counts may also be a plain list of keywords (each counted once)
+    timings: optional dict that receives the keyword_merge, inference and gifts stage seconds
+    """
+    start = time.perf_counter()
+    all_keywords = merge_keywords(raw_bio, keyword_counts)
+    merged_at = time.perf_counter()
+
+    # One pass over the keywords finds both traits and interests, weighted by keyword counts,
+    # so they are a single "inference" stage
+    trait_strength, interest_strength = SIGNAL_MATCHER.match_counts(all_keywords)
+    inferred_at = time.perf_counter()
+    result = build_result(all_keywords, trait_strength, interest_strength, top_k)
+
+    if timings is not None:
+        timings["keyword_merge"] = merged_at - start
+        timings["inference"] = inferred_at - merged_at
+        timings["gifts"] = time.perf_counter() - inferred_at
+    return result
+
+
+def merge_keywords(raw_bio: str, keyword_counts):
+    if not isinstance(keyword_counts, Counter):
+        keyword_counts = Counter(keyword_counts)
+
+    # Combine keywords, a word seen by both spaCy and the raw fallback keeps the larger count
+    return keyword_counts | raw_keyword_counts(raw_bio)
+
+
+def build_result(all_keywords, trait_strength, interest_strength, top_k: int = DEFAULT_TOP_K):
+    traits = list(trait_strength)
+    # Strongest interest first, ties keep INTEREST_CATEGORY_MAP order
+    interests = sorted(interest_strength, key=lambda category: -interest_strength[category])
+    gifts = rank_gifts(CATALOG, all_keywords, interest_strength, top_k)
 
     return {
         "traits": traits,
         "interests": interests,
-        "gifts": gifts
+        "gifts": gifts,
+        "keyword_count": len(all_keywords)
     }
\ No newline at end of file
@@ -0,0 +1,87 @@
+import json
+import time
+import zlib
+
+from sqlite_util import ThreadConnection
+
+# Failures that say something about the handle itself and are worth remembering.
+# access_error and friends are usually transient (rate limits, network) and are never cached.
+NEGATIVE_ERROR_TYPES = {"private_account", "profile_not_found", "no_posts_found"}
+
+
+class ProfileCache:
+    """
+    Persistent SQLite cache of extractor results keyed by (source, handle)
+    Successful lookups live for `ttl` seconds, known-bad handles for `negative_ttl`
+    Bio and posts are stored as zlib-compressed JSON
+    """
+
+    def __init__(self, path, ttl: float = 86400, negative_ttl: float = 3600, clock=time.time):
+        self.path = str(path)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._clock = clock
+        self._connection = ThreadConnection(self.path)
+
+        with self._connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS profiles (
+                    source TEXT NOT NULL,
+                    handle TEXT NOT NULL,
+                    max_posts INTEGER NOT NULL,
+                    success INTEGER NOT NULL,
+                    payload BLOB NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (source, handle)
+                )
+            """)
+
+    def get(self, source: str, handle: str, max_posts: int):
+        """
+        Return the cached extractor result, or None on miss/expiry
+        A success cached with fewer posts than requested counts as a miss
+        """
+        row = self._connection().execute(
+            "SELECT max_posts, success, payload, expires_at FROM profiles WHERE source = ? AND handle = ?",
+            (source, handle)
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        cached_max_posts, success, payload, expires_at = row
+        if expires_at <= self._clock():
+            return None
+        if success and cached_max_posts < max_posts:
+            return None
+
+        result = json.loads(zlib.decompress(payload))
+        if success:
+            result["posts"] = result["posts"][:max_posts]
+        return result
+
+    def put(self, source: str, handle: str, max_posts: int, result: dict):
+        """Store an extractor result if it is cacheable"""
+        success = bool(result.get("success"))
+        if success:
+            ttl = self.ttl
+        elif result.get("error_type") in NEGATIVE_ERROR_TYPES:
+            ttl = self.negative_ttl
+        else:
+            return
+
+        if ttl <= 0:
+            return
+
+        now = self._clock()
+        payload = zlib.compress(json.dumps(result).encode("utf-8"))
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO profiles VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (source, handle, max_posts, int(success), payload, now, now + ttl)
+            )
+
+    def purge_expired(self):
+        with self._connection() as conn:
+            conn.execute("DELETE FROM profiles WHERE expires_at <= ?", (self._clock(),))
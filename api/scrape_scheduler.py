@@ -0,0 +1,339 @@
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from sqlite_util import ThreadConnection
+
+
+class SchedulerBusy(Exception):
+    """A call could not be scheduled before its deadline, or the queue was full"""
+
+    def __init__(self, source, reason):
+        super().__init__(f"{source} lookups are rate limited ({reason})")
+        self.source = source
+        self.reason = reason
+
+
+class TokenBucket:
+    """
+    rate tokens per second, at most burst of them saved up
+    rate <= 0 means unlimited
+    """
+
+    def __init__(self, rate: float, burst: float, clock=time.monotonic):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._clock = clock
+        self.tokens = self.burst
+        self._updated = clock()
+
+    def refill(self, now):
+        if self.rate > 0:
+            self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def ready_at(self, now, position=0):
+        """When the token for the caller `position` places back in line will be there"""
+        if self.rate <= 0:
+            return now
+        missing = position + 1 - self.tokens
+        return now if missing <= 0 else now + missing / self.rate
+
+    def take(self):
+        if self.rate > 0:
+            self.tokens -= 1
+
+
+class _Source:
+    def __init__(self, rate, burst, clock):
+        self.bucket = TokenBucket(rate, burst, clock)
+        self.queue = deque()  # waiting callers, first in line first
+        self.blocked_until = 0.0
+        self.strikes = 0
+
+        self.acquired = 0
+        self.rejected = {"queue_full": 0, "deadline": 0}
+        self.throttled = 0
+        self.wait_seconds = 0.0
+
+
+class ScrapeScheduler:
+    """
+    Gate in front of every uncached Instagram/Twitter call
+    Each source has a token bucket sized to its upstream limit. Callers over it wait in a
+    bounded FIFO queue, or are turned away at once when the queue is full or their turn
+    would come after their deadline. A throttling answer from upstream (throttled()) pauses
+    the source for base, 2*base, 4*base... seconds up to max_backoff, until a call
+    gets through again (succeeded()).
+
+    limits: {source: (requests per second, burst)}, rate 0 = unlimited
+    on_wait: optional callable(source, seconds) called with every granted wait
+    """
+
+    def __init__(self, limits, max_queue: int = 64, backoff_base: float = 2.0, max_backoff: float = 120.0,
+                 clock=time.monotonic, on_wait=None):
+        self.max_queue = max_queue
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+        self.on_wait = on_wait
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._sources = {source: _Source(rate, burst, clock) for source, (rate, burst) in limits.items()}
+
+    def acquire(self, source: str, deadline: float):
+        """
+        Wait for a call slot, deadline is a time.monotonic() value
+        Returns the seconds waited, raises SchedulerBusy instead of waiting in vain
+        """
+        state = self._sources.get(source)
+        if state is None:
+            return 0.0
+
+        start = self._clock()
+        ticket = object()
+        with self._cond:
+            if len(state.queue) >= self.max_queue:
+                state.rejected["queue_full"] += 1
+                raise SchedulerBusy(source, "queue_full")
+
+            state.bucket.refill(start)
+            if self._ready_at(state, start, len(state.queue)) > deadline:
+                state.rejected["deadline"] += 1
+                raise SchedulerBusy(source, "deadline")
+
+            state.queue.append(ticket)
+            try:
+                while True:
+                    now = self._clock()
+                    state.bucket.refill(now)
+                    ready_at = self._ready_at(state, now, state.queue.index(ticket))
+                    if ready_at <= now and state.queue[0] is ticket:
+                        state.bucket.take()
+                        break
+                    if ready_at > deadline:
+                        state.rejected["deadline"] += 1
+                        raise SchedulerBusy(source, "deadline")
+                    # Callers behind the head are woken when it leaves the queue
+                    self._cond.wait(ready_at - now if ready_at > now else None)
+            finally:
+                state.queue.remove(ticket)
+                self._cond.notify_all()
+
+            waited = self._clock() - start
+            state.acquired += 1
+            state.wait_seconds += waited
+
+        if self.on_wait is not None:
+            self.on_wait(source, waited)
+        return waited
+
+    @staticmethod
+    def _ready_at(state, now, position):
+        return max(state.blocked_until, state.bucket.ready_at(now, position))
+
+    def throttled(self, source: str):
+        """Upstream pushed back (HTTP 429, a block page): pause the source, longer each time in a row"""
+        state = self._sources.get(source)
+        if state is None:
+            return
+        with self._cond:
+            state.throttled += 1
+            now = self._clock()
+            if now < state.blocked_until:
+                # Calls sent before the pause started are still coming back, one strike covers them
+                return
+            delay = min(self.backoff_base * 2 ** state.strikes, self.max_backoff)
+            state.strikes += 1
+            state.blocked_until = now + delay
+            state.bucket.tokens = min(state.bucket.tokens, 0)
+            self._cond.notify_all()
+
+    def succeeded(self, source: str):
+        """A call went through, the next throttling starts again from the base backoff"""
+        state = self._sources.get(source)
+        if state is not None and state.strikes:
+            with self._cond:
+                state.strikes = 0
+
+    def stats(self):
+        now = self._clock()
+        with self._cond:
+            return {
+                source: {
+                    "rate": state.bucket.rate,
+                    "burst": state.bucket.burst,
+                    "queue_depth": len(state.queue),
+                    "acquired": state.acquired,
+                    "rejected_queue_full": state.rejected["queue_full"],
+                    "rejected_deadline": state.rejected["deadline"],
+                    "throttled": state.throttled,
+                    "backoff_seconds": max(state.blocked_until - now, 0.0),
+                    "wait_seconds": state.wait_seconds,
+                }
+                for source, state in self._sources.items()
+            }
+
+
+class SharedScrapeScheduler:
+    """
+    ScrapeScheduler whose limits hold across processes (gunicorn workers), kept in SQLite
+
+    Each source's bucket is stored as the time its next call slot frees up (a GCRA
+    "theoretical arrival time"): a caller reserves the earliest slot in one write
+    transaction, then sleeps until it. Reservations come out in submission order across
+    every worker, which gives the same FIFO spacing as the in-process queue, and the
+    number of callers waiting follows from how far ahead the slots are booked, so a worker
+    that dies while waiting leaves nothing behind. Backoff after throttled() is shared too:
+    one worker's 429 pauses the source for all of them, and calls resume one slot at a time.
+
+    Same interface and stats as ScrapeScheduler, deadlines are time.monotonic() values.
+    The per-call counters in stats() are this process's.
+    """
+
+    def __init__(self, path, limits, max_queue: int = 64, backoff_base: float = 2.0, max_backoff: float = 120.0,
+                 on_wait=None):
+        self.path = str(path)
+        self.limits = {source: (rate, max(burst, 1)) for source, (rate, burst) in limits.items()}
+        self.max_queue = max_queue
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+        self.on_wait = on_wait
+        # Autocommit, so every read-modify-write below is one explicit BEGIN IMMEDIATE transaction
+        self._connection = ThreadConnection(self.path, isolation_level=None)
+        self._counters_lock = threading.Lock()
+        self._counters = {source: {"acquired": 0, "queue_full": 0, "deadline": 0, "throttled": 0, "wait_seconds": 0.0}
+                          for source in limits}
+
+        conn = self._connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS scrape_buckets (
+                source TEXT PRIMARY KEY,
+                next_slot REAL NOT NULL,
+                blocked_until REAL NOT NULL,
+                strikes INTEGER NOT NULL
+            )
+        """)
+        conn.executemany(
+            "INSERT OR IGNORE INTO scrape_buckets (source, next_slot, blocked_until, strikes) VALUES (?, 0, 0, 0)",
+            [(source,) for source in limits]
+        )
+
+    @contextmanager
+    def _bucket(self, source):
+        """(next_slot, blocked_until, strikes) of source, locked against other workers until the block ends"""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn, conn.execute(
+                "SELECT next_slot, blocked_until, strikes FROM scrape_buckets WHERE source = ?", (source,)
+            ).fetchone()
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _count(self, source, name, amount=1):
+        with self._counters_lock:
+            self._counters[source][name] += amount
+
+    def _reserve(self, source, deadline_at):
+        """Wall-clock time of a reserved call slot, raises SchedulerBusy instead of booking one"""
+        rate, burst = self.limits[source]
+        interval = 1 / rate
+        # Slots this far ahead of now are the burst, further ones are callers waiting in line
+        burst_window = (burst - 1) * interval
+        with self._bucket(source) as (conn, (next_slot, blocked_until, _)):
+            now = time.time()
+            next_slot = max(next_slot, now)
+            # throttled() already booked every slot up to blocked_until
+            slot = max(next_slot - burst_window, now, blocked_until)
+            if (slot - max(now, blocked_until)) * rate >= self.max_queue:
+                self._count(source, "queue_full")
+                raise SchedulerBusy(source, "queue_full")
+            if slot > deadline_at:
+                self._count(source, "deadline")
+                raise SchedulerBusy(source, "deadline")
+            conn.execute("UPDATE scrape_buckets SET next_slot = ? WHERE source = ?", (next_slot + interval, source))
+        return slot
+
+    def acquire(self, source: str, deadline: float):
+        """
+        Wait for a call slot, deadline is a time.monotonic() value
+        Returns the seconds waited, raises SchedulerBusy instead of waiting in vain
+        """
+        rate, _ = self.limits.get(source, (0, 0))
+        if rate <= 0:
+            return 0.0
+
+        start = time.monotonic()
+        deadline_at = time.time() + (deadline - start)
+        while True:
+            slot = self._reserve(source, deadline_at)
+            delay = slot - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            # A throttle that arrived while this caller slept moves it behind the pause
+            blocked_until = self._connection().execute(
+                "SELECT blocked_until FROM scrape_buckets WHERE source = ?", (source,)
+            ).fetchone()[0]
+            if blocked_until <= time.time():
+                break
+
+        waited = time.monotonic() - start
+        self._count(source, "acquired")
+        self._count(source, "wait_seconds", waited)
+        if self.on_wait is not None:
+            self.on_wait(source, waited)
+        return waited
+
+    def throttled(self, source: str):
+        """Upstream pushed back (HTTP 429, a block page): pause the source for every worker"""
+        if source not in self.limits:
+            return
+        self._count(source, "throttled")
+        rate, burst = self.limits[source]
+        with self._bucket(source) as (conn, (next_slot, blocked_until, strikes)):
+            now = time.time()
+            if now < blocked_until:
+                # Calls sent before the pause started are still coming back, one strike covers them
+                return
+            blocked_until = now + min(self.backoff_base * 2 ** strikes, self.max_backoff)
+            # No saved-up burst after the pause: the first slot is blocked_until, then one per interval
+            if rate > 0:
+                next_slot = max(next_slot, blocked_until + (burst - 1) / rate)
+            conn.execute(
+                "UPDATE scrape_buckets SET next_slot = ?, blocked_until = ?, strikes = ? WHERE source = ?",
+                (next_slot, blocked_until, strikes + 1, source)
+            )
+
+    def succeeded(self, source: str):
+        """A call went through, the next throttling starts again from the base backoff"""
+        if source in self.limits:
+            self._connection().execute("UPDATE scrape_buckets SET strikes = 0 WHERE source = ? AND strikes > 0", (source,))
+
+    def stats(self):
+        now = time.time()
+        rows = {source: (next_slot, blocked_until) for source, next_slot, blocked_until in self._connection().execute(
+            "SELECT source, next_slot, blocked_until FROM scrape_buckets"
+        )}
+        with self._counters_lock:
+            stats = {}
+            for source, (rate, burst) in self.limits.items():
+                next_slot, blocked_until = rows.get(source, (0.0, 0.0))
+                counters = self._counters[source]
+                # Slots booked past the burst and past any pause are callers asleep in line
+                waiting = (next_slot - (burst - 1) / rate - max(now, blocked_until)) * rate if rate > 0 else 0.0
+                stats[source] = {
+                    "rate": rate,
+                    "burst": burst,
+                    "queue_depth": max(math.ceil(waiting), 0),
+                    "acquired": counters["acquired"],
+                    "rejected_queue_full": counters["queue_full"],
+                    "rejected_deadline": counters["deadline"],
+                    "throttled": counters["throttled"],
+                    "backoff_seconds": max(blocked_until - now, 0.0),
+                    "wait_seconds": counters["wait_seconds"],
+                }
+            return stats
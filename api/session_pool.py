@@ -0,0 +1,148 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class ResourcePool:
+    """
+    Thread-safe pool of long-lived client objects (Instaloader instances, requests sessions)
+    Callers borrow a resource, use it, and it goes back to the pool for the next request,
+    so HTTP keep-alive connections and cookies are reused instead of rebuilt per call.
+
+    factory: builds a new resource
+    max_size: cap on resources alive at once, borrowers wait when all are in use
+    health_check: optional callable(resource) -> bool, run before handing out an idle resource
+    max_age / max_uses: recycle resources after this many seconds / borrows
+    close: optional callable(resource) used when a resource is dropped
+    discard_on: exception types that mark the borrowed resource as broken
+    """
+
+    def __init__(self, factory, max_size: int = 4, health_check=None, max_age: float = None,
+                 max_uses: int = None, close=None, discard_on=(), timeout: float = 30,
+                 clock=time.monotonic):
+        self.factory = factory
+        self.max_size = max(1, max_size)
+        self.health_check = health_check
+        self.max_age = max_age
+        self.max_uses = max_uses
+        self.close = close
+        self.discard_on = tuple(discard_on)
+        self.timeout = timeout
+        self._clock = clock
+
+        self._cond = threading.Condition()
+        self._idle = []  # [resource, created_at, uses], most recently returned last
+        self._alive = 0
+        self._invalid = set()  # ids of borrowed resources to drop instead of returning
+
+        self.created = 0
+        self.reused = 0
+        self.discarded = 0
+        self.waits = 0
+
+    def _healthy(self, slot):
+        resource, created_at, uses = slot
+        if self.max_age is not None and self._clock() - created_at > self.max_age:
+            return False
+        if self.max_uses is not None and uses >= self.max_uses:
+            return False
+        if self.health_check is not None:
+            try:
+                return bool(self.health_check(resource))
+            except Exception:
+                return False
+        return True
+
+    def _drop(self, resource):
+        with self._cond:
+            self._alive -= 1
+            self.discarded += 1
+            self._cond.notify()
+        if self.close is not None:
+            try:
+                self.close(resource)
+            except Exception:
+                pass
+
+    def _acquire(self, timeout):
+        timeout = self.timeout if timeout is None else timeout
+        deadline = self._clock() + timeout
+
+        while True:
+            with self._cond:
+                while not self._idle and self._alive >= self.max_size:
+                    remaining = deadline - self._clock()
+                    if remaining <= 0:
+                        raise TimeoutError(f"No pooled resource available within {timeout}s")
+                    self.waits += 1
+                    self._cond.wait(remaining)
+
+                if self._idle:
+                    # LIFO keeps the warmest connections in use
+                    slot = self._idle.pop()
+                else:
+                    slot = None
+                    self._alive += 1
+
+            if slot is None:
+                try:
+                    resource = self.factory()
+                except Exception:
+                    with self._cond:
+                        self._alive -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self.created += 1
+                return [resource, self._clock(), 0]
+
+            if self._healthy(slot):
+                with self._cond:
+                    self.reused += 1
+                return slot
+
+            self._drop(slot[0])
+
+    def _release(self, slot):
+        slot[2] += 1
+        with self._cond:
+            invalid = id(slot[0]) in self._invalid
+            self._invalid.discard(id(slot[0]))
+            if not invalid:
+                self._idle.append(slot)
+                self._cond.notify()
+        if invalid:
+            self._drop(slot[0])
+
+    def invalidate(self, resource):
+        """Drop a borrowed resource when it is returned instead of reusing it"""
+        with self._cond:
+            self._invalid.add(id(resource))
+
+    @contextmanager
+    def borrow(self, timeout: float = None):
+        slot = self._acquire(timeout)
+        try:
+            yield slot[0]
+        except self.discard_on:
+            with self._cond:
+                self._invalid.discard(id(slot[0]))
+            self._drop(slot[0])
+            raise
+        except BaseException:
+            self._release(slot)
+            raise
+        else:
+            self._release(slot)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "alive": self._alive,
+                "idle": len(self._idle),
+                "max_size": self.max_size,
+                "created": self.created,
+                "reused": self.reused,
+                "discarded": self.discarded,
+                "waits": self.waits,
+            }
@@ -0,0 +1,108 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from keyword_matcher import SignalMatcher
+
+
+class SignalMatrix:
+    """
+    Vectorized scoring over the same signal maps as SignalMatcher
+
+    Scoring is a scatter-add, not a matrix product: every keyword is compiled once into
+    the label ids it hits, a batch of bios becomes flat (bio, label, count) triples, and
+    one np.add.at sums them into a (bios x labels) score array. The weights are those of
+    SignalMatcher.match_counts. A (bios x vocabulary) count matrix times a (vocabulary x
+    labels) matrix would give the same array, but bio words are open-ended and almost all
+    miss, so that matrix would be mostly zeros and rebuilt for every new word.
+    Compiled keywords, hits and misses alike, are kept in an LRU of max_keywords entries,
+    so arbitrary bio words cannot grow it for the life of the process.
+    """
+
+    def __init__(self, *signal_maps, max_keywords: int = 200000):
+        self.matcher = SignalMatcher(*signal_maps)
+        self.labels = self.matcher.labels
+        self.signal_maps = signal_maps
+
+        self._lock = threading.Lock()
+        self._compiled = OrderedDict()  # keyword -> label ids it hits (empty when none), LRU order
+        self.max_keywords = max_keywords
+
+        for signal_map in signal_maps:
+            for signals in signal_map.values():
+                for word in signals:
+                    self._label_ids(word.lower())
+
+    def _label_ids(self, keyword):
+        """Label ids hit by keyword, compiled on first sight and kept while recently used"""
+        compiled = self._compiled
+        ids = compiled.get(keyword)
+        if ids is not None:
+            compiled.move_to_end(keyword)
+            return ids
+
+        ids = np.array(sorted(self.matcher.match_ids([keyword])), dtype=np.intp)
+        compiled[keyword] = ids
+        if len(compiled) > self.max_keywords:
+            compiled.popitem(last=False)
+        return ids
+
+    def score_batch(self, batch):
+        """
+        batch: list of {keyword: count} (Counters, or plain keyword lists counted once)
+        Returns a (len(batch) x labels) float array of weights
+        """
+        bio_indexes = []
+        label_ids = []
+        values = []
+        # The LRU is reordered on every lookup, so it is only touched under the lock
+        with self._lock:
+            for bio_index, keyword_counts in enumerate(batch):
+                if not isinstance(keyword_counts, dict):
+                    keyword_counts = dict.fromkeys(keyword_counts, 1)
+                for keyword, count in keyword_counts.items():
+                    ids = self._label_ids(keyword.lower())
+                    if len(ids):
+                        bio_indexes.append(bio_index)
+                        label_ids.append(ids)
+                        values.append(count)
+
+        scores = np.zeros((len(batch), len(self.labels)))
+        if label_ids:
+            hits_per_keyword = np.fromiter((len(ids) for ids in label_ids), dtype=np.intp, count=len(label_ids))
+            # add.at so a keyword listed twice in different casing still sums
+            np.add.at(
+                scores,
+                (np.repeat(bio_indexes, hits_per_keyword), np.concatenate(label_ids)),
+                np.repeat(np.array(values, dtype=float), hits_per_keyword)
+            )
+        return scores
+
+    def strengths(self, scores):
+        """
+        One score row -> one {label: weight} dict per map, hit labels only,
+        in map declaration order (the shape SignalMatcher.match_counts returns)
+        """
+        results = [{} for _ in self.signal_maps]
+        for label_id in np.flatnonzero(scores):
+            map_idx, label = self.labels[label_id]
+            results[map_idx][label] = float(scores[label_id])
+        return results
+
+    def classify_batch(self, batch, threshold: float = 0.0):
+        """
+        Backward-compatible boolean output: per bio, one list of labels per map
+        whose weight is above threshold (0 gives exactly SignalMatcher.match)
+        """
+        scores = self.score_batch(batch)
+        hit = scores > threshold
+
+        results = []
+        for bio_hits in hit:
+            per_map = [[] for _ in self.signal_maps]
+            for label_id in np.flatnonzero(bio_hits):
+                map_idx, label = self.labels[label_id]
+                per_map[map_idx].append(label)
+            results.append(per_map)
+        return results
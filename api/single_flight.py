@@ -0,0 +1,103 @@
+import asyncio
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into one
+    The first caller runs the work, callers arriving while it runs wait for it and share its
+    result or exception. Nothing is kept afterwards, a later call runs the work again
+    (remembering results is ResultCache's and ProfileCache's job).
+    enabled=False runs every call on its own
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._calls = {}  # key -> _Call, for do()
+        self._futures = {}  # key -> asyncio.Future, for do_async()
+
+        self.leaders = 0
+        self.coalesced = 0
+
+    def do(self, key, func, *args):
+        """(func(*args), shared), shared is True when the result came from another caller's run"""
+        if not self.enabled:
+            return func(*args), False
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = func(*args)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    async def do_async(self, key, func, *args):
+        """do() for coroutine functions, callers of one event loop share an awaited func(*args)"""
+        if not self.enabled:
+            return await func(*args), False
+
+        with self._lock:
+            future = self._futures.get(key)
+            leader = future is None
+            if leader:
+                future = self._futures[key] = asyncio.get_running_loop().create_future()
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            # shield: a waiter being cancelled must not cancel the shared result
+            return await asyncio.shield(future), True
+
+        try:
+            result = await func(*args)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Retrieved here so an error nobody else waited for is not logged as unhandled
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            with self._lock:
+                del self._futures[key]
+        return result, False
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "in_flight": len(self._calls) + len(self._futures),
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+            }
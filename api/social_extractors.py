@@ -1,25 +1,220 @@
-import snscrape.modules.twitter as sntwitter
-import instaloader
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FetchTimeout
+from pathlib import Path
+from types import SimpleNamespace
 
+import requests
 
-def extract_from_twitter(username: str, max_posts: int = 20):
+# snscrape and instaloader are imported where they are used: together they add a few
+# hundred ms to startup, and a worker that only sees manual bios never needs them
+from profile_cache import ProfileCache
+from scrape_scheduler import SchedulerBusy, ScrapeScheduler, SharedScrapeScheduler
+from session_pool import ResourcePool
+
+# Lookups survive restarts, set GIFTIQ_PROFILE_CACHE_TTL=0 to always hit the network
+PROFILE_CACHE = ProfileCache(
+    os.environ.get("GIFTIQ_PROFILE_CACHE_PATH", Path(__file__).resolve().parent / ".cache" / "profiles.sqlite3"),
+    ttl=float(os.environ.get("GIFTIQ_PROFILE_CACHE_TTL", 86400)),
+    negative_ttl=float(os.environ.get("GIFTIQ_PROFILE_CACHE_NEGATIVE_TTL", 3600))
+)
+
+
+# Default time budget (seconds) for one social lookup, can be overridden per request
+FETCH_DEADLINE = float(os.environ.get("GIFTIQ_FETCH_DEADLINE", 8))
+# Upper bound for a request's deadline, and the HTTP timeout of the scraping clients: a call
+# abandoned at its deadline keeps its fetch worker until then at most
+MAX_FETCH_DEADLINE = float(os.environ.get("GIFTIQ_MAX_FETCH_DEADLINE", 60))
+
+# Profile loads and post iteration run here so the request thread can stop waiting at its deadline
+FETCH_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("GIFTIQ_FETCH_WORKERS", 16)),
+    thread_name_prefix="post-fetch"
+)
+
+
+# Every uncached lookup waits for a slot here, sized to what Instagram/Twitter tolerate.
+# GIFTIQ_SCRAPE_RATE_<SOURCE> is requests per second (0 = unlimited), GIFTIQ_SCRAPE_BURST_<SOURCE>
+# how many may go out back to back. The limits are for the whole server: the buckets live in
+# GIFTIQ_SCRAPE_STATE_PATH, shared by every gunicorn worker. GIFTIQ_SCRAPE_SHARED=0 keeps them
+# in the process instead, which only gives the configured rate with a single worker
+SCRAPE_LIMITS = {
+    source: (float(os.environ.get(f"GIFTIQ_SCRAPE_RATE_{source.upper()}", rate)),
+             float(os.environ.get(f"GIFTIQ_SCRAPE_BURST_{source.upper()}", burst)))
+    for source, rate, burst in [("instagram", 1.0, 10), ("twitter", 2.0, 20)]
+}
+SCRAPE_OPTIONS = dict(
+    max_queue=int(os.environ.get("GIFTIQ_SCRAPE_QUEUE", 64)),
+    backoff_base=float(os.environ.get("GIFTIQ_SCRAPE_BACKOFF", 2)),
+    max_backoff=float(os.environ.get("GIFTIQ_SCRAPE_MAX_BACKOFF", 120))
+)
+if os.environ.get("GIFTIQ_SCRAPE_SHARED", "1") == "1":
+    SCHEDULER = SharedScrapeScheduler(
+        os.environ.get("GIFTIQ_SCRAPE_STATE_PATH", Path(__file__).resolve().parent / ".cache" / "scrape_buckets.sqlite3"),
+        SCRAPE_LIMITS, **SCRAPE_OPTIONS
+    )
+else:
+    SCHEDULER = ScrapeScheduler(SCRAPE_LIMITS, **SCRAPE_OPTIONS)
+
+# Exception text that means "slow down" rather than "not found" or "broken"
+# Only multi-word status phrases: the messages also quote the handle or the request URL, so a
+# bare "429" would match any lookup of a handle that contains it
+THROTTLE_MARKERS = ("too many requests", "http error code 429", "rate limit", "please wait a few minutes")
+
+
+def is_throttled(error) -> bool:
+    """True when a scraping exception is upstream rate limiting us"""
+    response = getattr(error, "response", None)
+    if getattr(response, "status_code", None) == 429:
+        return True
+    if type(error).__name__ == "TooManyRequestsException":
+        return True
+    text = str(error).lower()
+    return any(marker in text for marker in THROTTLE_MARKERS)
+
+
+def rate_limited(source: str, username: str):
+    return {
+        "success": False,
+        "bio": "",
+        "posts": [],
+        "error": f"Too many {source.title()} lookups right now, so '@{username}' could not be fetched. Please try again in a minute.",
+        "error_type": "rate_limited"
+    }
+
+
+def sanitize_handle(username: str) -> str:
+    return username.strip().replace("@", "").replace(" ", "")
+
+
+def call_before(deadline: float, func, *args):
+    """
+    func(*args) on a fetch worker, raises FetchTimeout once time.monotonic() passes deadline
+    The call itself keeps running on the worker, so whatever it uses must not be reused
+    """
+    future = FETCH_EXECUTOR.submit(func, *args)
+    return future.result(timeout=max(deadline - time.monotonic(), 0))
+
+
+def collect_posts(items, max_posts: int, deadline: float, text_of=lambda item: item):
+    """
+    Pull up to max_posts texts from a (lazy, paginated) iterator on a worker thread
+    Stops waiting once time.monotonic() passes deadline and keeps what arrived so far
+    Empty texts are skipped. Returns {"posts", "partial", "posts_fetched", "fetch_seconds", "error"}
+    """
+    started = time.monotonic()
+    arrived = queue.Queue()
+    stop = threading.Event()
+    done = object()
+
+    def produce():
+        try:
+            # Stop right after the last wanted item so we never wait on an extra page
+            for i, item in enumerate(items if max_posts > 0 else ()):
+                arrived.put(text_of(item))
+                if i + 1 >= max_posts or stop.is_set():
+                    break
+        except Exception as e:
+            arrived.put(e)
+        arrived.put(done)
+
+    FETCH_EXECUTOR.submit(produce)
+
+    posts = []
+    error = None
+    partial = False
+    while True:
+        remaining = deadline - time.monotonic()
+        try:
+            item = arrived.get(timeout=max(remaining, 0))
+        except queue.Empty:
+            # Out of time, the worker notices at its next item and exits
+            stop.set()
+            partial = True
+            break
+
+        if item is done:
+            break
+        if isinstance(item, Exception):
+            error = item
+            break
+        if item:
+            posts.append(item)
+
+    return {
+        "posts": posts,
+        "partial": partial,
+        "posts_fetched": len(posts),
+        "fetch_seconds": round(time.monotonic() - started, 3),
+        "error": error,
+    }
+
+
+def cached_lookup(source: str, username: str, max_posts: int, deadline, fetch):
+    """Serve a lookup from PROFILE_CACHE, falling back to fetch(username, max_posts, deadline)"""
+    handle = username.lower()
+
+    result = PROFILE_CACHE.get(source, handle, max_posts)
+    if result is not None:
+        return result
+
+    budget = FETCH_DEADLINE if deadline is None else deadline
+    deadline_at = time.monotonic() + budget
+    # Time spent waiting for a slot comes out of the same budget
+    try:
+        SCHEDULER.acquire(source, deadline_at)
+    except SchedulerBusy:
+        return rate_limited(source, username)
+
+    result = fetch(username, max_posts, deadline_at)
+    if result.get("error_type") == "rate_limited":
+        SCHEDULER.throttled(source)
+    else:
+        SCHEDULER.succeeded(source)
+
+    # A partial result only vouches for the posts it actually has
+    cached_max_posts = len(result["posts"]) if result.get("partial") else max_posts
+    PROFILE_CACHE.put(source, handle, cached_max_posts, result)
+    return result
+
+
+def extract_from_twitter(username: str, max_posts: int = 20, deadline: float = None):
     """
     Fetch public Twitter/X bio & posts using snscrape
+    deadline: seconds to wait for posts, whatever arrived by then is returned with partial=True
     Returns status object with success/failure indicators
     """
-    # Sanitize username
-    username = username.strip().replace("@", "").replace(" ", "")
+    return cached_lookup("twitter", sanitize_handle(username), max_posts, deadline, fetch_twitter)
+
 
-    tweets = []
+def extract_from_instagram(username: str, max_posts: int = 10, deadline: float = None):
+    """
+    Fetch public Instagram bio & captions using instaloader
+    Checks if account exists and is public before proceeding
+    deadline: seconds to wait for posts, whatever arrived by then is returned with partial=True
+    Returns status object with success/failure indicators
+    """
+    return cached_lookup("instagram", sanitize_handle(username), max_posts, deadline, fetch_instagram)
 
+
+def fetch_twitter(username: str, max_posts: int, deadline: float):
+    """Uncached Twitter/X lookup, username must already be sanitized"""
     try:
-        query = f"from:{username}"
-        scraper = sntwitter.TwitterSearchScraper(query)
+        fetched = collect_posts(twitter_items(username), max_posts, deadline, lambda tweet: tweet.content)
+        if fetched["error"] is not None:
+            raise fetched["error"]
+        tweets = fetched["posts"]
 
-        for i, tweet in enumerate(scraper.get_items()):
-            if i >= max_posts:
-                break
-            tweets.append(tweet.content)
+        if not tweets and fetched["partial"]:
+            return {
+                "success": False,
+                "bio": "",
+                "posts": [],
+                "error": f"Twitter did not return any posts for '@{username}' in time. Please try again later.",
+                "error_type": "deadline_exceeded"
+            }
 
         # Check if any tweets were fetched
         if not tweets:
@@ -32,6 +227,8 @@ def extract_from_twitter(username: str, max_posts: int = 20):
             }
 
     except Exception as e:
+        if is_throttled(e):
+            return rate_limited("twitter", username)
         # Handle scraping errors (account not found, blocked, etc.)
         return {
             "success": False,
@@ -44,46 +241,159 @@ def extract_from_twitter(username: str, max_posts: int = 20):
     return {
         "success": True,
         "bio": "",
-        "posts": tweets
+        "posts": tweets,
+        "partial": fetched["partial"],
+        "posts_fetched": fetched["posts_fetched"],
+        "fetch_seconds": fetched["fetch_seconds"]
     }
 
 
-def extract_from_instagram(username: str, max_posts: int = 10):
-    """
-    Fetch public Instagram bio & captions using instaloader
-    Checks if account exists and is public before proceeding
-    Returns status object with success/failure indicators
-    """
-    loader = instaloader.Instaloader(
+def new_instaloader():
+    import instaloader
+
+    return instaloader.Instaloader(
         download_pictures=False,
         download_videos=False,
         download_video_thumbnails=False,
         download_comments=False,
         save_metadata=False,
-        quiet=True
+        quiet=True,
+        request_timeout=MAX_FETCH_DEADLINE
     )
 
-    # Sanitize username
-    username = username.strip().replace("@", "").replace(" ", "")
+
+# Loaders are reused across requests so their HTTP sessions (keep-alive
+# connections, cookies) are only set up once per pooled instance.
+# Instaloader has no way to tell a broken loader from a working one before using it, so
+# loaders are recycled by age and use count, and dropped when a call fails on the connection.
+# Built on first use, see instaloader_pool()
+INSTALOADER_POOL = None
+_INSTALOADER_POOL_LOCK = threading.Lock()
+
+
+def instaloader_pool():
+    global INSTALOADER_POOL
+    with _INSTALOADER_POOL_LOCK:
+        if INSTALOADER_POOL is None:
+            import instaloader
+
+            INSTALOADER_POOL = ResourcePool(
+                new_instaloader,
+                max_size=int(os.environ.get("GIFTIQ_INSTALOADER_POOL_SIZE", 4)),
+                max_age=float(os.environ.get("GIFTIQ_INSTALOADER_MAX_AGE", 1800)),
+                max_uses=int(os.environ.get("GIFTIQ_INSTALOADER_MAX_USES", 500)) or None,
+                close=lambda loader: loader.close(),
+                discard_on=(instaloader.exceptions.ConnectionException, requests.exceptions.ConnectionError)
+            )
+        return INSTALOADER_POOL
+
+
+# Local stand-in backend (see standin_backend.py) used instead of Instagram and Twitter when set
+STANDIN_URL = os.environ.get("GIFTIQ_SOCIAL_STANDIN_URL", "").rstrip("/")
+
+# Twitter stand-in sessions, stand-in Instagram lookups go through INSTALOADER_POOL like real ones
+STANDIN_POOL = ResourcePool(
+    requests.Session,
+    max_size=int(os.environ.get("GIFTIQ_INSTALOADER_POOL_SIZE", 4)),
+    max_age=float(os.environ.get("GIFTIQ_INSTALOADER_MAX_AGE", 1800)),
+    max_uses=int(os.environ.get("GIFTIQ_INSTALOADER_MAX_USES", 500)) or None,
+    close=lambda session: session.close(),
+    discard_on=(requests.exceptions.ConnectionError,)
+)
+
+
+def load_instagram_profile(loader, username: str):
+    """instaloader.Profile, or an equivalent object read from the stand-in backend"""
+    import instaloader
+
+    if not STANDIN_URL:
+        return instaloader.Profile.from_username(loader.context, username)
+
+    # Through the loader's own session, so the stand-in exercises the same pooled clients
+    response = loader.context._session.get(f"{STANDIN_URL}/instagram/{username}", timeout=MAX_FETCH_DEADLINE)
+    if response.status_code == 404:
+        raise instaloader.exceptions.ProfileNotExistsException(username)
+    response.raise_for_status()
+
+    data = response.json()
+    return SimpleNamespace(
+        is_private=data["is_private"],
+        biography=data["biography"],
+        get_posts=lambda: (SimpleNamespace(caption=caption) for caption in data["posts"])
+    )
+
+
+def twitter_items(username: str):
+    """snscrape's lazy tweet iterator, or the stand-in backend's tweets as equivalent objects"""
+    if not STANDIN_URL:
+        import snscrape.modules.twitter as sntwitter
+
+        query = f"from:{username}"
+        return sntwitter.TwitterSearchScraper(query).get_items()
+
+    return standin_tweets(username)
+
+
+def standin_tweets(username: str):
+    # A generator, so the request runs on the post worker under the deadline like snscrape's paging
+    with STANDIN_POOL.borrow() as session:
+        response = session.get(f"{STANDIN_URL}/twitter/{username}", timeout=MAX_FETCH_DEADLINE)
+    response.raise_for_status()
+    for text in response.json()["tweets"]:
+        yield SimpleNamespace(content=text)
+
+
+def fetch_instagram(username: str, max_posts: int, deadline: float):
+    """Uncached Instagram lookup, username must already be sanitized"""
+    pool = instaloader_pool()
 
     try:
-        # Try to fetch the profile
-        profile = instaloader.Profile.from_username(loader.context, username)
-    except instaloader.exceptions.ProfileNotExistsException:
+        # Waiting for a loader comes out of the lookup's deadline too
+        with pool.borrow(timeout=max(deadline - time.monotonic(), 0)) as loader:
+            result = instagram_result(loader, username, max_posts, deadline)
+            # A fetch worker may still be using the loader, so it must not be handed out again
+            if result.get("partial") or result.get("error_type") == "deadline_exceeded":
+                pool.invalidate(loader)
+            return result
+    except TimeoutError:
+        return instagram_timed_out(username)
+    except Exception as e:
+        if is_throttled(e):
+            return rate_limited("instagram", username)
         return {
             "success": False,
             "bio": "",
             "posts": [],
-            "error": f"Instagram profile '{username}' does not exist. Please check the username and try again.",
-            "error_type": "profile_not_found"
+            "error": f"Error accessing Instagram profile: {str(e)}",
+            "error_type": "access_error"
         }
-    except Exception as e:
+
+
+def instagram_timed_out(username: str):
+    return {
+        "success": False,
+        "bio": "",
+        "posts": [],
+        "error": f"Instagram did not return the profile '@{username}' in time. Please try again later.",
+        "error_type": "deadline_exceeded"
+    }
+
+
+def instagram_result(loader, username: str, max_posts: int, deadline: float):
+    import instaloader
+
+    try:
+        # Try to fetch the profile, under the same deadline as the posts
+        profile = call_before(deadline, load_instagram_profile, loader, username)
+    except FetchTimeout:
+        return instagram_timed_out(username)
+    except instaloader.exceptions.ProfileNotExistsException:
         return {
             "success": False,
             "bio": "",
             "posts": [],
-            "error": f"Error accessing Instagram profile: {str(e)}",
-            "error_type": "access_error"
+            "error": f"Instagram profile '{username}' does not exist. Please check the username and try again.",
+            "error_type": "profile_not_found"
         }
 
     # Check if the account is private
@@ -97,19 +407,14 @@ def extract_from_instagram(username: str, max_posts: int = 10):
         }
 
     # Proceed with extraction for public accounts
-    posts = []
-    try:
-        for i, post in enumerate(profile.get_posts()):
-            if i >= max_posts:
-                break
-            if post.caption:
-                posts.append(post.caption)
-    except Exception as e:
-        # If we can't get posts, still return the bio at least
-        pass
+    # If we can't get posts (error or deadline), still return the bio at least
+    fetched = collect_posts(profile.get_posts(), max_posts, deadline, lambda post: post.caption)
 
     return {
         "success": True,
         "bio": profile.biography or "",
-        "posts": posts
+        "posts": fetched["posts"],
+        "partial": fetched["partial"],
+        "posts_fetched": fetched["posts_fetched"],
+        "fetch_seconds": fetched["fetch_seconds"]
     }
\ No newline at end of file
@@ -0,0 +1,32 @@
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+
+class ThreadConnection:
+    """
+    SQLite connection for the calling thread: ThreadConnection(path)() returns it
+    sqlite3 connections are not shareable across threads, so each thread opens its own,
+    and a forked worker (run.py --production) opens fresh ones instead of reusing the parent's.
+    Every connection is in WAL mode, so readers in other workers never block on a writer
+    """
+
+    def __init__(self, path, isolation_level=""):
+        # isolation_level=None is autocommit, for callers that issue their own BEGIN IMMEDIATE
+        self.path = str(path)
+        self.isolation_level = isolation_level
+        self._local = threading.local()
+
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+
+    def __call__(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=self.isolation_level)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+"""
+Local stand-in for the Instagram and Twitter lookups made by the social extractors
+Point the API at it with GIFTIQ_SOCIAL_STANDIN_URL=http://127.0.0.1:<port>
+
+GET /instagram/<handle>  ->  200 {"biography": ..., "is_private": ..., "posts": [...]}
+                             404 when the handle does not exist
+GET /twitter/<handle>    ->  200 {"tweets": [...]}, empty for missing and private handles
+                             (a search for their posts finds nothing)
+GET /images/<host>/<path> -> 200 a full-size JPEG standing in for https://<host>/<path>
+                             (GIFTIQ_IMAGE_STANDIN_URL=http://127.0.0.1:<port>)
+Any route                ->  503 for a random error_rate share of requests
+/instagram, /twitter     ->  429 above rate_limit requests per second per source, and to
+                             everything for `penalty` seconds after each 429 (a temporary block)
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from scrape_scheduler import TokenBucket
+
+
+class StandinConfig:
+    """
+    latency: seconds added to every response, plus up to `jitter` more at random
+    error_rate: share of requests answered with 503
+    private / missing: handles reported as private / not found
+    image_size: width and height of the served images, in pixels
+    rate_limit: lookups per second allowed per source (burst of the same size), 0 = unlimited
+    penalty: seconds a source answers 429 to everything after a request over rate_limit
+    """
+
+    def __init__(self, latency: float = 0.05, posts: int = 10, private=(), missing=(),
+                 error_rate: float = 0.0, jitter: float = 0.0, seed=None, image_size: int = 1500,
+                 rate_limit: float = 0.0, penalty: float = 0.0):
+        self.latency = latency
+        self.posts = posts
+        self.private = set(private)
+        self.missing = set(missing)
+        self.error_rate = error_rate
+        self.jitter = jitter
+        self.image_size = image_size
+        self.rate_limit = rate_limit
+        self.penalty = penalty
+        self._buckets = {source: TokenBucket(rate_limit, rate_limit) for source in ("instagram", "twitter")}
+        self._blocked_until = {}
+        self.requests = 0
+        self.throttled = 0
+        self.image_requests = 0
+        self._images = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def draw(self):
+        """(delay, fail) for one request"""
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+            fail = self.error_rate > 0 and self._random.random() < self.error_rate
+        return delay, fail
+
+    def admit(self, source):
+        """False when this lookup is over the source's rate limit (or inside its penalty)"""
+        if self.rate_limit <= 0:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            bucket = self._buckets[source]
+            bucket.refill(now)
+            if now >= self._blocked_until.get(source, 0) and bucket.tokens >= 1:
+                bucket.take()
+                return True
+            # Clients that keep knocking during the block keep it going
+            self._blocked_until[source] = now + self.penalty
+            self.throttled += 1
+            return False
+
+    def image(self, path):
+        """JPEG bytes for path, the same image every time it is asked for"""
+        with self._lock:
+            self.image_requests += 1
+            if path not in self._images:
+                self._images[path] = make_image(path, self.image_size)
+            return self._images[path]
+
+
+def make_profile(handle, config):
+    return {
+        "biography": f"{handle} | travel lover | coffee & photography",
+        "is_private": handle in config.private,
+        "posts": [f"Post {i} from {handle}: hiking, books and music" for i in range(config.posts)],
+    }
+
+
+def make_image(path, size):
+    # Pillow is only needed by the image route
+    from PIL import Image, ImageDraw
+
+    color = tuple(hashlib.sha256(path.encode("utf-8")).digest()[:3])
+    image = Image.new("RGB", (size, size), color)
+    draw = ImageDraw.Draw(image)
+    for i in range(0, size, 50):
+        draw.line([(i, 0), (size - i, size)], fill=(255 - color[0], 255 - color[1], 255 - color[2]), width=5)
+    out = io.BytesIO()
+    image.save(out, "JPEG", quality=95)
+    return out.getvalue()
+
+
+def make_tweets(handle, config):
+    if handle in config.private or handle in config.missing:
+        return {"tweets": []}
+    return {"tweets": [f"Tweet {i} from @{handle}: coffee, startups and #travel" for i in range(config.posts)]}
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so clients can keep connections alive between requests
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes, without this they stall on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, body):
+        self.send_body(status, json.dumps(body).encode("utf-8"), "application/json")
+
+    def send_body(self, status, data, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        config = self.server.config
+        parts = self.path.strip("/").split("/")
+
+        delay, fail = config.draw()
+        if delay:
+            time.sleep(delay)
+
+        if parts[0] == "images" and len(parts) > 2:
+            if fail:
+                return self.send_json(503, {"error": "service_unavailable"})
+            return self.send_body(200, config.image("/".join(parts[1:])), "image/jpeg")
+        if len(parts) != 2 or parts[0] not in ("instagram", "twitter"):
+            return self.send_json(404, {"error": "unknown route"})
+        if fail:
+            return self.send_json(503, {"error": "service_unavailable"})
+
+        if not config.admit(parts[0]):
+            return self.send_json(429, {"error": "rate_limited"})
+
+        handle = parts[1].lower()
+        if parts[0] == "twitter":
+            return self.send_json(200, make_tweets(handle, config))
+
+        if handle in config.missing:
+            return self.send_json(404, {"error": "profile_not_found"})
+
+        self.send_json(200, make_profile(handle, config))
+
+
+def start_standin(config=None, host: str = "127.0.0.1", port: int = 0):
+    """Start the stand-in on a background thread, returns (server, base_url)"""
+    server = ThreadingHTTPServer((host, port), StandinHandler)
+    server.daemon_threads = True
+    server.config = config or StandinConfig()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for Instagram and Twitter lookups")
+    parser.add_argument("--port", type=int, default=5050)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="up to this many extra seconds at random")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 503")
+    parser.add_argument("--posts", type=int, default=10)
+    parser.add_argument("--private", nargs="*", default=[], help="handles reported as private")
+    parser.add_argument("--missing", nargs="*", default=[], help="handles reported as not found")
+    parser.add_argument("--image-size", type=int, default=1500, help="width and height of served images")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="lookups per second per source, 0 = unlimited")
+    parser.add_argument("--penalty", type=float, default=0.0, help="seconds of 429s after going over the limit")
+    args = parser.parse_args()
+
+    config = StandinConfig(args.latency, args.posts, args.private, args.missing, args.error_rate, args.jitter,
+                           image_size=args.image_size, rate_limit=args.rate_limit, penalty=args.penalty)
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), StandinHandler)
+    server.daemon_threads = True
+    server.config = config
+    print(f"Stand-in backend on http://127.0.0.1:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
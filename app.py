@@ -1,5 +1,81 @@
+import os
+import time
+
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+from urllib.parse import quote
+
+# ----------------------------
+# API Client
+# ----------------------------
+API_URL = os.environ.get("GIFTIQ_API_URL", "http://localhost:5000")
+# (connect, read) in seconds per API call, jobs are answered at once whatever they cost
+API_TIMEOUT = (3.05, float(os.environ.get("GIFTIQ_API_READ_TIMEOUT", 10)))
+# How long to keep polling a job before giving up on it
+JOB_POLL_TIMEOUT = float(os.environ.get("GIFTIQ_JOB_POLL_TIMEOUT", 120))
+
+
+@st.cache_resource
+def api_session():
+    """One keep-alive session shared by every rerun and browser session"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=10)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+# The API as the user's browser reaches it, which loads the gift images and the background
+# itself. When set, the browser gets the API's resized copies (/images), otherwise the
+# original remote images as before: GIFTIQ_API_URL is often only reachable from this server
+PUBLIC_API_URL = os.environ.get("GIFTIQ_PUBLIC_API_URL", "").rstrip("/")
+
+# Full-size Unsplash photo, resized by the API when PUBLIC_API_URL is set
+BACKGROUND_IMAGE = "https://images.unsplash.com/photo-1513885535751-8b9238bd345a"
+
+
+def image_url(url, preset="thumb"):
+    """URL the browser loads a remote image from: the API's resized, cached copy, or the original"""
+    if not PUBLIC_API_URL:
+        return url
+    return f"{PUBLIC_API_URL}/images/{preset}?url={quote(url, safe='')}"
+
+
+def fetch_recommendations(source, value):
+    """
+    (status_code, data) of a /recommend_gifts request, run as an API job:
+    POST /jobs answers at once, then GET /jobs/<id> is polled until the job finishes
+    Successful results are kept per (source, value) in the session state, failures are not
+    """
+    key = (source, value)
+    cached = st.session_state.recommendation_cache.get(key)
+    if cached is not None:
+        return 200, cached
+
+    session = api_session()
+    response = session.post(f"{API_URL}/jobs", json={"source": source, "value": value}, timeout=API_TIMEOUT)
+    if response.status_code != 202:
+        return response.status_code, response.json()
+
+    status_url = f"{API_URL}{response.json()['status_url']}"
+    give_up_at = time.monotonic() + JOB_POLL_TIMEOUT
+    delay = 0.25
+    while True:
+        time.sleep(delay)
+        response = session.get(status_url, timeout=API_TIMEOUT)
+        job = response.json()
+        if response.status_code != 200:
+            return response.status_code, job
+        if job["status"] == "done":
+            st.session_state.recommendation_cache[key] = job["result"]
+            return 200, job["result"]
+        if job["status"] == "failed":
+            return job["status_code"], job["error"]
+        if time.monotonic() > give_up_at:
+            raise requests.exceptions.Timeout(f"Job {job['job_id']} still {job['status']}")
+        # Quick answers come back quickly, long social lookups are not polled hard
+        delay = min(delay * 1.5, 2.0)
 
 
 # ----------------------------
@@ -21,7 +97,7 @@ st.markdown(
             rgba(255, 255, 255, 0.75),
             rgba(255, 255, 255, 0.75)
         ),
-        url("https://images.unsplash.com/photo-1513885535751-8b9238bd345a");
+        url("__BACKGROUND_URL__");
     background-size: cover;
     background-position: center;
     background-repeat: no-repeat;
@@ -68,7 +144,7 @@ st.markdown(
         }
 
         </style>
-        """,
+        """.replace("__BACKGROUND_URL__", image_url(BACKGROUND_IMAGE, "background")),
         unsafe_allow_html=True
     )
 #----------------------------
@@ -80,6 +156,10 @@ if "page" not in st.session_state:
 if "analysis_result" not in st.session_state:
     st.session_state.analysis_result = None
 
+if "recommendation_cache" not in st.session_state:
+    # (source, value) -> successful /recommend_gifts response, so re-submitting the same input is free
+    st.session_state.recommendation_cache = {}
+
 # ----------------------------
 # Sidebar Navigation
 # ----------------------------
@@ -216,17 +296,12 @@ elif st.session_state.page == "Analyze Profile":
                     try:
                         with st.spinner("Analyzing personality & interests..."):
                             # Call the backend API with manual source and the alternative bio
-                            response = requests.post(
-                                "http://localhost:5000/recommend_gifts",
-                                json={"source": "manual", "value": alternative_bio},
-                            )
-                            
-                            data = response.json()
+                            status_code, data = fetch_recommendations("manual", alternative_bio)
                             
                             # Check if the API returned a failure
                             if not data.get("success", True):
                                 error_msg = "❌ **Analysis Failed**\n\nPlease try again with more details."
-                            elif response.status_code == 200:
+                            elif status_code == 200:
                                 st.session_state.analysis_result = {
                                     "traits": data.get("traits", []),
                                     "interests": data.get("interests", []),
@@ -238,7 +313,9 @@ elif st.session_state.page == "Analyze Profile":
                             else:
                                 error_msg = "❌ Something went wrong. Please try again."
                     except requests.exceptions.ConnectionError:
-                        error_msg = "❌ Cannot connect to API server. Make sure it's running on http://localhost:5000"
+                        error_msg = f"❌ Cannot connect to API server. Make sure it's running on {API_URL}"
+                    except requests.exceptions.Timeout:
+                        error_msg = "❌ The analysis took too long. Please try again."
                     except Exception as e:
                         error_msg = f"❌ Error: {str(e)}"
                     
@@ -281,13 +358,7 @@ elif st.session_state.page == "Analyze Profile":
                         source = source_map.get(input_type)
                         
                         # Call the backend API with source and value
-                        response = requests.post(
-                            "http://localhost:5000/recommend_gifts",
-                            json={"source": source, "value": user_input},
-                            
-                        )
-                        
-                        data = response.json()
+                        status_code, data = fetch_recommendations(source, user_input)
                         
                         # Check if the API returned a failure
                         if not data.get("success", True):
@@ -297,7 +368,7 @@ elif st.session_state.page == "Analyze Profile":
                             else:
                                 # For other errors, show generic message
                                 error_msg = "❌ **Analysis Failed**\n\nPlease check your input and try again."
-                        elif response.status_code == 200:
+                        elif status_code == 200:
                             st.session_state.analysis_result = {
                                 "traits": data.get("traits", []),
                                 "interests": data.get("interests", []),
@@ -309,7 +380,9 @@ elif st.session_state.page == "Analyze Profile":
                         else:
                             error_msg = "❌ Something went wrong. Please try again."
                 except requests.exceptions.ConnectionError:
-                    error_msg = "❌ Cannot connect to API server. Make sure it's running on http://localhost:5000"
+                    error_msg = f"❌ Cannot connect to API server. Make sure it's running on {API_URL}"
+                except requests.exceptions.Timeout:
+                    error_msg = "❌ The analysis took too long. Please try again."
                 except Exception as e:
                     error_msg = f"❌ Error: {str(e)}"
                 
@@ -385,15 +458,15 @@ elif st.session_state.page == "Gift Recommendations":
                         <div style="margin: 12px 0;">
                     """, unsafe_allow_html=True)
                     
-                    # Display gift image with optimized styling
+                    # Display gift image with optimized styling, a cached thumbnail served by the API
                     try:
                         st.image(
-                            gift.get("image", "https://via.placeholder.com/200"),
+                            image_url(gift.get("image", "https://via.placeholder.com/200")),
                             use_container_width=True,
                             caption=None
                         )
                     except Exception:
-                        st.image("https://via.placeholder.com/200", use_container_width=True)
+                        st.image(image_url("https://via.placeholder.com/200"), use_container_width=True)
                     
                     # Display tags
                     if gift.get("tags"):
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+"""
+Benchmark: sync (gunicorn gthread, run.py --production) vs. async (asgi.py, run.py --async)
+serving under slow social lookups
+
+`social` clients keep Instagram/Twitter lookups in flight against a stand-in that takes
+`latency` seconds per call, while a few clients send manual bios. Reports completed
+lookups per second, as a share of the social / latency a fully concurrent server would
+reach, and the manual bio latency, which should not depend on how many slow profiles
+are being fetched.
+Usage: python benchmarks/bench_async_serving.py [social clients] [latency s] [duration s]
+"""
+
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from bench_serving import start_server, stop_server
+from load_test import free_port, serve_standin
+from personality_trait_analyzer import load_sample_bios
+
+MANUAL_CLIENTS = 4
+
+
+def drive(url, social, manual, duration, bios):
+    stop_at = time.monotonic() + duration
+    lock = threading.Lock()
+    state = {"social_ok": 0, "social_failed": 0}
+    manual_latencies = []
+
+    def social_client(worker):
+        session = requests.Session()
+        i = 0
+        while time.monotonic() < stop_at:
+            # A new handle every time, so neither cache answers
+            source = "instagram" if i % 2 else "twitter"
+            try:
+                ok = session.post(f"{url}/recommend_gifts", json={"source": source, "value": f"c{worker}x{i}"},
+                                  timeout=120).status_code == 200
+            except requests.RequestException:
+                ok = False
+            with lock:
+                state["social_ok" if ok else "social_failed"] += 1
+            i += 1
+
+    def manual_client(worker):
+        session = requests.Session()
+        i = 0
+        while time.monotonic() < stop_at:
+            start = time.perf_counter()
+            response = session.post(f"{url}/recommend_gifts", timeout=120, json={
+                "source": "manual", "value": f"{bios[i % len(bios)]} manual {worker}-{i}"
+            })
+            if response.status_code == 200:
+                manual_latencies.append((time.perf_counter() - start) * 1000)
+            i += 1
+
+    with ThreadPoolExecutor(social + manual) as executor:
+        futures = [executor.submit(social_client, i) for i in range(social)]
+        futures += [executor.submit(manual_client, i) for i in range(manual)]
+        for future in futures:
+            future.result()
+    return state, manual_latencies
+
+
+def main():
+    social = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+    duration = float(sys.argv[3]) if len(sys.argv) > 3 else 15
+    workers = str(os.cpu_count() or 1)
+
+    standin_port = free_port()
+    ready = multiprocessing.Event()
+    standin = multiprocessing.Process(target=serve_standin, daemon=True, args=(standin_port, {
+        "latency": latency, "jitter": 0.0, "error_rate": 0.0, "posts": 10,
+        "private": set(), "missing": set(), "seed": 22,
+    }, ready))
+    standin.start()
+    ready.wait(10)
+
+    env = {
+        "GIFTIQ_SOCIAL_STANDIN_URL": f"http://127.0.0.1:{standin_port}",
+        "GIFTIQ_PROFILE_CACHE_PATH": os.path.join(tempfile.mkdtemp(), "profiles.sqlite3"),
+        "GIFTIQ_PROFILE_CACHE_TTL": "0",
+        "GIFTIQ_PROFILE_CACHE_NEGATIVE_TTL": "0",
+        # Measures serving, not the scrape scheduler's upstream limits
+        "GIFTIQ_SCRAPE_RATE_INSTAGRAM": "0",
+        "GIFTIQ_SCRAPE_RATE_TWITTER": "0",
+        "GIFTIQ_FETCH_DEADLINE": "60",
+    }
+    port = free_port()
+    modes = [
+        (f"sync gunicorn x{workers}", [sys.executable, "-W", "ignore", "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"],
+         {"GIFTIQ_BIND": f"127.0.0.1:{port}", "GIFTIQ_WORKERS": workers}),
+        ("async asgi.py", [sys.executable, "-W", "ignore", "asgi.py"], {}),
+    ]
+
+    bios = load_sample_bios()
+    print(f"{social} social clients + {MANUAL_CLIENTS} manual clients for {duration:.0f}s, "
+          f"stand-in latency {latency * 1000:.0f} ms")
+    print(f"{'server':>20} {'lookups/s':>10} {'failed':>7} {'of ideal':>9} "
+          f"{'manual p50 (ms)':>16} {'manual p95 (ms)':>16}")
+    try:
+        for name, command, mode_env in modes:
+            server, url = start_server(command, port, {**env, **mode_env})
+            try:
+                state, manual = drive(url, social, MANUAL_CLIENTS, duration, bios)
+            finally:
+                stop_server(server)
+            rate = state["social_ok"] / duration
+            cuts = statistics.quantiles(manual, n=20) if len(manual) > 1 else [float("nan")] * 19
+            print(f"{name:>20} {rate:>10.1f} {state['social_failed']:>7} {rate / (social / latency):>9.0%} "
+                  f"{statistics.median(manual) if manual else float('nan'):>16.1f} {cuts[18]:>16.1f}")
+    finally:
+        standin.terminate()
+
+
+if __name__ == "__main__":
+    main()
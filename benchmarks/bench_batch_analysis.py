@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+"""
+Benchmark: bios/sec for one-at-a-time run_full_analysis vs. run_batch_analysis
+Usage: python benchmarks/bench_batch_analysis.py [num_bios]
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "api"))
+
+from personality_trait_analyzer import run_full_analysis, run_batch_analysis
+
+SAMPLE_BIOS = [
+    "AI engineer | Startup enthusiast 🚀 | Loves productivity tools, smart gadgets & minimal design | Coffee addict ☕",
+    "Wanderlust soul 🌍 | Mountains over beaches | Loves solo trips, photography & journaling | Nature heals.",
+    "Yoga | Mindfulness | Early mornings | Healthy living | Peace over chaos 🧘",
+    "Art | Aesthetic vibes | Journaling | Soft music | Coffee & creativity 🎨☕",
+    "Hopeless romantic 💕 | Loves surprises, music & cozy evenings | Handmade things > expensive things",
+]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    bios = [SAMPLE_BIOS[i % len(SAMPLE_BIOS)] + f" #{i}" for i in range(count)]
+
+    start = time.perf_counter()
+    for bio in bios:
+        run_full_analysis(bio)
+    elapsed = time.perf_counter() - start
+    print(f"{'sequential':>20}: {count / elapsed:8.1f} bios/sec")
+
+    n_process = 1
+    while n_process <= (os.cpu_count() or 1):
+        start = time.perf_counter()
+        run_batch_analysis(bios, batch_size=64, n_process=n_process)
+        elapsed = time.perf_counter() - start
+        print(f"{f'pipe n_process={n_process}':>20}: {count / elapsed:8.1f} bios/sec")
+        n_process *= 2
+
+
+if __name__ == "__main__":
+    main()
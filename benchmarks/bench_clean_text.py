@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+"""
+Benchmark: precompiled clean_text vs. the original six chained re.sub calls
+Checks byte-identical output on a fixed corpus plus random fuzz before timing
+Usage: python benchmarks/bench_clean_text.py
+"""
+
+import random
+import re
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "api"))
+
+from personality_trait_analyzer import clean_text, load_sample_bios
+
+
+def legacy_clean_text(text: str) -> str:
+    """The pre-fusion implementation, kept here as the reference"""
+    text = text.lower()
+    text = re.sub(r"http\S+", "", text)
+    text = re.sub(r"@\w+", "", text)
+    text = re.sub(r"#\w+", "", text)
+    text = re.sub(r"[^a-zA-Z\s\-']", "", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    return text
+
+
+# Edge cases around the order the old regexes ran in
+FIXED_CORPUS = [
+    "",
+    "   ",
+    "Hello World",
+    "Check https://example.com/a?b=c&d=e now!!",
+    "@alice and @bob_2 went #hiking #travel2024",
+    "@http://x.com/abc",
+    "@fooohttp://bar baz",
+    "#abhttp://x.com tail",
+    "#@alice @#tag @ # http",
+    "ahttp xhttpy zhttp",
+    "Emojis 🚀🌍☕ and CAFÉ naïve résumé",
+    "Tabs\tand\nnewlines\r\n\x0b\x0c and nbsp em　ideographic",
+    "don't stop-believin' -- 'quoted' — em dash",
+    "Digits 123 and symbols $%^&*()[]{}<>|\\/",
+    "K kelvin sign and İ dotted capital I",
+    "user@example.com wrote: http://a.b/c#frag @end",
+    "İstanbul ŞEHİR straße ǅ",
+]
+
+FUZZ_ALPHABET = list("abchtpHTTP:/@#_-' \t\n.9é🚀  Kİ\x1c") + ["http", "https://", "@", "#"]
+
+
+def fuzz_corpus(rng, count=20000):
+    return ["".join(rng.choice(FUZZ_ALPHABET) for _ in range(rng.randint(0, 40))) for _ in range(count)]
+
+
+def main():
+    rng = random.Random(11)
+    bios = load_sample_bios()
+
+    for text in FIXED_CORPUS + bios + fuzz_corpus(rng):
+        expected = legacy_clean_text(text)
+        actual = clean_text(text)
+        assert actual.encode("utf-8") == expected.encode("utf-8"), (text, expected, actual)
+    print("output identical on fixed corpus, sample bios and 20000 fuzz strings")
+
+    tweet = "Just landed in Lisbon ✈️ #travel @friend https://t.co/abc123 loving the food & coffee ☕ 2024!"
+    dump = " ".join(tweet for _ in range(50 * 1024 // len(tweet)))
+
+    print(f"{'input':>14} {'legacy (us)':>12} {'current (us)':>13} {'speedup':>8}")
+    for name, text, runs in [("short bio", bios[0], 20000), ("20 tweets", " ".join([tweet] * 20), 2000),
+                             ("50KB dump", dump, 100)]:
+        legacy = timeit.timeit(lambda: legacy_clean_text(text), number=runs) / runs
+        current = timeit.timeit(lambda: clean_text(text), number=runs) / runs
+        print(f"{name:>14} {legacy * 1e6:>12.1f} {current * 1e6:>13.1f} {legacy / current:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
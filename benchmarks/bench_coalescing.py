@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+"""
+Benchmark: single-flight coalescing of concurrent /recommend_gifts requests for one handle
+
+`clients` requests for the same handle (spelled "@Handle", "handle", " HANDLE ") start
+at once against the local stand-in, through the Flask app (one thread per request) and
+the async app (one task per request), with coalescing off and on. Reports the stand-in
+calls each burst cost, the requests answered by another one's run and the burst's wall
+time, and checks that every coalesced request got the same answer. A burst for a private
+handle checks that a shared failure reaches every request too. Exits 1 if a check fails.
+Usage: python benchmarks/bench_coalescing.py [clients] [stand-in latency s]
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "api"))
+
+from standin_backend import StandinConfig, start_standin
+
+clients = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+config = StandinConfig(latency=latency, private={"lockedhandle"})
+standin, standin_url = start_standin(config)
+
+# Read by the app modules at import time: no cache may answer a repeated handle, and the
+# client pools must not be what serializes the uncoalesced bursts
+os.environ.update({
+    "GIFTIQ_SOCIAL_STANDIN_URL": standin_url,
+    "GIFTIQ_PROFILE_CACHE_PATH": os.path.join(tempfile.mkdtemp(), "profiles.sqlite3"),
+    "GIFTIQ_PROFILE_CACHE_TTL": "0",
+    "GIFTIQ_PROFILE_CACHE_NEGATIVE_TTL": "0",
+    "GIFTIQ_SCRAPE_RATE_INSTAGRAM": "0",
+    "GIFTIQ_SCRAPE_RATE_TWITTER": "0",
+    "GIFTIQ_RESULT_CACHE_SIZE": "0",
+    "GIFTIQ_FETCH_WORKERS": str(2 * clients),
+    "GIFTIQ_INSTALOADER_POOL_SIZE": str(clients),
+})
+
+import asgi
+from app import IN_FLIGHT, app
+
+
+def spellings(handle):
+    return [f"@{handle.title()}", handle, f" {handle.upper()} "]
+
+
+def flask_burst(payloads):
+    """[(status, body)] with every request started at the same moment on its own thread"""
+    barrier = threading.Barrier(len(payloads))
+    results = [None] * len(payloads)
+
+    def one(i):
+        client = app.test_client()
+        barrier.wait()
+        response = client.post("/recommend_gifts", json=payloads[i])
+        results[i] = (response.status_code, response.get_json())
+
+    threads = [threading.Thread(target=one, args=(i,)) for i in range(len(payloads))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+async def asgi_call(payload):
+    body = json.dumps(payload).encode("utf-8")
+    scope = {"type": "http", "method": "POST", "path": "/recommend_gifts", "query_string": b"",
+             "headers": [(b"content-type", b"application/json")]}
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    await asgi.app(scope, receive, send)
+    return sent[0]["status"], json.loads(sent[1]["body"])
+
+
+def asgi_burst(payloads):
+    async def burst():
+        return await asyncio.gather(*(asgi_call(payload) for payload in payloads))
+    return asyncio.run(burst())
+
+
+def run(burst, source, handle):
+    payloads = [{"source": source, "value": spellings(handle)[i % 3]} for i in range(clients)]
+    calls_before, coalesced_before = config.requests, IN_FLIGHT.coalesced
+    start = time.perf_counter()
+    results = burst(payloads)
+    elapsed = time.perf_counter() - start
+
+    for _, body in results:
+        # Wall time of the fetch differs between separate runs, it is not part of the answer
+        body.get("extraction", {}).pop("fetch_seconds", None)
+    same = all(result == results[0] for result in results)
+    return config.requests - calls_before, IN_FLIGHT.coalesced - coalesced_before, elapsed, results[0][0], same
+
+
+def main():
+    print(f"{clients} concurrent requests per burst, stand-in latency {latency * 1000:.0f} ms")
+    print(f"{'server':>7} {'coalescing':>10} {'source':>10} {'status':>6} {'stand-in calls':>15} "
+          f"{'coalesced':>10} {'wall (s)':>9} {'same answer':>12}")
+    failed = False
+    bursts = 0
+    for server, burst in [("flask", flask_burst), ("asgi", asgi_burst)]:
+        for enabled in (False, True):
+            IN_FLIGHT.enabled = enabled
+            for source, handle in [("instagram", "campaignuser"), ("twitter", "campaignuser"),
+                                   ("instagram", "lockedhandle")]:
+                # A fresh handle per burst, so nothing can be left over from the previous one
+                bursts += 1
+                name = handle if handle == "lockedhandle" else f"{handle}{bursts}"
+                calls, coalesced, elapsed, status, same = run(burst, source, name)
+                print(f"{server:>7} {'on' if enabled else 'off':>10} {source:>10} {status:>6} {calls:>15} "
+                      f"{coalesced:>10} {elapsed:>9.2f} {'yes' if same else 'NO':>12}")
+                expected_calls = 1 if enabled else clients
+                # Uncoalesced failures may quote each request's own spelling of the handle
+                if (enabled and not same) or calls != expected_calls or coalesced != (clients - 1 if enabled else 0):
+                    failed = True
+
+    standin.shutdown()
+    if failed:
+        print("FAILED: a burst did not share one stand-in call, or answers differed")
+        sys.exit(1)
+    print("every coalesced burst made one stand-in call and gave every request the same answer")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+"""
+Benchmark: indexed GiftCatalog lookups vs. scanning the gift list, as the catalog grows
+Usage: python benchmarks/bench_gift_catalog.py
+"""
+
+import json
+import random
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "api"))
+
+from gift_catalog import DEFAULT_CATALOG_PATH, GiftCatalog
+
+
+def scan_recommend(gifts, categories):
+    """The pre-index recommend_gifts, kept here as the reference"""
+    recommendations = []
+    for category in categories:
+        recommendations.extend([gift for gift in gifts if gift.get("category") == category])
+    return recommendations[:5]
+
+
+def indexed_recommend(catalog, categories, limit=5):
+    recommendations = []
+    for category in categories:
+        recommendations.extend(catalog.in_category(category)[:limit - len(recommendations)])
+        if len(recommendations) >= limit:
+            break
+    return recommendations
+
+
+def synthetic_catalog(base, size, rng):
+    gifts = []
+    for i in range(size):
+        gift = dict(base[i % len(base)])
+        gift["title"] = f"{gift['title']} #{i}"
+        gift["price"] = rng.randint(199, 60000)
+        gifts.append(gift)
+    return gifts
+
+
+def main():
+    rng = random.Random(7)
+    base = json.loads(Path(DEFAULT_CATALOG_PATH).read_text(encoding="utf-8"))
+    categories = ["photography", "travel", "books"]
+
+    print(f"{'SKUs':>7} {'scan (us)':>10} {'indexed (us)':>13} {'price range (us)':>17} {'index build (ms)':>17}")
+    for size in [len(base), 1000, 10000, 50000]:
+        gifts = synthetic_catalog(base, size, rng)
+
+        build = timeit.timeit(lambda: GiftCatalog(gifts), number=1)
+        catalog = GiftCatalog(gifts)
+        assert indexed_recommend(catalog, categories) == scan_recommend(gifts, categories)
+
+        runs = 200
+        scan = timeit.timeit(lambda: scan_recommend(gifts, categories), number=runs) / runs
+        indexed = timeit.timeit(lambda: indexed_recommend(catalog, categories), number=runs) / runs
+        ranged = timeit.timeit(lambda: catalog.in_price_range(1000, 1500, category="books"), number=runs) / runs
+
+        print(f"{size:>7} {scan * 1e6:>10.1f} {indexed * 1e6:>13.2f} {ranged * 1e6:>17.2f} {build * 1000:>17.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+"""
+Benchmark: /images thumbnail proxy against the local image stand-in
+Every catalog image is requested cold (stand-in download + resize), warm (read from
+the on-disk cache) and as a browser revalidation (If-None-Match, 304). Reports the
+latency of each pass, the bytes a page downloads with and without the proxy, and
+checks that the stand-in served each image exactly once.
+Usage: python benchmarks/bench_image_proxy.py [stand-in latency seconds]
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import quote
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "api"))
+
+from standin_backend import StandinConfig, start_standin
+
+latency = float(sys.argv[1]) if len(sys.argv) > 1 else 0.1
+config = StandinConfig(latency=latency)
+standin, standin_url = start_standin(config)
+
+# Read by image_cache and app at import time
+os.environ["GIFTIQ_IMAGE_STANDIN_URL"] = standin_url
+os.environ["GIFTIQ_IMAGE_CACHE_PATH"] = tempfile.mkdtemp()
+
+from app import THUMBNAILS, app
+from gift_catalog import load_catalog
+from image_cache import fetch_image
+
+
+def timed_pass(client, urls, headers=None):
+    """(per-request ms, bytes received, status codes seen)"""
+    latencies, received, statuses = [], 0, set()
+    for url in urls:
+        start = time.perf_counter()
+        response = client.get(f"/images/thumb?url={quote(url, safe='')}", headers=(headers or {}).get(url))
+        latencies.append((time.perf_counter() - start) * 1000)
+        received += len(response.data)
+        statuses.add(response.status_code)
+    return latencies, received, statuses
+
+
+def main():
+    urls = sorted({gift["image"] for gift in load_catalog().gifts if gift.get("image")})
+    client = app.test_client()
+
+    original_bytes = sum(len(fetch_image(url)) for url in urls)
+    config.image_requests = 0
+
+    cold, thumb_bytes, cold_status = timed_pass(client, urls)
+    served_once = config.image_requests == len(urls)
+    warm, _, warm_status = timed_pass(client, urls)
+
+    etags = {url: {"If-None-Match": client.get(f"/images/thumb?url={quote(url, safe='')}").headers["ETag"]}
+             for url in urls}
+    revalidate, _, revalidate_status = timed_pass(client, urls, etags)
+
+    print(f"{len(urls)} catalog images, stand-in latency {latency * 1000:.0f} ms, "
+          f"{config.image_size}x{config.image_size} source images")
+    print(f"{'pass':>12} {'status':>8} {'p50 (ms)':>9} {'max (ms)':>9} {'total (ms)':>11}")
+    for name, latencies, statuses in [("cold", cold, cold_status), ("warm", warm, warm_status),
+                                      ("revalidate", revalidate, revalidate_status)]:
+        print(f"{name:>12} {','.join(map(str, sorted(statuses))):>8} {statistics.median(latencies):>9.2f} "
+              f"{max(latencies):>9.2f} {sum(latencies):>11.1f}")
+    print(f"page image bytes: {original_bytes / 1024:.0f} KiB full size -> {thumb_bytes / 1024:.0f} KiB thumbnails")
+    print(f"stand-in downloads during the passes: {config.image_requests} "
+          f"({'one per image' if served_once and config.image_requests == len(urls) else 'UNEXPECTED'})")
+    print(f"cache: {THUMBNAILS.stats()}")
+    standin.shutdown()
+
+
+if __name__ == "__main__":
+    main()
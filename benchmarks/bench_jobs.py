@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+"""
+Benchmark: a burst of slow social lookups through POST /jobs and GET /jobs/<id>
+
+`clients` users submit an Instagram handle each at the same moment, against a stand-in
+that takes `latency` seconds per lookup, then poll their job the way the UI does.
+Reports how long the submit took (the user waits for this before the UI can show
+progress), when the last job finished, and the backlog GET /jobs reported while it
+drained. A second burst over GIFTIQ_JOB_QUEUE checks that the extra submits get 503.
+Exits 1 if a job is lost or a result differs from /recommend_gifts.
+Usage: python benchmarks/bench_jobs.py [clients] [stand-in latency s] [job workers]
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "api"))
+
+from standin_backend import StandinConfig, start_standin
+
+clients = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+latency = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+workers = int(sys.argv[3]) if len(sys.argv) > 3 else 16
+standin, standin_url = start_standin(StandinConfig(latency=latency))
+
+cache_dir = tempfile.mkdtemp()
+os.environ.update({
+    "GIFTIQ_SOCIAL_STANDIN_URL": standin_url,
+    "GIFTIQ_PROFILE_CACHE_PATH": os.path.join(cache_dir, "profiles.sqlite3"),
+    "GIFTIQ_JOB_STORE_PATH": os.path.join(cache_dir, "jobs.sqlite3"),
+    "GIFTIQ_SCRAPE_RATE_INSTAGRAM": "0",
+    "GIFTIQ_JOB_WORKERS": str(workers),
+    "GIFTIQ_JOB_QUEUE": str(clients),
+    "GIFTIQ_INSTALOADER_POOL_SIZE": str(workers),
+})
+
+import app as api
+from app import app
+
+
+def poll(http, status_url):
+    delay = 0.25
+    while True:
+        time.sleep(delay)
+        job = http.get(status_url).get_json()
+        if job["status"] in ("done", "failed"):
+            return job
+        delay = min(delay * 1.5, 2.0)
+
+
+def burst(tag):
+    barrier = threading.Barrier(clients)
+    submits, finished, jobs = [None] * clients, [None] * clients, [None] * clients
+
+    def user(i):
+        http = app.test_client()
+        barrier.wait()
+        start = time.perf_counter()
+        response = http.post("/jobs", json={"source": "instagram", "value": f"{tag}user{i}"})
+        submits[i] = time.perf_counter() - start
+        if response.status_code == 202:
+            jobs[i] = poll(http, response.get_json()["status_url"])
+            finished[i] = time.perf_counter() - start
+
+    threads = [threading.Thread(target=user, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    return threads, submits, finished, jobs
+
+
+def main():
+    print(f"{clients} users at once, stand-in latency {latency * 1000:.0f} ms, {workers} job workers")
+    api.warm_up()
+    http = app.test_client()
+
+    threads, submits, finished, jobs = burst("a")
+    # A second burst while the first one fills the queue: only what fits is accepted
+    time.sleep(0.2)
+    overflow = [app.test_client().post("/jobs", json={"source": "instagram", "value": f"overflow{i}"}).status_code
+                for i in range(8)]
+    backlog = []
+    while any(thread.is_alive() for thread in threads):
+        counts = http.get("/jobs").get_json()["jobs"]
+        backlog.append((counts["queued"], counts["running"]))
+        time.sleep(0.5)
+    for thread in threads:
+        thread.join()
+
+    cuts = statistics.quantiles([s * 1000 for s in submits], n=20)
+    print(f"submit latency: p50 {statistics.median(submits) * 1000:.1f} ms, p95 {cuts[18]:.1f} ms")
+    print(f"all jobs finished after {max(finished):.1f} s "
+          f"(ideal {latency * -(-clients // workers):.1f} s for {clients} lookups on {workers} workers)")
+    print("backlog while draining (queued/running): "
+          + " ".join(f"{queued}/{running}" for queued, running in backlog[::max(len(backlog) // 10, 1)]))
+    print(f"submits over the queue limit: {overflow.count(503)} of {len(overflow)} got 503")
+
+    failed = False
+    if any(job is None or job["status"] != "done" for job in jobs):
+        print("FAILED: a job did not finish")
+        failed = True
+    direct = http.post("/recommend_gifts", json={"source": "instagram", "value": "auser0"}).get_json()
+    job_result = dict(jobs[0]["result"])
+    for body in (direct, job_result):
+        body.get("extraction", {}).pop("fetch_seconds", None)
+        body.get("extraction", {}).pop("cached", None)
+    if job_result != direct:
+        print("FAILED: a job result differs from /recommend_gifts")
+        failed = True
+
+    standin.shutdown()
+    if failed:
+        sys.exit(1)
+    print("every job finished with the same answer /recommend_gifts gives")
+
+
+if __name__ == "__main__":
+    main()
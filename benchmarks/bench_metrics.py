@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+"""
+Benchmark: cost of the /metrics instrumentation next to the requests it measures
+Usage: python benchmarks/bench_metrics.py
+"""
+
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "api"))
+
+from app import ERRORS, METRICS, STAGE_SECONDS, app, observe_stages
+
+
+def main():
+    runs = 200000
+    observe = timeit.timeit(lambda: STAGE_SECONDS.labels("spacy", "manual").observe(0.004), number=runs) / runs
+    inc = timeit.timeit(lambda: ERRORS.labels("instagram", "private_account").inc(), number=runs) / runs
+    timings = {"clean_text": 1e-5, "spacy": 4e-3, "inference": 1e-4, "gifts": 1e-4}
+    per_request = timeit.timeit(lambda: observe_stages(timings, "manual"), number=runs) / runs
+
+    client = app.test_client()
+    payload = {"source": "manual", "value": "Coffee lover, trail runner and amateur photographer"}
+    client.post("/recommend_gifts", json=payload)  # fill the result cache
+    request_runs = 2000
+    cached_request = timeit.timeit(lambda: client.post("/recommend_gifts", json=payload), number=request_runs) / request_runs
+    render = timeit.timeit(METRICS.render, number=200) / 200
+
+    print(f"histogram observe        {observe * 1e6:8.2f} us")
+    print(f"counter inc              {inc * 1e6:8.2f} us")
+    print(f"all stages of a request  {per_request * 1e6:8.2f} us")
+    print(f"cached /recommend_gifts  {cached_request * 1e6:8.2f} us (cheapest request, includes its metrics)")
+    print(f"/metrics render          {render * 1e6:8.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+"""
+Benchmark: PhraseCounter vs. one re.findall per phrase as the phrase list grows,
+with both of its strategies (str.count per phrase, one Aho-Corasick scan) timed.
+Checks identical counts before timing
+Usage: python benchmarks/bench_phrase_counter.py
+"""
+
+import random
+import re
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "api"))
+
+from keyword_matcher import PhraseCounter
+from personality_trait_analyzer import DEFAULT_PHRASES_PATH, clean_text, load_phrases, load_sample_bios
+
+
+def findall_counts(phrases, text):
+    """The pre-automaton loop, kept here as the reference"""
+    counts = {}
+    for phrase in phrases:
+        occurrences = len(re.findall(phrase, text))
+        if occurrences:
+            counts[phrase] = occurrences
+    return counts
+
+
+def synthetic_phrases(base, size, rng):
+    words = sorted({word for phrase in base for word in phrase.split()})
+    words += [f"word{i}" for i in range(size)]
+    phrases = list(base)
+    while len(phrases) < size:
+        phrase = " ".join(rng.sample(words, 2))
+        if phrase not in phrases:
+            phrases.append(phrase)
+    return phrases
+
+
+def main():
+    rng = random.Random(12)
+    base = load_phrases(DEFAULT_PHRASES_PATH)
+    bios = [clean_text(bio) for bio in load_sample_bios()]
+    tweet = "just landed in lisbon loving the sustainable fashion scene and adventure travel with a friend "
+    posts = {"short bio": bios[0], "20 tweets": tweet * 20, "50KB dump": tweet * (50 * 1024 // len(tweet))}
+
+    print(f"{'phrases':>8} {'input':>10} {'findall (us)':>13} {'str.count (us)':>15} {'automaton (us)':>15}")
+    for size in [len(base), 100, 500, 1000]:
+        phrases = synthetic_phrases(base, size, rng)
+        counter = PhraseCounter(phrases)
+        per_phrase = PhraseCounter(phrases, scan_threshold=len(phrases) + 1)
+
+        for text in bios + list(posts.values()):
+            expected = findall_counts(phrases, text)
+            assert per_phrase.count(text) == counter.scan(text) == expected, text
+
+        for name, text in posts.items():
+            runs = max(1, 20000 // len(text))
+            findall = timeit.timeit(lambda: findall_counts(phrases, text), number=runs) / runs
+            counted = timeit.timeit(lambda: per_phrase.count(text), number=runs) / runs
+            scanned = timeit.timeit(lambda: counter.scan(text), number=runs) / runs
+            print(f"{size:>8} {name:>10} {findall * 1e6:>13.1f} {counted * 1e6:>15.1f} {scanned * 1e6:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
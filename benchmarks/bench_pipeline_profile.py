@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+"""
+Benchmark: load time, per-request latency and peak RSS for each spaCy pipeline profile
+Every profile runs in its own process so memory numbers do not leak between them
+Usage: python benchmarks/bench_pipeline_profile.py [requests]
+"""
+
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+API_DIR = Path(__file__).resolve().parent.parent / "api"
+
+
+def measure(requests):
+    """Runs inside the child process, profile comes from GIFTIQ_SPACY_PROFILE"""
+    sys.path.insert(0, str(API_DIR))
+
+    start = time.perf_counter()
+    import personality_trait_analyzer as analyzer
+    analyzer.warm_up()
+    load_seconds = time.perf_counter() - start
+
+    bios = analyzer.load_sample_bios()
+    latencies = []
+    for i in range(requests):
+        start = time.perf_counter()
+        analyzer.run_full_analysis(bios[i % len(bios)])
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+
+    print(json.dumps({
+        "profile": analyzer.PIPELINE_PROFILE,
+        "components": analyzer.get_nlp().pipe_names,
+        "load_s": load_seconds,
+        "mean_ms": sum(latencies) / len(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+        # ru_maxrss is KB on Linux, bytes on macOS
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024),
+    }))
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+    print(f"{'profile':>8} {'load (s)':>9} {'mean (ms)':>10} {'p95 (ms)':>9} {'max RSS (MB)':>13}  components")
+    for profile in ["full", "minimal"]:
+        env = dict(os.environ, GIFTIQ_SPACY_PROFILE=profile, GIFTIQ_VERIFY_PIPELINE="0")
+        out = subprocess.run(
+            [sys.executable, "-W", "ignore", __file__, "--child", str(requests)],
+            env=env, capture_output=True, text=True, check=True
+        ).stdout
+        row = json.loads(out.strip().splitlines()[-1])
+        print(f"{row['profile']:>8} {row['load_s']:>9.2f} {row['mean_ms']:>10.2f} {row['p95_ms']:>9.2f} "
+              f"{row['max_rss_mb']:>13.1f}  {','.join(row['components'])}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--child":
+        measure(int(sys.argv[2]))
+    else:
+        main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+"""
+Benchmark: sustained social lookups against a rate-limited upstream, with and without
+the scrape scheduler
+
+The stand-in allows `limit` lookups per second per source and answers 429 to everything
+for `penalty` seconds after each one over it, the way Instagram's temporary blocks do.
+`clients` threads send Instagram and Twitter requests for new handles back to back
+through the Flask app for `duration` seconds: split over `processes` forked workers
+(like gunicorn's) with per-process buckets set just under the upstream limit and with
+the shared SQLite ones, then in one process with the scheduler off (rate 0) and with
+per-process buckets. Reports successful lookups per second next to the limit, the 429s
+upstream sent, the requests the scheduler turned away without calling upstream, and
+the p50/p95 latency of the successful ones.
+Usage: python benchmarks/bench_scrape_scheduler.py [limit/s] [penalty s] [clients] [duration s] [processes]
+"""
+
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "api"))
+
+from standin_backend import StandinConfig, start_standin
+
+limit = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+penalty = float(sys.argv[2]) if len(sys.argv) > 2 else 2
+clients = int(sys.argv[3]) if len(sys.argv) > 3 else 32
+duration = float(sys.argv[4]) if len(sys.argv) > 4 else 15
+processes = int(sys.argv[5]) if len(sys.argv) > 5 else 4
+
+config = StandinConfig(latency=0.05, rate_limit=limit, penalty=penalty)
+standin, standin_url = start_standin(config)
+
+os.environ.update({
+    "GIFTIQ_SOCIAL_STANDIN_URL": standin_url,
+    "GIFTIQ_PROFILE_CACHE_PATH": os.path.join(tempfile.mkdtemp(), "profiles.sqlite3"),
+    "GIFTIQ_PROFILE_CACHE_TTL": "0",
+    "GIFTIQ_PROFILE_CACHE_NEGATIVE_TTL": "0",
+    "GIFTIQ_INSTALOADER_POOL_SIZE": str(clients),
+})
+
+import social_extractors
+from app import app
+from scrape_scheduler import ScrapeScheduler, SharedScrapeScheduler
+
+SOURCES = ("instagram", "twitter")
+# Buckets a little under the upstream limit: network jitter can bunch calls that left
+# the scheduler evenly spaced, and every 429 costs a backoff
+HEADROOM = 0.9
+
+
+def drive(run_id, clients):
+    stop_at = time.monotonic() + duration
+    lock = threading.Lock()
+    outcomes = Counter()
+    latencies = []
+
+    def client(worker):
+        http = app.test_client()
+        i = 0
+        while time.monotonic() < stop_at:
+            source = SOURCES[i % 2]
+            start = time.perf_counter()
+            response = http.post("/recommend_gifts", json={"source": source, "value": f"r{run_id}c{worker}n{i}"})
+            elapsed = time.perf_counter() - start
+            outcome = "ok" if response.status_code == 200 else response.get_json().get("error_type", "other")
+            with lock:
+                outcomes[(source, outcome)] += 1
+                if outcome == "ok":
+                    latencies.append(elapsed * 1000)
+            i += 1
+
+    threads = [threading.Thread(target=client, args=(worker,)) for worker in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return outcomes, latencies
+
+
+def worker_process(run_id, make_scheduler, results):
+    scheduler = make_scheduler()
+    social_extractors.SCHEDULER = scheduler
+    outcomes, latencies = drive(run_id, clients // processes)
+    stats = scheduler.stats()
+    turned_away = sum(stats[source]["rejected_queue_full"] + stats[source]["rejected_deadline"] for source in SOURCES)
+    results.put((outcomes, latencies, turned_away))
+
+
+def run(run_id, make_scheduler, workers):
+    """(outcomes, latencies, requests turned away) of clients split over workers processes"""
+    if workers == 1:
+        scheduler = make_scheduler()
+        social_extractors.SCHEDULER = scheduler
+        outcomes, latencies = drive(run_id, clients)
+        stats = scheduler.stats()
+        return outcomes, latencies, sum(stats[source]["rejected_queue_full"] + stats[source]["rejected_deadline"]
+                                        for source in SOURCES)
+
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    children = [context.Process(target=worker_process, args=(f"{run_id}p{i}", make_scheduler, results))
+                for i in range(workers)]
+    for child in children:
+        child.start()
+    outcomes, latencies, turned_away = Counter(), [], 0
+    for _ in children:
+        child_outcomes, child_latencies, child_turned_away = results.get()
+        outcomes += child_outcomes
+        latencies += child_latencies
+        turned_away += child_turned_away
+    for child in children:
+        child.join()
+    return outcomes, latencies, turned_away
+
+
+def main():
+    print(f"upstream limit {limit:g}/s per source, {penalty:g}s block after a 429, "
+          f"{clients} clients for {duration:.0f}s")
+    print(f"{'scheduler':>16} {'ok/s per source':>16} {'upstream 429s':>14} {'turned away':>12} "
+          f"{'p50 ok (ms)':>12} {'p95 ok (ms)':>12}")
+    rate = limit * HEADROOM
+    state_dir = tempfile.mkdtemp()
+    # Forked runs first: a fork only copies the calling thread, so the children of a parent
+    # whose fetch executor already started its threads would wait on workers that do not exist
+    runs = [
+        (f"local x{processes}", lambda: ScrapeScheduler({source: (rate, rate) for source in SOURCES}), processes),
+        (f"shared x{processes}", lambda: SharedScrapeScheduler(
+            os.path.join(state_dir, "buckets.sqlite3"), {source: (rate, rate) for source in SOURCES}
+        ), processes),
+        ("off", lambda: ScrapeScheduler({source: (0, 0) for source in SOURCES}), 1),
+        ("local", lambda: ScrapeScheduler({source: (rate, rate) for source in SOURCES}), 1),
+    ]
+    for run_id, (name, make_scheduler, workers) in enumerate(runs):
+        # Let the stand-in's buckets refill and any block from the previous run expire
+        time.sleep(penalty + 1)
+        throttled_before = config.throttled
+
+        outcomes, latencies, turned_away = run(run_id, make_scheduler, workers)
+        ok = sum(count for (_, outcome), count in outcomes.items() if outcome == "ok")
+        cuts = statistics.quantiles(latencies, n=20) if len(latencies) > 1 else [float("nan")] * 19
+        print(f"{name:>16} {ok / duration / len(SOURCES):>16.1f} "
+              f"{config.throttled - throttled_before:>14} {turned_away:>12} "
+              f"{statistics.median(latencies) if latencies else float('nan'):>12.1f} {cuts[18]:>12.1f}")
+
+    standin.shutdown()
+
+
+if __name__ == "__main__":
+    main()
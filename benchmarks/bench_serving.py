@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+"""
+Benchmark: /recommend_gifts throughput of the Flask dev server (python app.py, the
+default run.py path) vs. gunicorn with preforked workers (run.py --production)
+Every request carries a different manual bio so the result cache does not absorb the work
+Usage: python benchmarks/bench_serving.py [requests] [client threads] [workers]
+"""
+
+import os
+import signal
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+API_DIR = Path(__file__).resolve().parent.parent / "api"
+sys.path.insert(0, str(API_DIR))
+
+from personality_trait_analyzer import load_sample_bios
+
+
+def start_server(command, port, env):
+    # Own session so the dev server's reloader child is stopped with it
+    process = subprocess.Popen(
+        command, cwd=str(API_DIR), env={**os.environ, **env, "GIFTIQ_PORT": str(port)},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True
+    )
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(600):
+        try:
+            requests.get(f"{url}/cache/stats", timeout=1)
+            return process, url
+        except requests.RequestException:
+            time.sleep(0.1)
+    stop_server(process)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def stop_server(process):
+    os.killpg(process.pid, signal.SIGTERM)
+    process.wait(timeout=60)
+
+
+def run(url, bios, total, threads):
+    latencies = []
+
+    def one(i):
+        session = requests.Session()
+        start = time.perf_counter()
+        response = session.post(f"{url}/recommend_gifts",
+                                json={"source": "manual", "value": f"{bios[i % len(bios)]} request {i}"})
+        assert response.status_code == 200, response.text
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        list(executor.map(one, range(total)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return total / elapsed, latencies[len(latencies) // 2] * 1000, latencies[int(len(latencies) * 0.95)] * 1000
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    workers = sys.argv[3] if len(sys.argv) > 3 else str(os.cpu_count() or 1)
+    bios = load_sample_bios()
+
+    modes = [
+        ("dev server", [sys.executable, "-W", "ignore", "app.py"], 5601, {}),
+        (f"gunicorn x{workers}", [sys.executable, "-W", "ignore", "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"],
+         5602, {"GIFTIQ_BIND": "127.0.0.1:5602", "GIFTIQ_WORKERS": workers}),
+    ]
+
+    print(f"{total} requests, {threads} client threads")
+    print(f"{'server':>14} {'req/s':>8} {'p50 (ms)':>9} {'p95 (ms)':>9}")
+    for name, command, port, env in modes:
+        process, url = start_server(command, port, env)
+        try:
+            run(url, bios, min(total, 50), threads)  # warm-up
+            throughput, p50, p95 = run(url, bios, total, threads)
+        finally:
+            stop_server(process)
+        print(f"{name:>14} {throughput:>8.1f} {p50:>9.2f} {p95:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+"""
+Benchmark: Instagram lookups through pooled Instaloader instances vs. a new Instaloader
+per lookup, under concurrent load against the local stand-in backend (which is called
+through each loader's own HTTP session, so connection reuse is what is measured)
+Usage: python benchmarks/bench_session_pool.py [lookups] [threads]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "api"))
+
+from standin_backend import StandinConfig, start_standin
+
+server, base_url = start_standin(StandinConfig(latency=0.005))
+
+# Must be set before social_extractors is imported, profile cache is off so every lookup hits the backend
+os.environ["GIFTIQ_SOCIAL_STANDIN_URL"] = base_url
+os.environ["GIFTIQ_PROFILE_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(), "profiles.sqlite3")
+os.environ["GIFTIQ_PROFILE_CACHE_TTL"] = "0"
+os.environ["GIFTIQ_PROFILE_CACHE_NEGATIVE_TTL"] = "0"
+os.environ["GIFTIQ_SCRAPE_RATE_INSTAGRAM"] = "0"
+os.environ["GIFTIQ_SCRAPE_RATE_TWITTER"] = "0"
+
+import social_extractors
+from session_pool import ResourcePool
+
+
+def run(lookups, threads):
+    latencies = []
+
+    def one(i):
+        start = time.perf_counter()
+        result = social_extractors.extract_from_instagram(f"user{i % 50}")
+        assert result["success"], result
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        list(executor.map(one, range(lookups)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return lookups / elapsed, latencies[len(latencies) // 2] * 1000, latencies[int(len(latencies) * 0.95)] * 1000
+
+
+def main():
+    lookups = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    # Same size for both so the only difference is loader reuse
+    pooled = ResourcePool(social_extractors.new_instaloader, max_size=threads, close=lambda loader: loader.close())
+    # max_uses=1 throws every loader away after one lookup, like the old per-call Instaloader
+    unpooled = ResourcePool(social_extractors.new_instaloader, max_size=threads, max_uses=1,
+                            close=lambda loader: loader.close())
+
+    print(f"{lookups} lookups, {threads} threads")
+    print(f"{'mode':>10} {'lookups/s':>10} {'p50 (ms)':>9} {'p95 (ms)':>9}")
+    for name, pool in [("per-call", unpooled), ("pooled", pooled)]:
+        social_extractors.INSTALOADER_POOL = pool
+        throughput, p50, p95 = run(lookups, threads)
+        print(f"{name:>10} {throughput:>10.1f} {p50:>9.2f} {p95:>9.2f}")
+    print("pool stats:", pooled.stats())
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+"""
+Benchmark: compiled SignalMatcher vs. the old nested any() lookups
+Usage: python benchmarks/bench_signal_matcher.py
+"""
+
+import random
+import string
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "api"))
+
+from keyword_matcher import SignalMatcher
+from personality_trait_analyzer import TRAIT_MAP, INTEREST_CATEGORY_MAP
+
+
+def legacy_match(signal_map, keywords):
+    """The pre-automaton implementation, kept here as the reference"""
+    hits = set()
+    keywords_lower = [k.lower() for k in keywords]
+    for label, signals in signal_map.items():
+        if any(word.lower() in keywords_lower or any(word.lower() in k for k in keywords_lower) for word in signals):
+            hits.add(label)
+    return hits
+
+
+def make_keywords(count, rng):
+    """Mostly noise words with a few real signals mixed in, like tweet dumps"""
+    signals = [w for m in (TRAIT_MAP, INTEREST_CATEGORY_MAP) for ws in m.values() for w in ws]
+    keywords = []
+    for _ in range(count):
+        if rng.random() < 0.05:
+            keywords.append(rng.choice(signals) + rng.choice(["", "s", "ing"]))
+        else:
+            keywords.append("".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 12))))
+    return keywords
+
+
+def main():
+    rng = random.Random(42)
+    matcher = SignalMatcher(TRAIT_MAP, INTEREST_CATEGORY_MAP)
+
+    # Correctness first: results must be identical to the legacy check
+    for _ in range(500):
+        keywords = make_keywords(rng.randint(0, 60), rng)
+        traits, interests = matcher.match(keywords)
+        assert set(traits) == legacy_match(TRAIT_MAP, keywords)
+        assert set(interests) == legacy_match(INTEREST_CATEGORY_MAP, keywords)
+
+    print(f"{'keywords':>9} {'legacy (ms)':>12} {'matcher (ms)':>13} {'speedup':>8}")
+    for count in [10, 50, 200, 500, 1000, 2000]:
+        keywords = make_keywords(count, rng)
+        runs = max(3, 2000 // count)
+
+        legacy = timeit.timeit(
+            lambda: (legacy_match(TRAIT_MAP, keywords), legacy_match(INTEREST_CATEGORY_MAP, keywords)),
+            number=runs
+        ) / runs
+        compiled = timeit.timeit(lambda: matcher.match(keywords), number=runs) / runs
+
+        print(f"{count:>9} {legacy * 1000:>12.3f} {compiled * 1000:>13.3f} {legacy / compiled:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
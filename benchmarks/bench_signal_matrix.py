@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+"""
+Benchmark: per-bio SignalMatcher.match_counts vs. one SignalMatrix product per batch
+Usage: python benchmarks/bench_signal_matrix.py
+"""
+
+import random
+import string
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "api"))
+
+from keyword_matcher import SignalMatcher
+from signal_matrix import SignalMatrix
+from personality_trait_analyzer import TRAIT_MAP, INTEREST_CATEGORY_MAP
+
+
+def make_bio_keywords(rng, signals, vocabulary):
+    """~40 keyword counts per bio, drawn from a shared vocabulary like real bios"""
+    counts = Counter()
+    for _ in range(40):
+        word = rng.choice(signals) if rng.random() < 0.15 else rng.choice(vocabulary)
+        counts[word] += 1
+    return counts
+
+
+def main():
+    rng = random.Random(3)
+    signals = [w for m in (TRAIT_MAP, INTEREST_CATEGORY_MAP) for ws in m.values() for w in ws]
+    vocabulary = ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 10))) for _ in range(5000)]
+
+    matcher = SignalMatcher(TRAIT_MAP, INTEREST_CATEGORY_MAP)
+    matrix = SignalMatrix(TRAIT_MAP, INTEREST_CATEGORY_MAP)
+
+    # Same weights and same boolean output as the automaton
+    check = [make_bio_keywords(rng, signals, vocabulary) for _ in range(300)]
+    for keyword_counts, row, booleans in zip(check, matrix.score_batch(check), matrix.classify_batch(check)):
+        assert matrix.strengths(row) == matcher.match_counts(keyword_counts)
+        assert booleans == matcher.match(keyword_counts)
+
+    print(f"{'bios':>7} {'per-bio (bios/s)':>17} {'matrix (bios/s)':>16} {'speedup':>8}")
+    for size in [100, 1000, 5000, 20000]:
+        batch = [make_bio_keywords(rng, signals, vocabulary) for _ in range(size)]
+        matrix.score_batch(batch)  # warm the vocabulary, as a long-running server would be
+
+        start = time.perf_counter()
+        for keyword_counts in batch:
+            matcher.match_counts(keyword_counts)
+        per_bio = time.perf_counter() - start
+
+        start = time.perf_counter()
+        matrix.score_batch(batch)
+        vectorized = time.perf_counter() - start
+
+        print(f"{size:>7} {size / per_bio:>17.0f} {size / vectorized:>16.0f} {per_bio / vectorized:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+"""
+Benchmark: API startup cost
+  1. python -X importtime breakdown of `import app`, heaviest direct imports first
+  2. import app (spaCy deferred) vs. import app + warm_up() (what importing used to cost)
+  3. time to first listening socket and to the first answered /recommend_gifts
+     for the dev server and gunicorn
+Usage: python benchmarks/bench_startup.py [top N imports]
+"""
+
+import os
+import re
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import requests
+
+API_DIR = Path(__file__).resolve().parent.parent / "api"
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def importtime_report(module):
+    """
+    (total_us, [(name, self_us, cumulative_us)]) for `import module`, the list holding
+    the imports module makes directly
+    """
+    result = subprocess.run(
+        [sys.executable, "-W", "ignore", "-X", "importtime", "-c", f"import {module}"],
+        cwd=str(API_DIR), capture_output=True, text=True, check=True
+    )
+    # Children are printed before their parent, two more spaces deep
+    children = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        depth = len(match.group(3))
+        row = (match.group(4), int(match.group(1)), int(match.group(2)))
+        if depth == 3:
+            children.append(row)
+        elif depth == 1:
+            if row[0] == module:
+                return row[2], children
+            children = []
+    raise RuntimeError(f"{module} not found in the -X importtime output")
+
+
+def timed_import(statement, runs=3):
+    """Best wall time of running statement in a fresh interpreter, minus the interpreter start"""
+    def run(code):
+        best = float("inf")
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, "-W", "ignore", "-c", code], cwd=str(API_DIR),
+                           check=True, capture_output=True)
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    return run(statement) - run("pass")
+
+
+def startup_times(command, port, env):
+    """(seconds to a listening socket, seconds to the first answered /recommend_gifts)"""
+    start = time.perf_counter()
+    process = subprocess.Popen(command, cwd=str(API_DIR), env={**os.environ, **env, "GIFTIQ_PORT": str(port)},
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+    try:
+        listening = None
+        while listening is None:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.05).close()
+                listening = time.perf_counter() - start
+            except OSError:
+                time.sleep(0.005)
+
+        payload = {"source": "manual", "value": "Coffee lover, trail runner and amateur photographer"}
+        while True:
+            try:
+                if requests.post(f"http://127.0.0.1:{port}/recommend_gifts", json=payload, timeout=60).ok:
+                    return listening, time.perf_counter() - start
+            except requests.RequestException:
+                time.sleep(0.01)
+    finally:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=60)
+
+
+def main():
+    top = int(sys.argv[1]) if len(sys.argv) > 1 else 15
+
+    total_us, rows = importtime_report("app")
+    print(f"-X importtime, import app: {total_us / 1000:.1f} ms (top {top} of its {len(rows)} direct imports)")
+    print(f"{'module':>32} {'self (ms)':>10} {'cumulative (ms)':>16}")
+    for module, self_us, cumulative_us in sorted(rows, key=lambda row: -row[2])[:top]:
+        print(f"{module:>32} {self_us / 1000:>10.1f} {cumulative_us / 1000:>16.1f}")
+
+    print()
+    lazy = timed_import("import app")
+    eager = timed_import("import app; app.warm_up()")
+    print(f"{'import app':>32} {lazy * 1000:>10.0f} ms")
+    print(f"{'import app + warm_up()':>32} {eager * 1000:>10.0f} ms")
+
+    print()
+    print(f"{'server':>14} {'listening (s)':>14} {'first answer (s)':>17}")
+    modes = [
+        ("dev server", [sys.executable, "-W", "ignore", "app.py"], 5611, {}),
+        ("gunicorn", [sys.executable, "-W", "ignore", "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"],
+         5612, {"GIFTIQ_BIND": "127.0.0.1:5612", "GIFTIQ_WORKERS": "2"}),
+    ]
+    for name, command, port, env in modes:
+        listening, answered = startup_times(command, port, env)
+        print(f"{name:>14} {listening:>14.2f} {answered:>17.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+"""
+Benchmark: peak Python memory of /recommend_gifts/stream as the input grows
+The request body is generated lazily and the response consumed line by line,
+so any growth comes from the endpoint itself. Peak should stay flat
+Usage: python benchmarks/bench_stream_ndjson.py
+"""
+
+import io
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "api"))
+
+from werkzeug.test import EnvironBuilder
+
+from app import RESULT_CACHE, app
+from personality_trait_analyzer import load_sample_bios
+
+
+class NDJSONBody(io.RawIOBase):
+    """File-like request body producing `lines` NDJSON items on demand"""
+
+    def __init__(self, bios, lines):
+        self.bios = bios
+        self.lines = lines
+        self.sent = 0
+        self.buffer = b""
+
+    def readable(self):
+        return True
+
+    def readinto(self, target):
+        while not self.buffer and self.sent < self.lines:
+            # Unique text per line so the result cache cannot absorb the work
+            bio = f"{self.bios[self.sent % len(self.bios)]} line {self.sent}"
+            self.buffer = (json.dumps({"source": "manual", "value": bio}) + "\n").encode("utf-8")
+            self.sent += 1
+        size = min(len(target), len(self.buffer))
+        target[:size] = self.buffer[:size]
+        self.buffer = self.buffer[size:]
+        return size
+
+
+def run(bios, lines):
+    RESULT_CACHE.clear()
+    tracemalloc.start()
+    started = time.perf_counter()
+
+    # Called as a plain WSGI app because the test client wants a seekable body;
+    # wsgi.input_terminated lets the body be read without a Content-Length (like chunked uploads)
+    environ = EnvironBuilder(
+        "/recommend_gifts/stream", method="POST", query_string="batch_size=64",
+        content_type="application/x-ndjson"
+    ).get_environ()
+    environ["wsgi.input"] = io.BufferedReader(NDJSONBody(bios, lines))
+    environ["wsgi.input_terminated"] = True
+    environ.pop("CONTENT_LENGTH", None)
+
+    status = []
+    body = app.wsgi_app(environ, lambda code, headers: status.append(code))
+    received = 0
+    for line in body:
+        for entry in line.decode("utf-8").splitlines():
+            assert json.loads(entry)["success"]
+            received += 1
+    if hasattr(body, "close"):
+        body.close()
+    assert status == ["200 OK"], status
+
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert received == lines, (received, lines)
+    return peak, elapsed
+
+
+def main():
+    bios = load_sample_bios()
+
+    print(f"{'lines':>7} {'peak memory (KB)':>17} {'lines/s':>9}")
+    for lines in [1000, 5000, 20000]:
+        peak, elapsed = run(bios, lines)
+        print(f"{lines:>7} {peak / 1024:>17.0f} {lines / elapsed:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
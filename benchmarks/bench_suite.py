@@ -0,0 +1,253 @@
+#!/usr/bin/env python
+"""
+Benchmark suite for the public functions of personality_trait_analyzer
+
+Times clean_text, extract_keywords, infer_personality_traits, classify_interests,
+rank_gifts and run_full_analysis on three seeded corpora built from the sample
+bios in profiles.txt (short bios, long bios, 20-tweet dumps) and reports p50/p95/p99
+per function and corpus. The suite runs `rounds` times and each statistic is the median
+over the rounds, with half their range kept as its spread. Results can be saved as JSON
+and compared with a baseline.
+
+Usage:
+  python benchmarks/bench_suite.py                              print a table
+  python benchmarks/bench_suite.py --output results.json        also save the results
+  python benchmarks/bench_suite.py --save-baseline              store them as the baseline
+  python benchmarks/bench_suite.py --baseline benchmarks/baseline.json --threshold 0.15
+      exit 1 if any p50 or p95 is more than 15% slower than the baseline, by more than
+      the noise both runs measured between their rounds
+
+Baselines are machine specific, record one on the machine that runs the comparison.
+"""
+
+import argparse
+import gc
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "api"))
+
+import spacy
+
+from gift_ranker import rank_gifts
+from personality_trait_analyzer import (
+    CATALOG, DEFAULT_TOP_K, PIPELINE_PROFILE, SIGNAL_MATCHER, clean_text, classify_interests, extract_keywords,
+    infer_personality_traits, load_sample_bios, merge_keywords, run_full_analysis
+)
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+COMPARED_STATS = ("p50", "p95")
+# A slowdown must exceed this many times the combined round-to-round spread to count
+NOISE_FACTOR = 2.0
+
+# Filler for the synthetic corpora, in the register of the sample bios and of real posts
+EXTRA_PHRASES = [
+    "weekend hiking trips", "indie movie nights", "sustainable fashion finds", "home barista experiments",
+    "marathon training", "reading fantasy novels", "learning the guitar", "street food hunts",
+    "tech company life", "adventure travel plans", "minimalist desk setup", "plant parent",
+    "yoga every morning", "sketching in cafes", "board game evenings", "practical gift ideas",
+]
+HASHTAGS = ["#travel", "#coffee", "#fitness", "#bookstagram", "#photography", "#wanderlust", "#foodie"]
+EMOJIS = ["🚀", "☕", "🌍", "📸", "🎨", "💪", "📚", "✨"]
+
+
+def synthetic_corpora(bios, rng, size):
+    """{corpus name: [text, ...]} built deterministically from the sample bios"""
+    def phrase():
+        return rng.choice(EXTRA_PHRASES)
+
+    def tweet(i):
+        parts = [f"Loving {phrase()} and {phrase()}", rng.choice(HASHTAGS), rng.choice(EMOJIS)]
+        if rng.random() < 0.4:
+            parts.append(f"@friend{rng.randint(1, 500)}")
+        if rng.random() < 0.3:
+            parts.append(f"https://t.co/{rng.randint(10**6, 10**7)}")
+        return f"{' '.join(parts)} day {i}"
+
+    short = [f"{bios[i % len(bios)]} | {phrase()}" for i in range(size)]
+    long = [
+        " ".join(rng.sample(bios, min(3, len(bios)))) + " " + ". ".join(phrase() for _ in range(12))
+        for _ in range(size)
+    ]
+    tweets = [" ".join(tweet(j) for j in range(20)) for _ in range(size)]
+    return {"short_bio": short, "long_bio": long, "tweets_20": tweets}
+
+
+def function_cases(texts):
+    """
+    (name, callable, prepared argument per text) for every benchmarked function
+    Arguments are prepared up front so each function is timed on its own input only
+    """
+    cleaned = [clean_text(text) for text in texts]
+    keywords = [extract_keywords(text) for text in cleaned]
+    # The gift stage of run_full_analysis ranks on the merged keyword counts and interest weights
+    merged = [merge_keywords(text, words) for text, words in zip(texts, keywords)]
+    ranking_inputs = [(counts, SIGNAL_MATCHER.match_counts(counts)[1]) for counts in merged]
+    return [
+        ("clean_text", clean_text, texts),
+        ("extract_keywords", extract_keywords, cleaned),
+        ("infer_personality_traits", infer_personality_traits, keywords),
+        ("classify_interests", classify_interests, keywords),
+        ("rank_gifts", rank_top_gifts, ranking_inputs),
+        ("run_full_analysis", run_full_analysis, texts),
+    ]
+
+
+def rank_top_gifts(ranking_input):
+    keyword_counts, interest_strength = ranking_input
+    return rank_gifts(CATALOG, keyword_counts, interest_strength, DEFAULT_TOP_K)
+
+
+def percentile_stats(samples):
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {
+        "p50": cuts[49],
+        "p95": cuts[94],
+        "p99": cuts[98],
+        "mean": statistics.fmean(samples),
+        "samples": len(samples),
+    }
+
+
+def time_calls(func, args, repeats):
+    """Per-call latencies in microseconds, with the collector paused like timeit does"""
+    for arg in args[:min(len(args), 20)]:
+        func(arg)  # warm-up
+
+    samples = []
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            for arg in args:
+                start = time.perf_counter_ns()
+                func(arg)
+                samples.append((time.perf_counter_ns() - start) / 1000)
+    finally:
+        gc.enable()
+    return samples
+
+
+def median_of_rounds(rounds):
+    """One stats dict from a list of per-round ones: medians, plus {stat}_spread (half the range)"""
+    stats = {}
+    for stat in rounds[0]:
+        values = [round_stats[stat] for round_stats in rounds]
+        stats[stat] = statistics.median(values)
+        if stat != "samples":
+            stats[f"{stat}_spread"] = (max(values) - min(values)) / 2
+    return stats
+
+
+def run_suite(seed, size, repeats, rounds):
+    rng = random.Random(seed)
+    corpora = synthetic_corpora(load_sample_bios(), rng, size)
+    cases = {corpus: function_cases(texts) for corpus, texts in corpora.items()}
+
+    # Rounds on the outside, so a slow stretch of the machine hits one round of every
+    # function instead of every round of one function
+    per_round = {}
+    for _ in range(rounds):
+        for corpus, corpus_cases in cases.items():
+            for name, func, args in corpus_cases:
+                per_round.setdefault(name, {}).setdefault(corpus, []).append(
+                    percentile_stats(time_calls(func, args, repeats))
+                )
+
+    results = {
+        name: {corpus: median_of_rounds(stats) for corpus, stats in corpora.items()}
+        for name, corpora in per_round.items()
+    }
+    return {
+        "meta": {
+            "seed": seed,
+            "corpus_size": size,
+            "repeats": repeats,
+            "rounds": rounds,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "spacy": spacy.__version__,
+            "spacy_profile": PIPELINE_PROFILE,
+            "unit": "us",
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold, min_delta):
+    """
+    List of (function, corpus, stat, baseline, current, change) that got slower than threshold
+    and by more than the noise: min_delta microseconds (sub-microsecond calls are mostly timer
+    noise) or NOISE_FACTOR times the spread both runs measured, whichever is larger
+    """
+    regressions = []
+    for name, corpora in current["results"].items():
+        for corpus, stats in corpora.items():
+            old = baseline["results"].get(name, {}).get(corpus)
+            if old is None:
+                continue
+            for stat in COMPARED_STATS:
+                change = stats[stat] / old[stat] - 1 if old[stat] else 0.0
+                noise = NOISE_FACTOR * (stats.get(f"{stat}_spread", 0.0) + old.get(f"{stat}_spread", 0.0))
+                if change > threshold and stats[stat] - old[stat] > max(min_delta, noise):
+                    regressions.append((name, corpus, stat, old[stat], stats[stat], change))
+    return regressions
+
+
+def print_table(report, baseline=None):
+    header = f"{'function':>25} {'corpus':>10} {'p50 (us)':>10} {'p95 (us)':>10} {'p99 (us)':>10}"
+    print(header + (f" {'p50 vs base':>12}" if baseline else ""))
+    for name, corpora in report["results"].items():
+        for corpus, stats in corpora.items():
+            line = f"{name:>25} {corpus:>10} {stats['p50']:>10.1f} {stats['p95']:>10.1f} {stats['p99']:>10.1f}"
+            old = (baseline or {}).get("results", {}).get(name, {}).get(corpus)
+            if old:
+                line += f" {stats['p50'] / old['p50'] - 1:>+11.1%}"
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seed", type=int, default=17)
+    parser.add_argument("--size", type=int, default=50, help="texts per corpus")
+    parser.add_argument("--repeats", type=int, default=2, help="passes over each corpus per round")
+    parser.add_argument("--rounds", type=int, default=5, help="times the whole suite runs, stats are their median")
+    parser.add_argument("--output", type=Path, help="write the results to this JSON file")
+    parser.add_argument("--baseline", type=Path, help="compare with this results file")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown, 0.10 = 10%%")
+    parser.add_argument("--min-delta", type=float, default=2.0,
+                        help="ignore slowdowns smaller than this many microseconds")
+    parser.add_argument("--save-baseline", action="store_true", help=f"write the results to {DEFAULT_BASELINE}")
+    args = parser.parse_args()
+
+    report = run_suite(args.seed, args.size, args.repeats, args.rounds)
+
+    baseline = None
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        if baseline["meta"]["seed"] != args.seed or baseline["meta"]["corpus_size"] != args.size:
+            print("warning: baseline was recorded with a different seed or corpus size")
+
+    print_table(report, baseline)
+
+    for path in [args.output, DEFAULT_BASELINE if args.save_baseline else None]:
+        if path:
+            path.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+            print(f"results written to {path}")
+
+    if baseline:
+        regressions = compare(report, baseline, args.threshold, args.min_delta)
+        for name, corpus, stat, old, new, change in regressions:
+            print(f"REGRESSION {name} [{corpus}] {stat}: {old:.1f} -> {new:.1f} us ({change:+.1%})")
+        if regressions:
+            sys.exit(1)
+        print(f"no regression above {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
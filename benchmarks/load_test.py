@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+"""
+End-to-end load test of /recommend_gifts with local Instagram/Twitter stand-ins
+
+Starts api/standin_backend.py (configurable latency, 503 error rate, private and
+missing handles) in its own process, then the API pointed at it, and drives
+/recommend_gifts at a fixed concurrency with a mix of instagram/twitter/manual requests.
+Reports throughput, latency percentiles and error rates per source.
+
+Usage:
+  python benchmarks/load_test.py --concurrency 32 --duration 30
+  python benchmarks/load_test.py --server dev --mix instagram=0.5,twitter=0.5 --error-rate 0.05
+  python benchmarks/load_test.py --target http://127.0.0.1:5000 --standin-port 5050
+      drive an API that is already running with GIFTIQ_SOCIAL_STANDIN_URL=http://127.0.0.1:5050
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "api"))
+
+from bench_serving import start_server, stop_server
+from personality_trait_analyzer import load_sample_bios
+from standin_backend import StandinConfig, start_standin
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        source, weight = part.split("=")
+        mix[source.strip()] = float(weight)
+    return mix
+
+
+def handle_sets(handles, private_rate, missing_rate, seed):
+    """Deterministic split of user0..userN into private and missing handles"""
+    rng = random.Random(seed)
+    private, missing = set(), set()
+    for i in range(handles):
+        draw = rng.random()
+        if draw < private_rate:
+            private.add(f"user{i}")
+        elif draw < private_rate + missing_rate:
+            missing.add(f"user{i}")
+    return private, missing
+
+
+def serve_standin(port, options, ready):
+    config = StandinConfig(
+        latency=options["latency"], posts=options["posts"], private=options["private"],
+        missing=options["missing"], error_rate=options["error_rate"], jitter=options["jitter"],
+        seed=options["seed"], rate_limit=options.get("rate_limit", 0.0), penalty=options.get("penalty", 0.0)
+    )
+    server, _ = start_standin(config, port=port)
+    ready.set()
+    threading.Event().wait()  # serve until the harness terminates this process
+
+
+def drive(url, mix, handles, bios, concurrency, duration, seed):
+    """Run `concurrency` client loops for `duration` seconds, returns one record per request"""
+    records = []
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+    sources, weights = zip(*mix.items())
+
+    def client(worker):
+        rng = random.Random(seed * 1000 + worker)
+        session = requests.Session()
+        local = []
+        i = 0
+        while time.monotonic() < stop_at:
+            source = rng.choices(sources, weights)[0]
+            if source == "manual":
+                value = f"{rng.choice(bios)} #{worker}-{i}"
+            else:
+                value = f"user{rng.randrange(handles)}"
+            i += 1
+
+            start = time.perf_counter()
+            try:
+                response = session.post(f"{url}/recommend_gifts", json={"source": source, "value": value}, timeout=60)
+                status = response.status_code
+                error_type = None if status == 200 else response.json().get("error_type", f"http_{status}")
+            except requests.RequestException as e:
+                status, error_type = 0, type(e).__name__
+            local.append((source, time.perf_counter() - start, status, error_type))
+        with lock:
+            records.extend(local)
+
+    with ThreadPoolExecutor(concurrency) as executor:
+        list(executor.map(client, range(concurrency)))
+    return records
+
+
+def summarize(records, duration):
+    by_source = defaultdict(list)
+    for record in records:
+        by_source[record[0]].append(record)
+    by_source["all"] = records
+
+    summary = {}
+    for source, entries in by_source.items():
+        latencies = sorted(latency * 1000 for _, latency, _, _ in entries)
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else latencies * 99
+        errors = Counter(error_type for _, _, status, error_type in entries if status != 200)
+        summary[source] = {
+            "requests": len(entries),
+            "throughput_rps": len(entries) / duration,
+            "p50_ms": cuts[49],
+            "p95_ms": cuts[94],
+            "p99_ms": cuts[98],
+            "error_rate": sum(errors.values()) / len(entries),
+            "errors": dict(errors.most_common()),
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20, help="seconds of load")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("instagram=0.45,twitter=0.45,manual=0.1"))
+    parser.add_argument("--handles", type=int, default=1000, help="distinct social handles to draw from")
+    parser.add_argument("--latency", type=float, default=0.15, help="stand-in latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.1, help="extra random stand-in latency")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="share of stand-in calls failing with 503")
+    parser.add_argument("--private-rate", type=float, default=0.05)
+    parser.add_argument("--missing-rate", type=float, default=0.05)
+    parser.add_argument("--posts", type=int, default=20)
+    parser.add_argument("--upstream-limit", type=float, default=0,
+                        help="stand-in lookups per second per source before it answers 429, 0 = unlimited")
+    parser.add_argument("--upstream-penalty", type=float, default=0, help="seconds of 429s after each one")
+    parser.add_argument("--scrape-rate", type=float, default=0,
+                        help="API scheduler lookups per second per source, 0 = unlimited")
+    parser.add_argument("--profile-cache-ttl", type=float, default=0,
+                        help="API profile cache TTL, 0 sends every lookup to the stand-in")
+    parser.add_argument("--server", choices=["gunicorn", "dev"], default="gunicorn")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--target", help="URL of an API that is already running (skips starting one)")
+    parser.add_argument("--standin-port", type=int, help="defaults to a free port")
+    parser.add_argument("--seed", type=int, default=18)
+    parser.add_argument("--output", type=Path, help="write the summary to this JSON file")
+    args = parser.parse_args()
+
+    private, missing = handle_sets(args.handles, args.private_rate, args.missing_rate, args.seed)
+    standin_port = args.standin_port or free_port()
+    ready = multiprocessing.Event()
+    standin = multiprocessing.Process(target=serve_standin, daemon=True, args=(standin_port, {
+        "latency": args.latency, "jitter": args.jitter, "error_rate": args.error_rate, "posts": args.posts,
+        "private": private, "missing": missing, "seed": args.seed,
+        "rate_limit": args.upstream_limit, "penalty": args.upstream_penalty,
+    }, ready))
+    standin.start()
+    ready.wait(10)
+    standin_url = f"http://127.0.0.1:{standin_port}"
+
+    api = None
+    url = args.target
+    if url is None:
+        port = free_port()
+        env = {
+            "GIFTIQ_SOCIAL_STANDIN_URL": standin_url,
+            "GIFTIQ_PROFILE_CACHE_PATH": os.path.join(tempfile.mkdtemp(), "profiles.sqlite3"),
+            "GIFTIQ_PROFILE_CACHE_TTL": str(args.profile_cache_ttl),
+            "GIFTIQ_PROFILE_CACHE_NEGATIVE_TTL": str(args.profile_cache_ttl),
+            # The stand-in has no upstream limit unless --scrape-rate asks to model one
+            "GIFTIQ_SCRAPE_RATE_INSTAGRAM": str(args.scrape_rate),
+            "GIFTIQ_SCRAPE_RATE_TWITTER": str(args.scrape_rate),
+            # The stand-in pool should not be the bottleneck being measured
+            "GIFTIQ_INSTALOADER_POOL_SIZE": str(max(args.threads, 4)),
+        }
+        if args.server == "gunicorn":
+            command = [sys.executable, "-W", "ignore", "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"]
+            env.update({"GIFTIQ_BIND": f"127.0.0.1:{port}", "GIFTIQ_WORKERS": str(args.workers),
+                        "GIFTIQ_THREADS": str(args.threads)})
+        else:
+            command = [sys.executable, "-W", "ignore", "app.py"]
+        api, url = start_server(command, port, env)
+
+    try:
+        print(f"API {url}, stand-in {standin_url}, {args.concurrency} clients for {args.duration:.0f}s")
+        records = drive(url, args.mix, args.handles, load_sample_bios(), args.concurrency, args.duration, args.seed)
+    finally:
+        if api is not None:
+            stop_server(api)
+        standin.terminate()
+
+    summary = summarize(records, args.duration)
+    print(f"{'source':>10} {'requests':>9} {'req/s':>8} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} {'errors':>7}  error types")
+    for source, stats in summary.items():
+        types = ", ".join(f"{name}={count}" for name, count in stats["errors"].items())
+        print(f"{source:>10} {stats['requests']:>9} {stats['throughput_rps']:>8.1f} {stats['p50_ms']:>9.1f} "
+              f"{stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f} {stats['error_rate']:>7.1%}  {types}")
+
+    if args.output:
+        args.output.write_text(json.dumps({"config": {k: str(v) for k, v in vars(args).items()},
+                                           "summary": summary}, indent=2) + "\n", encoding="utf-8")
+        print(f"summary written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,13 @@
 """
 GiftIQ Global Runner
 Starts both Flask API and Streamlit UI simultaneously
+
+Usage:
+  python run.py                 Flask dev server (debug, auto-reload)
+  python run.py --production    Gunicorn, preforking workers (see api/gunicorn.conf.py)
+                                GIFTIQ_WORKERS / GIFTIQ_THREADS / GIFTIQ_BIND configure it
+  python run.py --async         Uvicorn with the async app (see api/asgi.py), for traffic
+                                dominated by slow Instagram/Twitter lookups
 """
 
 import subprocess
@@ -15,14 +22,22 @@ warnings.filterwarnings('ignore')
 
 processes = []
 
-def run_flask_app():
+def run_flask_app(production=False, use_async=False):
     """Start Flask API server"""
-    print("🚀 Starting Flask API server...")
+    print("🚀 Starting Flask API server" + (" (production)..." if production else " (async)..." if use_async else "..."))
     api_path = Path(__file__).parent / "api"
+    if use_async:
+        # Lookups are awaited concurrently, spaCy runs on its own executor
+        command = ["python3", "-W", "ignore", "asgi.py"]
+    elif production:
+        # Model and catalog load once in the gunicorn master, workers are forked from it
+        command = ["python3", "-W", "ignore", "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"]
+    else:
+        command = ["python3", "-W","ignore","app.py"]
     try:
         # Start Flask and display output in real-time
         process = subprocess.Popen(
-            ["python3", "-W","ignore","app.py"],
+            command,
             cwd=str(api_path)
         )
         processes.append(process)
@@ -71,9 +86,12 @@ def main():
     print("🎁 GiftIQ - Starting All Services")
     print("=" * 60)
     print()
+
+    production = "--production" in sys.argv[1:]
+    use_async = "--async" in sys.argv[1:]
     
     # Start Flask API first
-    flask_process = run_flask_app()
+    flask_process = run_flask_app(production, use_async)
     
     # Wait for Flask to start
     time.sleep(3)